@@ -0,0 +1,96 @@
+"""
+Admission Control - Bounded concurrency and load shedding for engine work
+
+Only a fixed number of requests may run the expert system at once. A few
+more may wait briefly for a slot; anything beyond that is refused straight
+away so the caller can answer 503 instead of queueing behind a backlog.
+Requests answered without the engine (table or cache hits) bypass
+admission entirely: they hold no slot and are never shed, only counted.
+"""
+
+from contextlib import contextmanager
+import threading
+import time
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of admitted"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"Server busy ({reason}), retry in {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Semaphore with a bounded, time-limited wait queue"""
+
+    def __init__(self, max_concurrent=4, max_queue=16, queue_timeout=0.5, retry_after=1):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._lock = threading.Condition()
+        self._in_flight = 0
+        self._waiting = 0
+        self._counts = dict.fromkeys(
+            ('admitted', 'queued', 'shed_queue_full', 'shed_timeout', 'bypassed'), 0)
+        self._queue_seconds = 0.0
+
+    def bypass(self):
+        """Count a request answered without the engine, unthrottled"""
+        with self._lock:
+            self._counts['bypassed'] += 1
+
+    @contextmanager
+    def admit(self):
+        """Hold an engine slot for the duration of the ``with`` block"""
+        self._acquire()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._lock.notify_all()
+
+    def _acquire(self):
+        with self._lock:
+            if self._in_flight < self.max_concurrent and not self._waiting:
+                self._in_flight += 1
+                self._counts['admitted'] += 1
+                return
+
+            if self._waiting >= self.max_queue:
+                self._counts['shed_queue_full'] += 1
+                raise Overloaded('queue full', self.retry_after)
+
+            self._waiting += 1
+            self._counts['queued'] += 1
+            start = time.monotonic()
+            deadline = start + self.queue_timeout
+            try:
+                while self._in_flight >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._counts['shed_timeout'] += 1
+                        raise Overloaded('queue timeout', self.retry_after)
+                    self._lock.wait(remaining)
+            finally:
+                self._waiting -= 1
+                self._queue_seconds += time.monotonic() - start
+
+            self._in_flight += 1
+            self._counts['admitted'] += 1
+
+    def stats(self):
+        """Counters since start-up plus the current load"""
+        with self._lock:
+            stats = dict(self._counts)
+            stats['shed'] = stats['shed_queue_full'] + stats['shed_timeout']
+            stats['in_flight'] = self._in_flight
+            stats['waiting'] = self._waiting
+            stats['max_concurrent'] = self.max_concurrent
+            stats['max_queue'] = self.max_queue
+            stats['avg_queue_ms'] = (1000 * self._queue_seconds / stats['queued']
+                                     if stats['queued'] else 0.0)
+            return stats
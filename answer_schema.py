@@ -0,0 +1,91 @@
+"""
+Answer Schema - Allowed answer keys and values, derived from the rules
+
+The schema is the set of (key, value) pairs that either a rule condition
+tests or a questionnaire can produce. Anything else can never match a rule,
+so trimming it leaves the diagnosis unchanged (fact ids stay in the same
+relative order) while keeping junk out of the engine's working memory.
+"""
+
+from knowledge_base import ComputerDiagnosisSystem
+from rule_index import compile_rules, INITIAL_FACTS
+from answer_table import enumerate_cli_paths, enumerate_web_paths
+import threading
+
+
+class InvalidAnswers(Exception):
+    """Raised when an answer payload is refused outright"""
+
+
+def derive_pairs(engine_class=ComputerDiagnosisSystem):
+    """Every (key, value) pair the rules or questionnaires know about
+
+    The questionnaires only ask for the built-in knowledge base; other
+    engine classes get the pairs their own rules test.
+    """
+    pairs = set()
+    for rule in compile_rules(engine_class):
+        for branch in rule.branches:
+            pairs.update(branch)
+    if engine_class is ComputerDiagnosisSystem:
+        for walker in (enumerate_cli_paths, enumerate_web_paths):
+            for facts in walker():
+                pairs.update(facts.items())
+    # Clients must not re-declare the engine's own initial facts
+    pairs.difference_update(INITIAL_FACTS)
+    return pairs
+
+
+class AnswerSchema:
+    """Set-lookup validator for /diagnose answer payloads
+
+    In 'trim' mode unknown pairs are dropped; in 'reject' mode they raise
+    InvalidAnswers. Payloads that are not an object, or have more answers
+    than there are known keys, are always rejected.
+    """
+
+    MODES = ('trim', 'reject')
+
+    def __init__(self, pairs=None, mode='trim', max_answers=None):
+        if mode not in self.MODES:
+            raise ValueError(f"mode must be one of {self.MODES}, not {mode!r}")
+        self.pairs = frozenset(pairs if pairs is not None else derive_pairs())
+        self.keys = frozenset(key for key, _ in self.pairs)
+        self.values = {key: frozenset(v for k, v in self.pairs if k == key) for key in self.keys}
+        self.mode = mode
+        self.max_answers = max_answers or len(self.keys)
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(('checked', 'trimmed', 'rejected'), 0)
+
+    def validate(self, answers):
+        """Return the known subset of ``answers`` or raise InvalidAnswers"""
+        try:
+            if not isinstance(answers, dict):
+                raise InvalidAnswers("answers must be an object")
+            if len(answers) > self.max_answers:
+                raise InvalidAnswers(f"too many answers ({len(answers)} > {self.max_answers})")
+
+            pairs = self.pairs
+            known = {key: value for key, value in answers.items()
+                     if type(value) is str and (key, value) in pairs}
+            if len(known) != len(answers):
+                if self.mode == 'reject':
+                    unknown = sorted(str(key) for key in answers if key not in known)
+                    raise InvalidAnswers(f"unknown answers: {', '.join(unknown)}")
+                self._count('trimmed')
+        except InvalidAnswers:
+            self._count('rejected')
+            raise
+
+        self._count('checked')
+        return known
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counts)
+        stats.update(mode=self.mode, max_answers=self.max_answers, known_pairs=len(self.pairs))
+        return stats
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Answer Table - Precomputed diagnoses for every questionnaire path
+
+The terminal questionnaire (DiagnosisQuestions) and the web questionnaire
+(questionFlows in static/js/question_flows.js) are finite trees, so every
+answer set a user can submit is known in advance. This module walks both trees,
+runs each answer set through the expert system in parallel and freezes the
+results into a lookup table the web app consults before building an engine.
+
+Keys keep the order in which answers were given: when more than one rule
+matches, experta fires them by fact declaration order and the last one to
+fire wins, so the same facts in another order may diagnose differently.
+
+Usage:
+    python answer_table.py [--output answer_table.json] [--workers N]
+"""
+
+from knowledge_base import (ComputerDiagnosisSystem, answer_key, rule_results,
+                            knowledge_base_version)
+from diagnosis_questions import DiagnosisQuestions
+from experta import Fact
+from concurrent.futures import ProcessPoolExecutor
+from types import MappingProxyType
+import argparse
+import json
+import os
+
+TABLE_FILE = 'answer_table.json'
+WEB_QUESTION_FLOWS = os.path.join('static', 'js', 'question_flows.js')
+FALLBACK_RULE = 'general_troubleshooting'
+
+
+# ==================== QUESTION TREE WALKERS ====================
+
+def enumerate_cli_paths(questions=None):
+    """Yield the facts produced by every path through DiagnosisQuestions"""
+    questions = questions or DiagnosisQuestions()
+    for name in sorted(dir(questions)):
+        if name.startswith('ask_'):
+            yield from _walk_questionnaire(getattr(questions, name))
+
+
+def _walk_questionnaire(ask):
+    """Replay ``ask`` once per combination of choices it can be given"""
+    pending = [[]]
+    while pending:
+        script = pending.pop()
+        position = 0
+
+        def get_choice(question, options):
+            nonlocal position
+            if position == len(script):
+                pending.extend(script + [i] for i in range(1, len(options)))
+                script.append(0)
+            choice = options[script[position]]
+            position += 1
+            return choice
+
+        yield ask(get_choice)
+
+
+def load_question_flows(path=WEB_QUESTION_FLOWS):
+    """Read the questionFlows object literal used by the web page"""
+    with open(path, 'r', encoding='utf-8') as f:
+        source = f.read()
+
+    start = source.index('{', source.index('const questionFlows'))
+    return json.loads(_js_literal_to_json(source, start))
+
+
+def _js_literal_to_json(source, start):
+    """Convert the JavaScript object literal starting at ``start`` to JSON"""
+    out = []
+    depth = 0
+    i = start
+    while True:
+        char = source[i]
+        if char in '\'"':
+            value, i = _read_js_string(source, i)
+            out.append(json.dumps(value))
+            continue
+        if char.isalpha() or char in '_$':
+            end = i
+            while source[end].isalnum() or source[end] in '_$':
+                end += 1
+            word = source[i:end]
+            out.append(word if word in ('true', 'false', 'null') else json.dumps(word))
+            i = end
+            continue
+        if char in '{[':
+            depth += 1
+        elif char in '}]':
+            depth -= 1
+            # JavaScript tolerates trailing commas, JSON does not
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ',':
+                out.pop()
+        out.append(char)
+        i += 1
+        if depth == 0:
+            return ''.join(out)
+
+
+def _read_js_string(source, i):
+    """Return the value of the quoted string at ``i`` and the index after it"""
+    quote = source[i]
+    escapes = {'n': '\n', 't': '\t', 'r': '\r'}
+    chars = []
+    i += 1
+    while source[i] != quote:
+        if source[i] == '\\':
+            i += 1
+            chars.append(escapes.get(source[i], source[i]))
+        else:
+            chars.append(source[i])
+        i += 1
+    return ''.join(chars), i + 1
+
+
+def enumerate_web_paths(flows=None):
+    """Yield the answers posted to /diagnose by every path through the page"""
+    flows = flows if flows is not None else load_question_flows()
+    for category in flows:
+        yield from _walk_flow(flows[category], 0, {})
+
+
+def _walk_flow(flow, index, answers):
+    """Mirror showNextQuestion()/selectAnswer() from static/js/index.js"""
+    while index < len(flow):
+        question = flow[index]
+        condition = question.get('condition', {})
+        if any(answers.get(key) != value for key, value in condition.items()):
+            index += 1
+        elif question.get('hidden'):
+            answers = dict(answers, **{question['key']: question['value']})
+            index += 1
+        else:
+            for option in question['options']:
+                chosen = dict(answers, **{question['key']: option['value']})
+                if option['next'] == 'end':
+                    yield chosen
+                else:
+                    yield from _walk_flow(flow, index + 1, chosen)
+            return
+    yield answers
+
+
+# ==================== TABLE BUILD ====================
+
+def _fired_rule(items):
+    """Run one answer set through a fresh engine, return the winning title"""
+    engine = ComputerDiagnosisSystem()
+    engine.reset()
+    for key, value in items:
+        engine.declare(Fact(**{key: value}))
+    engine.run()
+    return engine.diagnosis_result['diagnosis']
+
+
+def build_table(workers=None):
+    """Diagnose every reachable answer set and return the table as a dict"""
+    paths = {}
+    for source, walker in (('cli', enumerate_cli_paths), ('web', enumerate_web_paths)):
+        for facts in walker():
+            paths.setdefault(tuple(facts.items()), set()).add(source)
+
+    results = rule_results()
+    rule_by_title = {result['diagnosis']: name for name, result in results.items()}
+
+    items = list(paths)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        titles = list(executor.map(_fired_rule, items, chunksize=16))
+
+    entries = [
+        {'facts': [list(pair) for pair in path],
+         'rule': rule_by_title[title],
+         'sources': sorted(paths[path])}
+        for path, title in zip(items, titles)
+    ]
+    return {
+        'version': knowledge_base_version(),
+        'results': {name: result.as_dict() for name, result in results.items()},
+        'entries': entries
+    }
+
+
+def report(table):
+    """Summarise paths that fall through to the catch-all and dead rules"""
+    fallback = [e for e in table['entries'] if e['rule'] == FALLBACK_RULE]
+    reached = {e['rule'] for e in table['entries']}
+    unreachable = sorted(set(table['results']) - reached - {FALLBACK_RULE})
+
+    lines = [f"📋 {len(table['entries'])} answer paths, "
+             f"{len(reached - {FALLBACK_RULE})} of {len(table['results']) - 1} rules reachable"]
+    lines.append(f"\n⚠️  {len(fallback)} paths reach no specific rule:")
+    for entry in fallback:
+        facts = ', '.join(f"{k}={v}" for k, v in entry['facts']) or '(no facts)'
+        lines.append(f"   [{'/'.join(entry['sources'])}] {facts}")
+    lines.append(f"\n🚫 {len(unreachable)} rules no path can reach:")
+    for name in unreachable:
+        lines.append(f"   {name}")
+    return '\n'.join(lines)
+
+
+# ==================== LOOKUP ====================
+
+class AnswerTable:
+    """Frozen mapping from an ordered answer set to its diagnosis"""
+
+    def __init__(self, entries=None, version=None):
+        self.entries = MappingProxyType(entries or {})
+        self.version = version
+
+    @classmethod
+    def load(cls, path=TABLE_FILE):
+        """Load a table file; missing or stale tables load empty"""
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return cls()
+
+        if data.get('version') != knowledge_base_version():
+            print(f"Warning: {path} was built for other rules, ignoring it")
+            return cls()
+
+        # Entries share the interned Diagnosis objects the rules conclude
+        results = rule_results()
+        entries = {
+            tuple((key, value) for key, value in entry['facts']): results[entry['rule']]
+            for entry in data['entries']
+        }
+        return cls(entries, data['version'])
+
+    def lookup(self, answers):
+        """Return the precomputed result for ``answers``, or None"""
+        try:
+            return self.entries.get(answer_key(answers))
+        except TypeError:
+            # Unhashable answer values can never be in the table
+            return None
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the precomputed answer table")
+    parser.add_argument('--output', default=TABLE_FILE)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    table = build_table(args.workers)
+    with open(args.output, 'w') as f:
+        json.dump(table, f, indent=2)
+
+    print(report(table))
+    print(f"\n✅ Answer table written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Static Assets - Content-hashed, precompressed CSS and JavaScript
+
+Every file under static/css and static/js is fingerprinted with a hash of
+its contents and compressed once, when the pipeline is built, into gzip
+and (if the optional ``brotli`` package is installed) brotli variants.
+Hashed URLs never change meaning, so they are served with a one-year
+immutable Cache-Control; ETags let clients that do revalidate get a 304.
+
+Usage:
+    python assets.py [--output static/dist]
+"""
+
+from flask import request
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+ASSET_ROOT = 'static'
+ASSET_DIRS = ('css', 'js')
+URL_PREFIX = '/assets/'
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# Smallest encoding first; identity is always available
+ENCODINGS = ('br', 'gzip')
+
+
+def compress(data):
+    """Return {encoding: bytes} for every encoding worth serving"""
+    variants = {None: data}
+    variants['gzip'] = gzip.compress(data, compresslevel=9, mtime=0)
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+    # Tiny files can grow when compressed
+    return {enc: body for enc, body in variants.items()
+            if enc is None or len(body) < len(data)}
+
+
+class Asset:
+    """One static file and its precompressed variants"""
+
+    __slots__ = ('name', 'hashed_name', 'content_type', 'etag', 'variants')
+
+    def __init__(self, name, data, content_type):
+        digest = hashlib.sha256(data).hexdigest()
+        root, ext = os.path.splitext(name)
+        self.name = name
+        self.hashed_name = f"{root}.{digest[:12]}{ext}"
+        self.content_type = content_type
+        self.etag = digest[:24]
+        self.variants = compress(data)
+
+    def negotiate(self, accept_encodings):
+        """Pick the best variant the client accepts"""
+        for encoding in ENCODINGS:
+            if encoding in self.variants and accept_encodings[encoding]:
+                return encoding
+        return None
+
+
+class AssetPipeline:
+    """Builds the asset set once and serves it from memory"""
+
+    def __init__(self, root=ASSET_ROOT, directories=ASSET_DIRS):
+        self.root = root
+        self.by_name = {}
+        self.by_hashed_name = {}
+        for directory in directories:
+            for dirpath, _, filenames in os.walk(os.path.join(root, directory)):
+                for filename in sorted(filenames):
+                    path = os.path.join(dirpath, filename)
+                    self.add(os.path.relpath(path, root).replace(os.sep, '/'), path)
+
+    def add(self, name, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type.endswith('javascript'):
+            content_type += '; charset=utf-8'
+        asset = Asset(name, data, content_type)
+        self.by_name[name] = asset
+        self.by_hashed_name[asset.hashed_name] = asset
+
+    def url(self, name):
+        """Hashed URL for a source asset name such as 'css/index.css'"""
+        return URL_PREFIX + self.by_name[name].hashed_name
+
+    def manifest(self):
+        return {name: asset.hashed_name for name, asset in sorted(self.by_name.items())}
+
+    def write(self, output):
+        """Write hashed files, their .gz/.br variants and manifest.json"""
+        for asset in self.by_name.values():
+            path = os.path.join(output, asset.hashed_name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            for encoding, body in asset.variants.items():
+                suffix = {None: '', 'gzip': '.gz', 'br': '.br'}[encoding]
+                with open(path + suffix, 'wb') as f:
+                    f.write(body)
+        with open(os.path.join(output, 'manifest.json'), 'w') as f:
+            json.dump(self.manifest(), f, indent=2)
+
+
+def cached_response(app, asset, cache_control=IMMUTABLE):
+    """Serve ``asset`` for the current request, honouring If-None-Match"""
+    encoding = asset.negotiate(request.accept_encodings)
+    etag = asset.etag if encoding is None else f"{asset.etag}-{encoding}"
+
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(asset.variants[encoding], content_type=asset.content_type)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hash and precompress static assets")
+    parser.add_argument('--output', default=os.path.join(ASSET_ROOT, 'dist'))
+    args = parser.parse_args()
+
+    pipeline = AssetPipeline()
+    pipeline.write(args.output)
+    for name, asset in sorted(pipeline.by_name.items()):
+        sizes = ', '.join(f"{enc or 'identity'} {len(body):,}B"
+                          for enc, body in asset.variants.items())
+        print(f"   {name} -> {asset.hashed_name} ({sizes})")
+    if brotli is None:
+        print("ℹ️  brotli not installed, only gzip variants were written")
+    print(f"\n✅ Assets written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
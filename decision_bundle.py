@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Decision Bundle - The rule set compiled for evaluation in the browser
+
+The bundle is a compact JSON document the web page caches and evaluates
+locally, so a diagnosis needs no round trip to /diagnose. It carries the
+knowledge base version; the server re-diagnoses history records made with
+an old bundle, and re-derives the rule of the others from their answers.
+
+Layout:
+    version   knowledge_base_version() of the rules it was built from
+    initial   facts the engine declares on reset, in declaration order
+    first_answer_id  fact id of the first answer declared after them
+    facts     every (key, value) pair a rule tests, referenced by index
+    results   [rule name, diagnosis, solution, severity]
+    rules     [result index, salience, [[fact index, ...], ...branches]]
+    fallback  result index of the catch-all rule
+
+Usage:
+    python decision_bundle.py [--output static/diagnosis_bundle.json]
+"""
+
+from knowledge_base import ComputerDiagnosisSystem, rule_results, knowledge_base_version
+from rule_index import compile_rules, INITIAL_FACTS, FIRST_ANSWER_ID, FALLBACK_RULE
+import argparse
+import json
+import os
+
+BUNDLE_FILE = os.path.join('static', 'diagnosis_bundle.json')
+
+
+def build_bundle(engine_class=ComputerDiagnosisSystem):
+    """Compile the rules of ``engine_class`` into a bundle dict"""
+    results = rule_results(engine_class)
+    rules = compile_rules(engine_class)
+
+    facts = []
+    fact_index = {}
+    for rule in rules:
+        for branch in rule.branches:
+            for pair in branch:
+                if pair not in fact_index:
+                    fact_index[pair] = len(facts)
+                    facts.append(list(pair))
+
+    names = [rule.name for rule in rules]
+    return {
+        'version': knowledge_base_version(engine_class),
+        'initial': [list(pair) for pair in INITIAL_FACTS],
+        'first_answer_id': FIRST_ANSWER_ID,
+        'facts': facts,
+        'results': [
+            [name, results[name]['diagnosis'], results[name]['solution'], results[name]['severity']]
+            for name in names
+        ],
+        'rules': [
+            [i, rule.salience, [[fact_index[pair] for pair in branch] for branch in rule.branches]]
+            for i, rule in enumerate(rules) if rule.name != FALLBACK_RULE
+        ],
+        'fallback': names.index(FALLBACK_RULE)
+    }
+
+
+def bundle_json(bundle):
+    """Serialise a bundle as compact UTF-8 JSON"""
+    return json.dumps(bundle, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def evaluate(bundle, answers):
+    """Reference implementation of diagnoseLocally() in static/js/index.js"""
+    ids = {tuple(pair): i + 1 for i, pair in enumerate(bundle['initial'])}
+    next_id = bundle['first_answer_id']
+    for pair in answers.items():
+        if pair not in ids:
+            ids[pair] = next_id
+            next_id += 1
+
+    winner = None
+    for result_index, salience, branches in bundle['rules']:
+        for branch in branches:
+            pairs = [tuple(bundle['facts'][i]) for i in branch]
+            if all(pair in ids for pair in pairs):
+                key = (salience, sorted((ids[pair] for pair in pairs), reverse=True))
+                if winner is None or key < winner[0]:
+                    winner = (key, result_index)
+
+    name, diagnosis, solution, severity = bundle['results'][
+        winner[1] if winner else bundle['fallback']]
+    return {'rule': name, 'diagnosis': diagnosis, 'solution': solution, 'severity': severity}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the client-side decision bundle")
+    parser.add_argument('--output', default=BUNDLE_FILE)
+    args = parser.parse_args()
+
+    data = bundle_json(build_bundle())
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'wb') as f:
+        f.write(data)
+    print(f"✅ Decision bundle written to {args.output} ({len(data):,} bytes)")
+
+
+if __name__ == '__main__':
+    main()
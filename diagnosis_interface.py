@@ -2,23 +2,48 @@
 Diagnosis Interface - Handles user interaction and display
 """
 
-from knowledge_base import ComputerDiagnosisSystem, save_diagnosis
+from knowledge_base import save_diagnoses
+from kb_registry import DEFAULT_KNOWLEDGE_BASE, registry_from_environment
+from event_log import event_log_from_environment
 from diagnosis_questions import DiagnosisQuestions
-from experta import Fact
+from collections import Counter
 from datetime import datetime
 import os
+import sys
+import time
+import uuid
+
+# Cursor home, then erase the screen and the scrollback
+CLEAR_SCREEN = '\033[H\033[2J\033[3J'
 
 
 class DiagnosisInterface:
-    def __init__(self):
-        self.engine = ComputerDiagnosisSystem()
+    def __init__(self, knowledge_base=None, history_batch=1):
+        self.knowledge_base = registry_from_environment().get(knowledge_base)
+        self.event_log = event_log_from_environment()
         self.questions = DiagnosisQuestions()
         self.user_facts = {}
         self.session_start = datetime.now()
         
+        # Diagnoses are written to history in batches of this many
+        self.history_batch = history_batch
+        self.pending_history = []
+        
+        # Session counters for the summary shown on exit
+        self.opened = time.monotonic()
+        self.diagnoses = 0
+        self.severities = Counter()
+        self.question_seconds = 0.0
+        self.engine_seconds = 0.0
+        
+        if os.name == 'nt':
+            # Any os.system call turns on ANSI escape handling in the console
+            os.system('')
+        
     def clear_screen(self):
         """Clear terminal screen"""
-        os.system('cls' if os.name == 'nt' else 'clear')
+        sys.stdout.write(CLEAR_SCREEN)
+        sys.stdout.flush()
     
     def print_header(self):
         """Print welcome header"""
@@ -66,8 +91,37 @@ class DiagnosisInterface:
             'severity': severity,
             'facts': self.user_facts
         }
-        save_diagnosis(diagnosis_data)
-        print("\n✅ Diagnosis saved to history (diagnosis_history.json)")
+        if self.knowledge_base.name != DEFAULT_KNOWLEDGE_BASE:
+            diagnosis_data['knowledge_base'] = self.knowledge_base.name
+        self.pending_history.append(diagnosis_data)
+        self.diagnoses += 1
+        self.severities[severity] += 1
+        if len(self.pending_history) >= self.history_batch:
+            self.flush_history()
+            print("\n✅ Diagnosis saved to history (diagnosis_history.json)")
+        else:
+            print("\n✅ Diagnosis recorded (saved to history with the next batch)")
+    
+    def flush_history(self):
+        """Write buffered diagnoses to the history file"""
+        # They stay buffered until written, so a failed or interrupted
+        # write leaves them for the next attempt
+        records = list(self.pending_history)
+        if save_diagnoses(records):
+            del self.pending_history[:len(records)]
+    
+    def print_session_stats(self):
+        """Summarise the diagnoses made since the interface was opened"""
+        elapsed = time.monotonic() - self.opened
+        hours, rest = divmod(int(elapsed), 3600)
+        print(f"\n📊 Session: {self.diagnoses} diagnoses in {hours}:{rest // 60:02d}:{rest % 60:02d}")
+        if not self.diagnoses:
+            return
+        print(f"   ⏱️  {self.diagnoses / elapsed * 3600:.1f} diagnoses/hour, "
+              f"{self.question_seconds / self.diagnoses:.1f}s answering questions, "
+              f"{self.engine_seconds / self.diagnoses * 1000:.1f} ms in the engine (average)")
+        print("   " + "  ".join(f"{severity}: {count}"
+                               for severity, count in self.severities.most_common()))
     
     def get_choice(self, question, options):
         """Get user input with validation"""
@@ -90,7 +144,11 @@ class DiagnosisInterface:
     
     def run_diagnosis(self):
         """Main diagnosis flow"""
+        event = self.event_log.start('cli', request_id=uuid.uuid4().hex)
+        self.user_facts = {}
         self.print_header()
+        self.session_start = datetime.now()
+        started = time.perf_counter()
         self.clear_screen()
         
         print("\n" + "="*75)
@@ -132,20 +190,25 @@ class DiagnosisInterface:
         
         # Get facts from questions
         self.user_facts = diagnosis_methods[issue](self.get_choice)
+        event.phase('questions')
+        answered = time.perf_counter()
+        self.question_seconds += answered - started
         
-        # Run expert system
-        self.engine.reset()
-        for key, value in self.user_facts.items():
-            self.engine.declare(Fact(**{key: value}))
-        self.engine.run()
+        # Run the selected knowledge base from its post-reset state
+        result = self.knowledge_base.diagnose(self.user_facts)
+        event.phase('diagnose')
+        self.engine_seconds += time.perf_counter() - answered
         
         # Display result
-        if self.engine.diagnosis_result:
-            result = self.engine.diagnosis_result
+        if result:
             self.print_diagnosis(result['diagnosis'], result['solution'], result['severity'])
+            event.phase('record')
+            event.emit(answers=self.user_facts, result=result, knowledge_base=self.knowledge_base)
         else:
             self.print_diagnosis(
                 "Unable to diagnose specific issue",
                 "Try basic troubleshooting steps or consult a technician",
                 "medium"
-            )
\ No newline at end of file
+            )
+            event.phase('record')
+            event.emit(answers=self.user_facts, knowledge_base=self.knowledge_base)
\ No newline at end of file
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Engine Snapshot - Capture an engine's post-reset state and restore it cheaply
+
+reset() throws away the fact list, the agenda and every Rete node memory,
+then re-declares the initial facts through the whole network. The result
+is the same every time, so a snapshot records it once and restore() puts
+shallow copies of those containers back in place. The facts, tokens and
+activations they hold are never changed by a run, so they can be shared.
+
+EnginePool keeps warmed engines with their snapshots, so a diagnosis costs
+neither building the Rete network nor resetting it.
+
+Usage:
+    python engine_snapshot.py --runs 200    # compare reset() with restore()
+"""
+
+from knowledge_base import ComputerDiagnosisSystem
+from answer_table import enumerate_cli_paths
+from experta import Fact
+from experta.agenda import Agenda
+from experta.factlist import FactList
+from contextlib import contextmanager
+import argparse
+import copy
+import threading
+import time
+
+
+# Node attributes holding match state (see experta.matchers.rete.nodes)
+NODE_MEMORY = ('left_memory', 'right_memory', 'memory', 'added', 'removed')
+
+# Engine attributes that are part of the machinery rather than its state
+ENGINE_INTERNALS = frozenset(('facts', 'agenda', 'matcher', 'strategy'))
+
+
+def _network_nodes(root):
+    """Every node reachable from ``root``, each once"""
+    nodes = []
+    seen = set()
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        nodes.append(node)
+        stack.extend(child.node for child in node.children)
+    return nodes
+
+
+class EngineSnapshot:
+    """Post-reset state of one engine instance"""
+
+    def __init__(self, engine):
+        engine.reset()
+        self.engine = engine
+
+        facts = engine.facts
+        self.facts = list(facts.items())
+        self.last_index = facts.last_index
+        self.reference_counter = facts.reference_counter.copy()
+        self.activations = list(engine.agenda.activations)
+
+        self.memories = []
+        for node in _network_nodes(engine.matcher.root_node):
+            state = {name: copy.copy(getattr(node, name))
+                     for name in NODE_MEMORY if hasattr(node, name)}
+            if state:
+                self.memories.append((node, state))
+
+        # Subclass state such as diagnosis_result
+        self.attributes = {name: copy.copy(value) for name, value in vars(engine).items()
+                           if name not in ENGINE_INTERNALS}
+
+    def restore(self):
+        """Put the engine back in its post-reset state"""
+        engine = self.engine
+
+        facts = FactList()
+        facts.update(self.facts)
+        facts.last_index = self.last_index
+        facts.reference_counter = self.reference_counter.copy()
+        engine.facts = facts
+
+        agenda = Agenda()
+        agenda.activations = list(self.activations)
+        engine.agenda = agenda
+
+        for node, state in self.memories:
+            for name, value in state.items():
+                setattr(node, name, copy.copy(value))
+
+        for name, value in self.attributes.items():
+            setattr(engine, name, copy.copy(value))
+        return engine
+
+
+def diagnose_with(engine, answers):
+    """Declare ``answers`` on a freshly reset or restored engine and run it"""
+    for key, value in answers.items():
+        engine.declare(Fact(**{key: value}))
+    engine.run()
+    return engine.diagnosis_result
+
+
+class EnginePool:
+    """Warmed engines handed out one caller at a time"""
+
+    def __init__(self, engine_class=ComputerDiagnosisSystem):
+        self.engine_class = engine_class
+        self._lock = threading.Lock()
+        self._idle = []
+        self._created = 0
+
+    @contextmanager
+    def engine(self):
+        """An engine in its post-reset state, returned to the pool afterwards"""
+        with self._lock:
+            snapshot = self._idle.pop() if self._idle else None
+        if snapshot is None:
+            snapshot = EngineSnapshot(self.engine_class())
+            with self._lock:
+                self._created += 1
+        else:
+            snapshot.restore()
+
+        # An engine whose run raised is not put back; it may be half-way
+        yield snapshot.engine
+        with self._lock:
+            self._idle.append(snapshot)
+
+    def stats(self):
+        with self._lock:
+            return {'created': self._created, 'idle': len(self._idle)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare engine reset() with snapshot restore")
+    parser.add_argument('--runs', type=int, default=200)
+    args = parser.parse_args()
+
+    paths = list(enumerate_cli_paths())
+    cases = [paths[i % len(paths)] for i in range(args.runs)]
+
+    def timed(label, fn):
+        start = time.perf_counter()
+        for answers in cases:
+            fn(answers)
+        per_run = (time.perf_counter() - start) / len(cases)
+        print(f"   {label:<28} {per_run * 1e3:8.3f} ms")
+        return per_run
+
+    engine = ComputerDiagnosisSystem()
+    snapshot = EngineSnapshot(ComputerDiagnosisSystem())
+
+    def new_engine(answers):
+        fresh = ComputerDiagnosisSystem()
+        fresh.reset()
+
+    def reset(answers):
+        engine.reset()
+
+    def restore(answers):
+        snapshot.restore()
+
+    def reset_and_run(answers):
+        engine.reset()
+        engine.diagnosis_result = None
+        return diagnose_with(engine, answers)
+
+    def restore_and_run(answers):
+        return diagnose_with(snapshot.restore(), answers)
+
+    print(f"\n📊 Engine preparation, mean of {len(cases)} runs")
+    timed("new engine + reset()", new_engine)
+    reset_cost = timed("reset()", reset)
+    restore_cost = timed("restore()", restore)
+    print(f"   restore() is {reset_cost / restore_cost:.1f}x faster than reset()")
+
+    print("\n📊 Full diagnosis")
+    timed("reset() + run", reset_and_run)
+    timed("restore() + run", restore_and_run)
+
+    mismatches = [answers for answers in paths if reset_and_run(answers) is not restore_and_run(answers)]
+    print(f"\n✅ Restored engines agree on all {len(paths)} questionnaire paths" if not mismatches
+          else f"\n❌ {len(mismatches)} paths differ, e.g. {mismatches[0]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""
+Event Log - Structured, sampled diagnosis events for operations
+
+Each sampled diagnosis produces one JSON line: request id, the answered
+fact keys, the rule that fired, whether the fallback fired, and how long
+each phase took. Requests that are not sampled get a do-nothing event, so
+they pay for one random() call.
+
+Events go through a bounded queue to a listener thread, which formats and
+writes them. Callers never wait on log I/O; if the writer falls behind,
+new events are dropped and counted instead.
+
+Off unless DIAGNOSIS_EVENT_LOG is set (a file path, or "-" for stderr);
+DIAGNOSIS_EVENT_SAMPLE sets the share of requests logged (0 to 1,
+default 0.01).
+"""
+
+from knowledge_base import rule_results
+from logging.handlers import QueueHandler, QueueListener
+from rule_index import FALLBACK_RULE
+from datetime import datetime
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+
+EVENT_LOG_FILE = 'diagnosis_events.jsonl'
+DEFAULT_SAMPLE_RATE = 0.01
+
+# Every event log writes through this logger; each one's handler only
+# takes the events it wrote
+logger = logging.getLogger('diagnosis.events')
+logger.propagate = False
+logger.setLevel(logging.INFO)
+
+
+class _NullEvent:
+    """Stands in for an event that was not sampled"""
+
+    __slots__ = ()
+
+    def phase(self, name):
+        pass
+
+    def emit(self, **fields):
+        pass
+
+
+NULL_EVENT = _NullEvent()
+
+
+class Event:
+    """One diagnosis being timed phase by phase"""
+
+    __slots__ = ('log', 'fields', 'latency', '_start', '_mark')
+
+    def __init__(self, log, fields):
+        self.log = log
+        self.fields = fields
+        self.latency = {}
+        self._start = self._mark = time.perf_counter()
+
+    def phase(self, name):
+        """Close the phase that ends now"""
+        now = time.perf_counter()
+        self.latency[name] = round((now - self._mark) * 1000, 3)
+        self._mark = now
+
+    def emit(self, answers=None, result=None, error=None, knowledge_base=None, **fields):
+        """Queue the event with the diagnosis outcome
+
+        ``knowledge_base`` is the loaded knowledge base that produced
+        ``result``; its rules name the result. Without one, the built-in
+        knowledge base's rules are used.
+        """
+        self.latency['total'] = round((time.perf_counter() - self._start) * 1000, 3)
+        event = dict(self.fields, **fields)
+        rule_names = self.log.rule_names
+        if knowledge_base is not None:
+            event['knowledge_base'] = knowledge_base.name
+            rule_names = knowledge_base.rule_names
+        if answers is not None:
+            event['fact_keys'] = list(answers)
+        if result is not None:
+            event['rule'] = rule_names.get(id(result))
+            event['fallback'] = event['rule'] == FALLBACK_RULE
+            event['severity'] = result.severity
+        event['status'] = 'ok' if error is None else 'error'
+        if error is not None:
+            event['error'] = type(error).__name__
+        event['latency_ms'] = self.latency
+        self.log.write(event)
+
+
+class _EventQueueHandler(QueueHandler):
+    """Queues records untouched and never blocks"""
+
+    def __init__(self, event_queue, log):
+        super().__init__(event_queue)
+        self.log = log
+
+    def filter(self, record):
+        return getattr(record, 'event_log', None) is self.log
+
+    def prepare(self, record):
+        # Formatting happens on the listener thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.log.dropped()
+
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record):
+        event = dict(timestamp=datetime.fromtimestamp(record.created).isoformat(), **record.msg)
+        return json.dumps(event, separators=(',', ':'), default=str)
+
+
+class EventLog:
+    """Sampled, non-blocking JSON-lines event stream"""
+
+    def __init__(self, path=EVENT_LOG_FILE, sample_rate=DEFAULT_SAMPLE_RATE, max_queue=10000):
+        self.sample_rate = sample_rate if path else 0.0
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(('sampled', 'skipped', 'dropped'), 0)
+        self._handler = None
+        self._listener = None
+        # The built-in knowledge base's results, for events without one
+        self.rule_names = {id(result): name for name, result in rule_results().items()}
+        if not self.sample_rate:
+            return
+
+        writer = logging.StreamHandler() if path == '-' else logging.FileHandler(path)
+        writer.setFormatter(_JsonFormatter())
+        event_queue = queue.Queue(max_queue)
+        self._handler = _EventQueueHandler(event_queue, self)
+        logger.addHandler(self._handler)
+        self._listener = QueueListener(event_queue, writer)
+        self._listener.start()
+        atexit.register(self.close)
+
+    def start(self, source, **fields):
+        """An event for one diagnosis, or a do-nothing one if not sampled"""
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            if self.sample_rate:
+                with self._lock:
+                    self._counts['skipped'] += 1
+            return NULL_EVENT
+        with self._lock:
+            self._counts['sampled'] += 1
+        return Event(self, dict(fields, source=source))
+
+    def write(self, event):
+        logger.info(event, extra={'event_log': self})
+
+    def dropped(self):
+        with self._lock:
+            self._counts['dropped'] += 1
+
+    def close(self):
+        """Write out queued events, stop the listener and close the file"""
+        if self._handler is not None:
+            logger.removeHandler(self._handler)
+            self._handler = None
+        if self._listener is not None:
+            self._listener.stop()
+            for handler in self._listener.handlers:
+                handler.close()
+            self._listener = None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counts)
+        stats['sample_rate'] = self.sample_rate
+        return stats
+
+
+def event_log_from_environment():
+    """The event log configured by DIAGNOSIS_EVENT_LOG and DIAGNOSIS_EVENT_SAMPLE
+
+    Disabled unless DIAGNOSIS_EVENT_LOG is set.
+    """
+    return EventLog(
+        path=os.environ.get('DIAGNOSIS_EVENT_LOG') or None,
+        sample_rate=float(os.environ.get('DIAGNOSIS_EVENT_SAMPLE', DEFAULT_SAMPLE_RATE))
+    )
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Differential Fuzzing - Check that every diagnosis backend agrees
+
+Generates valid answer sets (questionnaire paths), near-valid ones (paths
+with answers dropped, swapped, reordered or polluted) and random ones from
+the fact keys and values used in knowledge_base.py. Each case is evaluated
+by every backend and the diagnosis and severity are compared. Mismatches
+are shrunk to a minimal answer set before being reported.
+
+Usage:
+    python fuzz_backends.py [--cases N] [--workers N] [--seed S]
+                            [--backends experta,restored,rule_index,answer_table,
+                             bundle,schema_trimmed]
+"""
+
+from knowledge_base import ComputerDiagnosisSystem
+from rule_index import RuleIndex, compile_rules, INITIAL_FACTS
+from answer_table import AnswerTable, enumerate_cli_paths, enumerate_web_paths
+from decision_bundle import build_bundle, evaluate
+from answer_schema import AnswerSchema
+from engine_snapshot import EngineSnapshot, diagnose_with
+from experta import Fact
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import os
+import random
+import sys
+import time
+
+JUNK_KEYS = ['foo', 'os_version', 'symptom2', 'category', 'action']
+JUNK_VALUES = ['', 'unknown', 'yes', 'no', 'none', 'other', '0']
+
+
+# ==================== BACKENDS ====================
+
+def _experta_backend():
+    def diagnose(answers):
+        engine = ComputerDiagnosisSystem()
+        engine.reset()
+        for key, value in answers.items():
+            engine.declare(Fact(**{key: value}))
+        engine.run()
+        return engine.diagnosis_result
+    return diagnose
+
+
+def _restored_backend():
+    # One engine, put back in its post-reset state before every case
+    snapshot = EngineSnapshot(ComputerDiagnosisSystem())
+    return lambda answers: diagnose_with(snapshot.restore(), answers)
+
+
+def _rule_index_backend():
+    return RuleIndex().diagnose
+
+
+def _answer_table_backend():
+    # Only has an opinion on the answer sets it was built from
+    return AnswerTable.load().lookup
+
+
+def _bundle_backend():
+    bundle = build_bundle()
+    return lambda answers: evaluate(bundle, answers)
+
+
+def _schema_trimmed_backend():
+    # Trimming unknown answers must never change the diagnosis
+    schema = AnswerSchema()
+    index = RuleIndex()
+    return lambda answers: index.diagnose(schema.validate(answers))
+
+
+BACKENDS = {
+    'experta': _experta_backend,
+    'restored': _restored_backend,
+    'rule_index': _rule_index_backend,
+    'answer_table': _answer_table_backend,
+    'bundle': _bundle_backend,
+    'schema_trimmed': _schema_trimmed_backend,
+}
+
+
+# ==================== CASE GENERATION ====================
+
+class CaseGenerator:
+    """Random answer dicts built from the knowledge base's vocabulary"""
+
+    def __init__(self, seed):
+        self.random = random.Random(seed)
+        self.paths = [list(p.items()) for p in enumerate_cli_paths()]
+        self.paths += [list(p.items()) for p in enumerate_web_paths()]
+
+        pairs = set()
+        for rule in compile_rules():
+            for branch in rule.branches:
+                pairs.update(branch)
+        for path in self.paths:
+            pairs.update(path)
+        pairs.difference_update(INITIAL_FACTS)
+        self.pairs = sorted(pairs)
+        self.values = {}
+        for key, value in self.pairs:
+            self.values.setdefault(key, []).append(value)
+
+    def valid(self):
+        return list(self.random.choice(self.paths))
+
+    def near_valid(self):
+        items = self.valid()
+        for _ in range(self.random.randint(1, 3)):
+            items = self.random.choice(self.MUTATIONS)(self, items)
+        return items
+
+    def noise(self):
+        return self.random.sample(self.pairs, self.random.randint(1, 6))
+
+    def _drop(self, items):
+        if items:
+            del items[self.random.randrange(len(items))]
+        return items
+
+    def _swap_value(self, items):
+        if items:
+            i = self.random.randrange(len(items))
+            key = items[i][0]
+            items[i] = (key, self.random.choice(self.values.get(key, JUNK_VALUES)))
+        return items
+
+    def _shuffle(self, items):
+        self.random.shuffle(items)
+        return items
+
+    def _add_known(self, items):
+        items.insert(self.random.randint(0, len(items)), self.random.choice(self.pairs))
+        return items
+
+    def _add_junk(self, items):
+        pair = (self.random.choice(JUNK_KEYS), self.random.choice(JUNK_VALUES))
+        items.insert(self.random.randint(0, len(items)), pair)
+        return items
+
+    def _splice(self, items):
+        return items + self.valid()[1:]
+
+    MUTATIONS = [_drop, _swap_value, _shuffle, _add_known, _add_junk, _splice]
+
+    def case(self):
+        kind = self.random.random()
+        if kind < 0.2:
+            items = self.valid()
+        elif kind < 0.9:
+            items = self.near_valid()
+        else:
+            items = self.noise()
+        # Later duplicates overwrite earlier ones, as in a JSON object
+        return dict(items)
+
+
+# ==================== COMPARISON ====================
+
+def _outcome(result):
+    return None if result is None else (result['diagnosis'], result['severity'])
+
+
+def compare(backends, answers, timings=None):
+    """Return {backend: (diagnosis, severity)} if the backends disagree"""
+    outcomes = {}
+    for name, diagnose in backends.items():
+        start = time.perf_counter()
+        outcome = _outcome(diagnose(dict(answers)))
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+        if outcome is not None:
+            outcomes[name] = outcome
+    if len(set(outcomes.values())) > 1:
+        return outcomes
+    return None
+
+
+def shrink(backends, answers):
+    """Drop answers one at a time while the backends still disagree"""
+    items = list(answers.items())
+    changed = True
+    while changed:
+        changed = False
+        for i in range(len(items)):
+            candidate = items[:i] + items[i + 1:]
+            if compare(backends, dict(candidate)):
+                items = candidate
+                changed = True
+                break
+    return dict(items)
+
+
+def _fuzz_worker(names, seed, cases):
+    """Run ``cases`` random cases in one process, return counts and failures"""
+    backends = {name: BACKENDS[name]() for name in names}
+    generator = CaseGenerator(seed)
+    failures = {}
+    timings = {}
+    for _ in range(cases):
+        answers = generator.case()
+        if compare(backends, answers, timings):
+            minimal = shrink(backends, answers)
+            key = tuple(minimal.items())
+            if key not in failures:
+                failures[key] = (minimal, answers, compare(backends, minimal))
+    return cases, timings, list(failures.values())
+
+
+def fuzz(names, cases, workers, seed):
+    """Spread ``cases`` over ``workers`` processes and merge their findings"""
+    per_worker = [cases // workers + (1 if i < cases % workers else 0) for i in range(workers)]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_fuzz_worker, names, seed + i, n)
+                   for i, n in enumerate(per_worker) if n]
+        results = [f.result() for f in futures]
+    wall = time.perf_counter() - start
+
+    failures = {}
+    backend_seconds = dict.fromkeys(names, 0.0)
+    for _, timings, found in results:
+        for name, seconds in timings.items():
+            backend_seconds[name] += seconds
+        for minimal, original, outcomes in found:
+            failures.setdefault(tuple(minimal.items()), (minimal, original, outcomes))
+    return {
+        'cases': sum(r[0] for r in results),
+        'evaluations': sum(r[0] for r in results) * len(names),
+        'wall_seconds': wall,
+        'backend_seconds': backend_seconds,
+        'failures': list(failures.values()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Differential fuzzing of diagnosis backends")
+    parser.add_argument('--cases', type=int, default=20000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--backends', default=','.join(BACKENDS))
+    args = parser.parse_args()
+
+    names = args.backends.split(',')
+    unknown = [n for n in names if n not in BACKENDS]
+    if unknown:
+        parser.error(f"unknown backends: {', '.join(unknown)}")
+
+    summary = fuzz(names, args.cases, args.workers, args.seed)
+    rate = summary['evaluations'] / summary['wall_seconds']
+    print(f"🔬 {summary['cases']} cases x {len(names)} backends "
+          f"on {args.workers} workers in {summary['wall_seconds']:.2f}s "
+          f"({rate:,.0f} evaluations/s)")
+    for name, seconds in summary['backend_seconds'].items():
+        per_backend = summary['cases'] / seconds if seconds else float('inf')
+        print(f"   {name:>14}: {per_backend:,.0f} evaluations/s per core")
+
+    if not summary['failures']:
+        print("✅ All backends agree")
+        return 0
+
+    print(f"\n❌ {len(summary['failures'])} mismatches:")
+    for minimal, original, outcomes in summary['failures']:
+        print(f"\n   minimal: {minimal}")
+        print(f"   found as: {original}")
+        for name, (diagnosis, severity) in sorted(outcomes.items()):
+            print(f"   {name:>14}: {diagnosis} [{severity}]")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+History Collector - Local stand-in for a central history service
+
+Accepts the gzip-compressed batches RemoteHistorySink sends, ignores any
+batch id it has already stored, and appends the records (tagged with the
+sending node) to one JSON file. --fail-rate makes it refuse a share of
+batches, to exercise the sink's spooling and retries.
+
+Usage:
+    python history_collector.py [--port 5100] [--output central_history.json]
+                                [--fail-rate 0.0]
+    HISTORY_COLLECTOR_URL=http://localhost:5100/batches python web_app.py
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import gzip
+import json
+import os
+import random
+import threading
+
+
+class Collector:
+    """Stores received batches in a JSON file, once per batch id"""
+
+    def __init__(self, output, fail_rate=0.0):
+        self.output = output
+        self.fail_rate = fail_rate
+        self._lock = threading.Lock()
+        try:
+            with open(output, 'r') as f:
+                self.records = json.load(f)
+        except FileNotFoundError:
+            self.records = []
+        self.batch_ids = {record.get('batch_id') for record in self.records}
+
+    def receive(self, batch):
+        """Store a decoded batch; False if it should be refused"""
+        if random.random() < self.fail_rate:
+            return False
+        with self._lock:
+            if batch['batch_id'] in self.batch_ids:
+                return True
+            for record in batch['records']:
+                self.records.append(dict(record, node=batch['node'], batch_id=batch['batch_id']))
+            self.batch_ids.add(batch['batch_id'])
+            with open(self.output + '.tmp', 'w') as f:
+                json.dump(self.records, f, indent=2)
+            os.replace(self.output + '.tmp', self.output)
+        print(f"📥 {len(batch['records'])} records from {batch['node']} "
+              f"({len(self.records)} total)")
+        return True
+
+
+def make_handler(collector):
+    class BatchHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != '/batches':
+                self.send_error(404)
+                return
+            try:
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if self.headers.get('Content-Encoding') == 'gzip':
+                    body = gzip.decompress(body)
+                batch = json.loads(body)
+                if not (isinstance(batch, dict) and isinstance(batch.get('records'), list)
+                        and {'batch_id', 'node'} <= batch.keys()):
+                    raise ValueError("missing batch fields")
+            except (ValueError, OSError):
+                self.send_error(400, "Malformed batch")
+                return
+
+            if not collector.receive(batch):
+                self.send_error(503, "Refused (simulated failure)")
+                return
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    return BatchHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the central history collector")
+    parser.add_argument('--port', type=int, default=5100)
+    parser.add_argument('--output', default='central_history.json')
+    parser.add_argument('--fail-rate', type=float, default=0.0,
+                        help="share of batches to refuse, for testing retries")
+    args = parser.parse_args()
+
+    collector = Collector(args.output, args.fail_rate)
+    server = ThreadingHTTPServer(('0.0.0.0', args.port), make_handler(collector))
+    print(f"🗄️  Collecting history on http://localhost:{args.port}/batches -> {args.output}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Collector stopped")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+History Compaction - Fold repeated diagnoses into counted entries
+
+Most of the history is the same facts and diagnosis submitted again and
+again. Compaction keeps the first record of each run of repeats and
+counts the rest on it: the entry gains "count", "first_seen" and
+"last_seen", and its "timestamp" stays the first occurrence, so the file
+remains in time order. A repeat folds in if it comes within --window
+seconds of the entry's last occurrence. With --consecutive it must also
+directly follow the entry.
+
+Setting DIAGNOSIS_HISTORY_DEDUP_WINDOW makes save_diagnosis fold repeats
+as they are saved, so the file stays compact between runs of this job.
+
+Entries are counted with knowledge_base.occurrences(), so totals such as
+the /history stats are the same before and after compaction. Record ids
+are positions in the file, so compaction starts a new history generation
+and running servers rebuild their history indexes on their next save.
+
+Usage:
+    python history_compaction.py [--window 3600] [--consecutive] [--dry-run]
+"""
+
+from knowledge_base import (HISTORY_FILE, fold_record, history_lock, load_history, occurrences,
+                            replace_history, same_case, seconds_between, last_seen)
+import knowledge_base
+import argparse
+import json
+import os
+
+
+def case_key(record):
+    """Hashable identity of a record's facts and diagnosis"""
+    return json.dumps([record.get('facts'), record.get('diagnosis'), record.get('knowledge_base')],
+                      sort_keys=True, default=str)
+
+
+def compact(history, window=3600.0, consecutive=False):
+    """A copy of ``history`` with repeats folded into counted entries"""
+    compacted = []
+    latest = {}  # case key -> index of its most recent entry
+    for record in history:
+        if consecutive:
+            entry_id = len(compacted) - 1 if compacted and same_case(compacted[-1], record) else None
+        else:
+            entry_id = latest.get(case_key(record))
+        if entry_id is not None:
+            gap = seconds_between(last_seen(compacted[entry_id]), record.get('timestamp'))
+            if gap is not None and gap <= window:
+                fold_record(compacted[entry_id], record)
+                continue
+        compacted.append(dict(record))
+        if not consecutive:
+            latest[case_key(record)] = len(compacted) - 1
+    return compacted
+
+
+def history_stats(history):
+    """Diagnosis totals, counting every occurrence a compacted entry stands for"""
+    stats = {'entries': len(history), 'total': 0, 'critical': 0, 'high': 0}
+    for record in history:
+        count = occurrences(record)
+        stats['total'] += count
+        if record.get('severity') in ('critical', 'high'):
+            stats[record['severity']] += count
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fold repeated diagnoses into counted entries")
+    parser.add_argument('--file', default=HISTORY_FILE)
+    parser.add_argument('--window', type=float, default=3600.0,
+                        help="seconds after an entry's last occurrence a repeat still folds into it")
+    parser.add_argument('--consecutive', action='store_true',
+                        help="only fold repeats that directly follow their entry")
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    knowledge_base.HISTORY_FILE = args.file
+    # Servers and the CLI wait on the same file lock, so no save is lost
+    with history_lock():
+        history = load_history()
+        compacted = compact(history, args.window, args.consecutive)
+        before, after = history_stats(history), history_stats(compacted)
+        if before != dict(after, entries=before['entries']):
+            raise SystemExit(f"❌ Totals changed during compaction: {before} -> {after}")
+
+        encoded = json.dumps(compacted, indent=2)
+        size_before = os.path.getsize(args.file) if os.path.exists(args.file) else 0
+        print(f"\n🗜️  {before['entries']:,} records -> {after['entries']:,} entries "
+              f"({before['total']:,} diagnoses), {size_before:,} B -> {len(encoded):,} B")
+        if args.dry_run:
+            print("   Dry run; history file left unchanged")
+            return
+        replace_history(compacted)
+        print(f"✅ Compacted {args.file}")
+
+
+if __name__ == '__main__':
+    main()
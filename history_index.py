@@ -0,0 +1,177 @@
+"""
+History Index - Find past cases that share facts with a new one
+
+Most records repeat an answer set seen before, so records with the same
+facts share a "profile". An inverted index maps each (fact key, value)
+pair to the profiles containing it, and each profile keeps the ids of its
+records. A query counts the facts it shares with each matching profile;
+all records of a profile share as many, so only the newest k records of
+each can make the top k. A query costs time proportional to the number
+of distinct answer sets, however long the history grows.
+
+Indexes follow the history file as diagnoses are saved. Records another
+process saved are picked up from the saved history on the next local
+save, indexing only the records in between.
+"""
+
+from knowledge_base import add_history_listener, history_generation, last_seen, load_history, occurrences
+from array import array
+from collections import Counter
+import heapq
+import threading
+
+
+class IncrementalIndex:
+    """An index over the history file that follows save_diagnosis
+
+    Subclasses implement ``_clear()``, ``_add(record)`` and
+    ``_fold(record_id, record)``, all called with the index lock held.
+    Records arrive in id order; ``_fold`` counts a repeat saved onto an
+    existing entry (see history_compaction.py). Compaction renumbers the
+    records, so after one the index is rebuilt from the file on a
+    background thread, never while a save holds the history lock.
+    """
+
+    def __init__(self, history=None):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.generation = history_generation()
+        self._rebuilding = None
+        self.rebuild(load_history() if history is None else history)
+
+    @classmethod
+    def attach(cls):
+        """Build the index from the history file and keep it up to date"""
+        index = cls()
+        add_history_listener(index.add)
+        return index
+
+    def rebuild(self, history):
+        """Index ``history`` from scratch"""
+        with self._lock:
+            self._clear()
+            self.count = 0
+            for record in history:
+                self._add(record)
+                self.count += 1
+
+    def add(self, record_id, record, history):
+        """Index a newly saved record, given the history it was saved to"""
+        generation = history_generation()
+        with self._lock:
+            if self._rebuilding is not None:
+                # The rebuild reads the file, or the next save catches up
+                return
+            if generation != self.generation:
+                # The file was compacted since the index was built, so
+                # its ids name other entries now
+                self.generation = generation
+                self._rebuilding = threading.Thread(target=self._rebuild_from_file,
+                                                    name='history-index-rebuild', daemon=True)
+                self._rebuilding.start()
+                return
+            if record_id < self.count:
+                self._fold(record_id, record)
+                return
+            # Records other processes saved since this one's last save
+            # come first; only the missing tail is indexed
+            for missing in history[self.count:record_id + 1]:
+                self._add(missing)
+                self.count += 1
+
+    def _rebuild_from_file(self):
+        # The file is replaced atomically, so it can be read without the history lock
+        try:
+            self.rebuild(load_history())
+        finally:
+            with self._lock:
+                self._rebuilding = None
+
+    def wait_for_rebuild(self, timeout=None):
+        """Block until a rebuild started by compaction has finished"""
+        rebuilding = self._rebuilding
+        if rebuilding is not None:
+            rebuilding.join(timeout)
+
+    def __len__(self):
+        return self.count
+
+
+class HistoryIndex(IncrementalIndex):
+    """Inverted index from fact pairs to answer profiles and their records"""
+
+    def _clear(self):
+        self.profiles = {}          # set of fact pairs -> profile id
+        self.profile_records = []   # profile id -> array of record ids
+        self.postings = {}          # fact pair -> array of profile ids
+        self.records = []
+
+    def _add(self, record):
+        record_id = len(self.records)
+        facts = record.get('facts')
+        pairs = []
+        if isinstance(facts, dict):
+            for pair in facts.items():
+                try:
+                    hash(pair)
+                except TypeError:
+                    # Nested values cannot be indexed
+                    continue
+                pairs.append(pair)
+
+        key = frozenset(pairs)
+        profile = self.profiles.get(key)
+        if profile is None:
+            profile = self.profiles[key] = len(self.profile_records)
+            self.profile_records.append(array('q'))
+            for pair in key:
+                self.postings.setdefault(pair, array('q')).append(profile)
+        self.profile_records[profile].append(record_id)
+        self.records.append({
+            'timestamp': record.get('timestamp'),
+            'last_seen': last_seen(record),
+            'count': occurrences(record),
+            'diagnosis': record.get('diagnosis'),
+            'severity': record.get('severity'),
+            'facts': dict(pairs)
+        })
+
+    def _fold(self, record_id, record):
+        summary = self.records[record_id]
+        summary['count'] += occurrences(record)
+        summary['last_seen'] = last_seen(record)
+
+    def similar(self, answers, k=5):
+        """The ``k`` past cases sharing the most facts with ``answers``
+
+        Ties go to the more recent case.
+        """
+        with self._lock:
+            overlap = Counter()
+            for pair in answers.items():
+                try:
+                    posting = self.postings.get(pair)
+                except TypeError:
+                    continue
+                if posting is not None:
+                    overlap.update(posting)
+            candidates = ((shared, record_id) for profile, shared in overlap.items()
+                          for record_id in self.profile_records[profile][-k:])
+            best = heapq.nlargest(k, candidates)
+            records = self.records
+
+        cases = []
+        for shared, record_id in best:
+            record = records[record_id]
+            cases.append({
+                'id': record_id,
+                'overlap': shared,
+                'matched': [key for key, value in record['facts'].items()
+                            if answers.get(key) == value],
+                'timestamp': record['timestamp'],
+                'last_seen': record['last_seen'],
+                'count': record['count'],
+                'diagnosis': record['diagnosis'],
+                'severity': record['severity']
+            })
+        return cases
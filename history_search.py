@@ -0,0 +1,151 @@
+"""
+History Search - Ranked keyword and prefix search over past diagnoses
+
+Diagnosis titles, solution steps and fact values are split into lowercase
+terms. A term such as "memory_management" is indexed whole and by its
+parts, so both "MEMORY_MANAGEMENT" and "memory" find it.
+
+Records only differ in a few answer values, so most of them repeat the
+text of some earlier record exactly. Records with the same diagnosis and
+the same fact terms share a "profile": its terms are indexed once and it
+keeps the ids of its records. Any query scores all records of a profile
+the same, so only the newest k records of each matching profile can make
+the top k, and a search costs the same however long the history grows.
+
+Terms are scored by inverse document frequency, weighted by the field
+they appear in. Prefix terms ("chk*") expand through a sorted vocabulary
+with bisect.
+"""
+
+from history_index import IncrementalIndex
+from knowledge_base import occurrences
+from array import array
+from bisect import bisect_left, insort
+import heapq
+import math
+import re
+
+
+TOKEN = re.compile(r"[a-z0-9]+(?:[_'][a-z0-9]+)*")
+
+# A term counts for more in the title than in the solution steps
+DIAGNOSIS_WEIGHT = 3.0
+FACT_WEIGHT = 2.0
+SOLUTION_WEIGHT = 1.0
+
+# Upper bound on the vocabulary terms a single prefix may expand to
+MAX_EXPANSIONS = 64
+
+
+def tokenize(text):
+    """Lowercase search terms in ``text``, including the parts of compounds"""
+    terms = []
+    for token in TOKEN.findall(str(text).lower()):
+        terms.append(token)
+        if '_' in token:
+            terms.extend(part for part in token.split('_') if part)
+    return terms
+
+
+def parse_query(query, prefix=False):
+    """Split a query into (term, is_prefix) pairs
+
+    A word ending in ``*`` is a prefix; with ``prefix`` set the last word
+    is one too, for search-as-you-type.
+    """
+    words = str(query).split()
+    parsed = []
+    for position, word in enumerate(words):
+        is_prefix = word.endswith('*') or (prefix and position == len(words) - 1)
+        terms = TOKEN.findall(word.lower())
+        for i, term in enumerate(terms):
+            parsed.append((term, is_prefix and i == len(terms) - 1))
+    return parsed
+
+
+class SearchIndex(IncrementalIndex):
+    """Tokenised inverted index over the diagnosis history"""
+
+    def _clear(self):
+        self.profiles = {}                # profile key -> profile id
+        self.profile_info = []            # profile id -> (diagnosis, solution, severity)
+        self.profile_records = []         # profile id -> array of record ids
+        self.record_profile = array('q')  # record id -> profile id
+        self.postings = {}                # term -> {profile id: field weight}
+        self.timestamps = []
+        self.counts = array('q')          # record id -> occurrences
+        self.vocabulary = []              # sorted, for prefix lookups
+
+    def _add(self, record):
+        diagnosis = str(record.get('diagnosis', ''))
+        solution = str(record.get('solution', ''))
+        severity = record.get('severity')
+        facts = record.get('facts')
+        fact_terms = set()
+        if isinstance(facts, dict):
+            for value in facts.values():
+                if isinstance(value, str):
+                    fact_terms.update(tokenize(value))
+
+        key = (diagnosis, solution, severity, frozenset(fact_terms))
+        profile = self.profiles.get(key)
+        if profile is None:
+            profile = self.profiles[key] = len(self.profile_info)
+            self.profile_info.append((diagnosis, solution, severity))
+            self.profile_records.append(array('q'))
+            weights = {}
+            for terms, weight in ((set(tokenize(diagnosis)), DIAGNOSIS_WEIGHT),
+                                  (fact_terms, FACT_WEIGHT),
+                                  (set(tokenize(solution)), SOLUTION_WEIGHT)):
+                for term in terms:
+                    weights[term] = weights.get(term, 0.0) + weight
+            for term, weight in weights.items():
+                if term not in self.postings:
+                    self.postings[term] = {}
+                    insort(self.vocabulary, term)
+                self.postings[term][profile] = weight
+
+        self.profile_records[profile].append(self.count)
+        self.record_profile.append(profile)
+        self.timestamps.append(record.get('timestamp'))
+        self.counts.append(occurrences(record))
+
+    def _fold(self, record_id, record):
+        self.counts[record_id] += occurrences(record)
+
+    def _expand(self, term, is_prefix):
+        if not is_prefix:
+            return [term]
+        start = bisect_left(self.vocabulary, term)
+        end = bisect_left(self.vocabulary, term + '\uffff', start)
+        return self.vocabulary[start:min(end, start + MAX_EXPANSIONS)]
+
+    def search(self, query, k=20, prefix=False):
+        """The ``k`` best records for ``query``; ties go to the newer record"""
+        with self._lock:
+            scores = {}
+            for term, is_prefix in parse_query(query, prefix):
+                for expanded in self._expand(term, is_prefix):
+                    profiles = self.postings.get(expanded)
+                    if not profiles:
+                        continue
+                    frequency = sum(len(self.profile_records[p]) for p in profiles)
+                    idf = math.log(1 + self.count / frequency)
+                    for profile, weight in profiles.items():
+                        scores[profile] = scores.get(profile, 0.0) + weight * idf
+
+            candidates = ((score, record_id) for profile, score in scores.items()
+                          for record_id in self.profile_records[profile][-k:])
+            results = []
+            for score, record_id in heapq.nlargest(k, candidates):
+                diagnosis, solution, severity = self.profile_info[self.record_profile[record_id]]
+                results.append({
+                    'id': record_id,
+                    'score': round(score, 3),
+                    'timestamp': self.timestamps[record_id],
+                    'count': self.counts[record_id],
+                    'diagnosis': diagnosis,
+                    'solution': solution,
+                    'severity': severity
+                })
+        return results
@@ -0,0 +1,237 @@
+"""
+History Sink - Send saved diagnoses somewhere besides the local history file
+
+A sink receives every record save_diagnosis writes. RemoteHistorySink
+buffers records and posts them to a collector as gzip-compressed JSON
+batches, whenever the buffer reaches batch_size or flush_interval passes.
+A batch the collector does not accept is spooled to disk and retried with
+exponential backoff, oldest first, so records survive collector outages
+and restarts. Each batch carries an id so the collector can drop repeats.
+
+Several processes may share a spool directory. A process claims a spooled
+batch by renaming it to a name of its own before sending it, so each
+batch is sent by one process at a time; a claim held far longer than a
+send can take was left by a process that died, and is released.
+
+Set HISTORY_COLLECTOR_URL to send history to a collector; see
+history_collector.py for a local stand-in.
+"""
+
+from knowledge_base import add_history_listener
+from abc import ABC, abstractmethod
+import atexit
+import gzip
+import json
+import os
+import socket
+import threading
+import time
+import urllib.request
+import uuid
+
+
+SPOOL_SUFFIX = '.json.gz'
+CLAIM_SUFFIX = '.claimed'
+
+
+class HistorySink(ABC):
+    """Receives each diagnosis record after it is saved"""
+
+    @abstractmethod
+    def write(self, record):
+        """Take one saved record; called with the history locked"""
+
+    def flush(self):
+        """Deliver anything buffered"""
+
+    def close(self):
+        """Flush and release resources"""
+        self.flush()
+
+    def attach(self):
+        """Receive every record save_diagnosis writes from now on"""
+        add_history_listener(lambda record_id, record, history: self.write(record))
+        atexit.register(self.close)
+        return self
+
+    def stats(self):
+        return {}
+
+
+class RemoteHistorySink(HistorySink):
+    """Batches records to an HTTP collector, spooling to disk on failure"""
+
+    def __init__(self, url, batch_size=100, flush_interval=5.0, spool_dir='history_spool',
+                 timeout=5.0, max_backoff=300.0, node=None):
+        self.url = url
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spool_dir = spool_dir
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.node = node or socket.gethostname()
+
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._buffer = []
+        self._failures = 0
+        self._retry_at = 0.0
+        self._counts = dict.fromkeys(
+            ('records', 'sent_batches', 'sent_records', 'spooled_batches', 'failed_sends'), 0)
+
+        os.makedirs(spool_dir, exist_ok=True)
+        self._wake = threading.Event()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name='history-sink', daemon=True)
+        self._worker.start()
+
+    def write(self, record):
+        with self._lock:
+            self._buffer.append(record)
+            self._counts['records'] += 1
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            # Sending happens on the worker thread, never the caller's
+            self._wake.set()
+
+    def flush(self):
+        with self._send_lock:
+            self._send_spool()
+            self._send_buffer()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._worker.join(self.timeout * 2)
+        # One last attempt; whatever is left stays in the spool
+        self._retry_at = 0.0
+        self.flush()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Warning: History sink flush failed: {e}")
+
+    def _send_buffer(self):
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if not batch:
+            return
+        batch_id = uuid.uuid4().hex
+        body = gzip.compress(json.dumps({
+            'batch_id': batch_id,
+            'node': self.node,
+            'records': batch
+        }).encode('utf-8'))
+
+        if not self._spool_empty() or not self._deliver(body, len(batch)):
+            self._spool(batch_id, len(batch), body)
+
+    def _send_spool(self):
+        """Retry spooled batches, oldest first, until one fails"""
+        self._release_stale_claims()
+        for name in sorted(os.listdir(self.spool_dir)):
+            if not name.endswith(SPOOL_SUFFIX):
+                continue
+            path = os.path.join(self.spool_dir, name)
+            claimed = f"{path}.{os.getpid()}{CLAIM_SUFFIX}"
+            try:
+                # Atomic: if another process renamed it first, it is theirs
+                os.rename(path, claimed)
+                # Dated from the claim, so stale claims can be told apart
+                os.utime(claimed)
+                with open(claimed, 'rb') as f:
+                    body = f.read()
+            except FileNotFoundError:
+                continue
+            delivered = self._deliver(body, int(name.split('-')[1]))
+            try:
+                if delivered:
+                    os.remove(claimed)
+                else:
+                    os.rename(claimed, path)
+            except FileNotFoundError:
+                pass
+            if not delivered:
+                return
+
+    def _release_stale_claims(self):
+        """Return batches whose claim outlived any send to the spool
+
+        A claim that old was left by a process that died while sending.
+        """
+        for name in os.listdir(self.spool_dir):
+            if not name.endswith(CLAIM_SUFFIX):
+                continue
+            path = os.path.join(self.spool_dir, name)
+            try:
+                if time.time() - os.path.getmtime(path) > self.timeout * 10:
+                    os.rename(path, path[:-len(CLAIM_SUFFIX)].rpartition('.')[0])
+            except FileNotFoundError:
+                pass
+
+    def _spool_empty(self):
+        return not any(name.endswith(SPOOL_SUFFIX) for name in os.listdir(self.spool_dir))
+
+    def _spool(self, batch_id, records, body):
+        # Named so that sorting the directory lists batches oldest first
+        name = f"{time.time():017.6f}-{records}-{batch_id}{SPOOL_SUFFIX}"
+        path = os.path.join(self.spool_dir, name)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(body)
+        os.replace(path + '.tmp', path)
+        with self._lock:
+            self._counts['spooled_batches'] += 1
+
+    def _deliver(self, body, records):
+        """POST one compressed batch; False if the collector did not take it"""
+        if time.monotonic() < self._retry_at:
+            return False
+        request = urllib.request.Request(self.url, data=body, method='POST', headers={
+            'Content-Type': 'application/json',
+            'Content-Encoding': 'gzip'
+        })
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                accepted = 200 <= response.status < 300
+        except Exception:
+            accepted = False
+
+        with self._lock:
+            if accepted:
+                self._failures = 0
+                self._retry_at = 0.0
+                self._counts['sent_batches'] += 1
+                self._counts['sent_records'] += records
+            else:
+                self._failures += 1
+                self._retry_at = time.monotonic() + min(self.max_backoff, 2 ** self._failures)
+                self._counts['failed_sends'] += 1
+        return accepted
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counts)
+            stats['buffered'] = len(self._buffer)
+            stats['consecutive_failures'] = self._failures
+        stats['spooled'] = sum(name.endswith(SPOOL_SUFFIX) for name in os.listdir(self.spool_dir))
+        return stats
+
+
+def sink_from_environment():
+    """The sink configured by HISTORY_COLLECTOR_URL, attached, or None"""
+    url = os.environ.get('HISTORY_COLLECTOR_URL')
+    if not url:
+        return None
+    return RemoteHistorySink(
+        url,
+        batch_size=int(os.environ.get('HISTORY_BATCH_SIZE', 100)),
+        flush_interval=float(os.environ.get('HISTORY_FLUSH_INTERVAL', 5.0)),
+        spool_dir=os.environ.get('HISTORY_SPOOL_DIR', 'history_spool')
+    ).attach()
@@ -0,0 +1,226 @@
+"""
+Knowledge Base Registry - Load rule sets on first use, evict cold ones
+
+Knowledge bases are registered by name as "module:EngineClass" specs and
+nothing is imported until one is first asked for. Loading one compiles
+its rules into a warmed engine pool and its rule results. That structure
+is shared by every thread until the knowledge base is evicted, along
+with an answer schema and a rule index (for explanations) derived from
+its rules. When the
+loaded knowledge bases exceed the memory budget, the least recently used
+ones are evicted, except pinned ones.
+
+Extra knowledge bases are registered with DIAGNOSIS_KNOWLEDGE_BASES, e.g.
+"linux=linux_kb:LinuxDiagnosisSystem,acme=acme_kb:AcmeDiagnosisSystem",
+and the budget is set with DIAGNOSIS_KB_MEMORY_MB. With
+DIAGNOSIS_RESULT_CACHE_DIR set, each knowledge base also shares its
+results with other processes through a file there (see shared_cache.py).
+"""
+
+from knowledge_base import knowledge_base_version, rule_results
+from engine_snapshot import EnginePool, diagnose_with
+from answer_schema import AnswerSchema, derive_pairs
+from rule_index import RuleIndex
+from rule_trace import trace_diagnosis
+from shared_cache import SharedResultCache, cache_path
+from singleflight import SingleFlight
+from collections import OrderedDict
+import gc
+import importlib
+import os
+import sys
+import threading
+import time
+import types
+
+DEFAULT_KNOWLEDGE_BASE = 'windows'
+
+KNOWLEDGE_BASES = {
+    DEFAULT_KNOWLEDGE_BASE: 'knowledge_base:ComputerDiagnosisSystem',
+}
+
+
+class UnknownKnowledgeBase(KeyError):
+    """Raised when a request names a knowledge base that is not registered"""
+
+    def __str__(self):
+        return f"Unknown knowledge base: {self.args[0]}"
+
+
+def _shared(obj):
+    # Code and classes are shared by every knowledge base; don't count them
+    return isinstance(obj, (type, types.ModuleType, types.FunctionType,
+                            types.BuiltinFunctionType, types.CodeType))
+
+
+def resident_size(*roots):
+    """Approximate bytes of the objects reachable from ``roots``"""
+    seen = set()
+    stack = list(roots)
+    size = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or _shared(obj):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+    return size
+
+
+class LoadedKnowledgeBase:
+    """A compiled knowledge base, shared by all threads using it"""
+
+    def __init__(self, name, engine_class, schema_mode='trim', cache_dir=None, cache_slots=65536):
+        start = time.perf_counter()
+        self.name = name
+        self.engine_class = engine_class
+        self.version = knowledge_base_version(engine_class)
+        self.results = rule_results(engine_class)
+        # Interned results map back to the rule that concludes them
+        self.rule_names = {id(result): rule for rule, result in self.results.items()}
+        self.schema = AnswerSchema(derive_pairs(engine_class), mode=schema_mode)
+        self.rule_index = RuleIndex(engine_class)
+        self.cache = None
+        if cache_dir:
+            self.cache = SharedResultCache(cache_path(cache_dir, name), engine_class, cache_slots)
+        self.pool = EnginePool(engine_class)
+        # Build the first engine now rather than on the first request
+        with self.pool.engine():
+            pass
+        self.load_seconds = time.perf_counter() - start
+        # Engines are measured with the one warmed engine; the pool grows
+        # with concurrency, so size_bytes follows its engine count
+        total = resident_size(self.pool, self.results, self.schema, self.rule_index)
+        self.base_bytes = resident_size(self.results, self.schema, self.rule_index)
+        self.engine_bytes = total - self.base_bytes
+        self.last_used = time.time()
+
+    @property
+    def size_bytes(self):
+        """Estimated resident bytes, counting every engine the pool has built"""
+        return self.base_bytes + self.engine_bytes * max(1, self.pool.stats()['created'])
+
+    def cached(self, answers):
+        """The shared cache's result for ``answers``, if there is one"""
+        return self.cache.lookup(answers) if self.cache is not None else None
+
+    def diagnose(self, answers, check_cache=True):
+        """Diagnose an answer set, sharing the result with other processes
+
+        Runs the expert system on a pooled engine unless another process
+        already has. Callers that just missed the cache themselves pass
+        ``check_cache=False`` to go straight to the engine.
+        """
+        if check_cache:
+            result = self.cached(answers)
+            if result is not None:
+                return result
+        with self.pool.engine() as engine:
+            result = diagnose_with(engine, answers)
+        if self.cache is not None and result is not None:
+            self.cache.store(answers, result)
+        return result
+
+    def explain(self, answers):
+        """(result, trace) of a traced run on a pooled engine (see rule_trace.py)"""
+        with self.pool.engine() as engine:
+            return trace_diagnosis(engine, answers, self.rule_index)
+
+    def stats(self):
+        stats = dict(self.pool.stats(),
+                     version=self.version,
+                     load_ms=round(self.load_seconds * 1000, 1),
+                     resident_kb=round(self.size_bytes / 1024, 1),
+                     idle_seconds=round(time.time() - self.last_used, 1))
+        if self.cache is not None:
+            stats['shared_cache'] = self.cache.stats()
+        return stats
+
+
+class KnowledgeBaseRegistry:
+    """Named knowledge bases, loaded lazily and evicted by LRU"""
+
+    def __init__(self, specs=None, memory_budget=256 * 1024 * 1024,
+                 pinned=(DEFAULT_KNOWLEDGE_BASE,), schema_mode='trim', cache_dir=None,
+                 cache_slots=65536):
+        self.specs = dict(KNOWLEDGE_BASES if specs is None else specs)
+        self.memory_budget = memory_budget
+        self.schema_mode = schema_mode
+        self.cache_dir = cache_dir
+        self.cache_slots = cache_slots
+        self.pinned = set(pinned)
+        self._lock = threading.Lock()
+        self._loaded = OrderedDict()
+        self._loading = SingleFlight()
+        self._counts = dict.fromkeys(('hits', 'loads', 'evictions'), 0)
+
+    def names(self):
+        return sorted(self.specs)
+
+    def get(self, name=None):
+        """The loaded knowledge base ``name``, loading it if needed"""
+        name = name or DEFAULT_KNOWLEDGE_BASE
+        if not isinstance(name, str):
+            raise UnknownKnowledgeBase(name)
+        with self._lock:
+            kb = self._loaded.get(name)
+            if kb is not None:
+                self._loaded.move_to_end(name)
+                self._counts['hits'] += 1
+                kb.last_used = time.time()
+                # Engine pools grow under load, so the budget is rechecked here too
+                self._evict(keep=name)
+                return kb
+        if name not in self.specs:
+            raise UnknownKnowledgeBase(name)
+        # Threads asking for the same cold knowledge base share one load
+        return self._loading.do(name, lambda: self._load(name))
+
+    def _load(self, name):
+        module_name, _, class_name = self.specs[name].partition(':')
+        engine_class = getattr(importlib.import_module(module_name), class_name)
+        kb = LoadedKnowledgeBase(name, engine_class, self.schema_mode,
+                                 self.cache_dir, self.cache_slots)
+        with self._lock:
+            self._loaded[name] = kb
+            self._counts['loads'] += 1
+            self._evict(keep=name)
+        return kb
+
+    def _evict(self, keep):
+        """Drop least recently used knowledge bases until within budget"""
+        total = sum(kb.size_bytes for kb in self._loaded.values())
+        for name in list(self._loaded):
+            if total <= self.memory_budget:
+                break
+            if name == keep or name in self.pinned:
+                continue
+            total -= self._loaded.pop(name).size_bytes
+            self._counts['evictions'] += 1
+
+    def stats(self):
+        with self._lock:
+            loaded = {name: kb.stats() for name, kb in self._loaded.items()}
+            stats = dict(self._counts)
+        stats.update(
+            registered=self.names(),
+            loaded=loaded,
+            resident_kb=round(sum(kb['resident_kb'] for kb in loaded.values()), 1),
+            budget_kb=self.memory_budget // 1024
+        )
+        return stats
+
+
+def registry_from_environment(schema_mode='trim'):
+    """A registry with the built-in and DIAGNOSIS_KNOWLEDGE_BASES entries"""
+    specs = dict(KNOWLEDGE_BASES)
+    for entry in os.environ.get('DIAGNOSIS_KNOWLEDGE_BASES', '').split(','):
+        if '=' in entry:
+            name, spec = entry.split('=', 1)
+            specs[name.strip()] = spec.strip()
+    budget_mb = float(os.environ.get('DIAGNOSIS_KB_MEMORY_MB', 256))
+    return KnowledgeBaseRegistry(specs, memory_budget=int(budget_mb * 1024 * 1024),
+                                 schema_mode=schema_mode,
+                                 cache_dir=os.environ.get('DIAGNOSIS_RESULT_CACHE_DIR') or None,
+                                 cache_slots=int(os.environ.get('DIAGNOSIS_RESULT_CACHE_SLOTS', 65536)))
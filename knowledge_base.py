@@ -12,7 +12,289 @@ for name in ("Mapping", "MutableMapping", "Sequence", "Iterable"):
         setattr(collections, name, getattr(_collections_abc, name))
 
 from experta import *
+from contextlib import contextmanager
+from datetime import datetime
+import hashlib
 import json
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - the history is locked in-process only on Windows
+    fcntl = None
+
+
+class Diagnosis:
+    """Immutable result of a rule
+
+    Its JSON response body is encoded once, when the diagnosis is created.
+    Item access (result['diagnosis']) keeps it usable wherever a result
+    dict used to be expected.
+    """
+    
+    FIELDS = ('diagnosis', 'solution', 'severity')
+    __slots__ = FIELDS + ('response_json',)
+    
+    def __init__(self, diagnosis, solution, severity):
+        set_field = super().__setattr__
+        set_field('diagnosis', diagnosis)
+        set_field('solution', solution)
+        set_field('severity', severity)
+        body = dict(self.as_dict(), success=True)
+        set_field('response_json',
+                  json.dumps(body, sort_keys=True, separators=(',', ':')).encode() + b'\n')
+    
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+    
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+    
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def as_dict(self):
+        """Plain dict copy, for JSON files and history records"""
+        return {field: getattr(self, field) for field in self.FIELDS}
+    
+    def __repr__(self):
+        return f"Diagnosis({self.diagnosis!r}, severity={self.severity!r})"
+
+
+# ==================== DIAGNOSES ====================
+# Each conclusion is created once, at import, and shared by every engine
+# run and request that reaches it.
+
+# --- POWER & BOOT ISSUES ---
+PSU_FAILURE = Diagnosis(
+    'Power Supply Unit (PSU) Failure',
+    '1. Check if PSU fan spins\n2. Test with PSU tester\n3. Replace PSU if confirmed dead\n4. Check power button connection to motherboard\n5. Verify PSU switch is ON',
+    'high')
+
+DISPLAY_OR_RAM = Diagnosis(
+    'RAM, Graphics Card, or Display Issue',
+    '1. Reseat RAM modules (remove and reinstall)\n2. Try one RAM stick at a time\n3. Reseat graphics card\n4. Check monitor cable connection\n5. Try different display cable/port\n6. Test with another monitor\n7. Listen for beep codes',
+    'high')
+
+MOTHERBOARD_CPU = Diagnosis(
+    'Motherboard or CPU Failure',
+    '1. Reset CMOS (remove battery for 5 mins)\n2. Remove all unnecessary components\n3. Check for bent CPU pins\n4. Test with minimal hardware (CPU, 1 RAM, PSU)\n5. Check motherboard for burn marks\n6. Verify CPU cooler is properly mounted',
+    'critical')
+
+BOOT_DEVICE = Diagnosis(
+    'Boot Device Not Found',
+    '1. Check boot order in BIOS\n2. Verify hard drive is detected in BIOS\n3. Check SATA/power cables to drive\n4. Try different SATA port\n5. Test drive in another system\n6. Boot from installation media to repair\n7. May need to rebuild BCD or reinstall OS',
+    'high')
+
+GPU_BEEP = Diagnosis(
+    'Graphics Card Problem (Video Error)',
+    '1. Reseat GPU firmly\n2. Check GPU power cables connected\n3. Try integrated graphics if available\n4. Test GPU in another system\n5. Clean GPU contacts with eraser\n6. Update BIOS\n7. Replace GPU if confirmed faulty',
+    'high')
+
+RAM_BEEP = Diagnosis(
+    'RAM Failure',
+    '1. Remove all RAM sticks\n2. Install one stick at a time\n3. Try each slot individually\n4. Clean RAM contacts with eraser\n5. Test RAM with MemTest86\n6. Try known-good RAM\n7. Check motherboard RAM slots for damage',
+    'medium')
+
+# --- PERFORMANCE ISSUES ---
+FAILING_HDD = Diagnosis(
+    'Failing Hard Drive',
+    '1. BACKUP DATA IMMEDIATELY!\n2. Check SMART status with CrystalDiskInfo\n3. Run CHKDSK /F /R (may take hours)\n4. Replace drive urgently\n5. Consider cloning to SSD\n6. Check for clicking sounds (mechanical failure)',
+    'critical')
+
+MALWARE_PERFORMANCE = Diagnosis(
+    'Possible Malware or Unwanted Software',
+    '1. Check Task Manager for suspicious processes\n2. Run Windows Defender full scan\n3. Scan with Malwarebytes\n4. Boot to Safe Mode and scan\n5. Check startup programs (msconfig)\n6. Use Process Explorer to identify processes\n7. Remove suspicious programs\n8. Reset browsers if affected',
+    'high')
+
+INSUFFICIENT_RAM = Diagnosis(
+    'Insufficient RAM',
+    '1. Close unnecessary programs\n2. Check Task Manager for memory hogs\n3. Disable startup programs\n4. Increase virtual memory (page file)\n5. Upgrade RAM (recommended)\n6. Check for memory leaks in applications\n7. Restart computer regularly',
+    'medium')
+
+OVERHEATING = Diagnosis(
+    'System Overheating',
+    '1. Clean dust from all fans and heatsinks\n2. Reapply thermal paste on CPU\n3. Check all fans are spinning\n4. Improve case airflow (cable management)\n5. Check CPU temperature with HWMonitor\n6. Verify CPU cooler is properly mounted\n7. Consider better cooling solution\n8. Check GPU temperature and cooling',
+    'high')
+
+# --- BLUE SCREEN (BSOD) ---
+DRIVER_BSOD = Diagnosis(
+    'Driver Conflict (DRIVER_IRQL)',
+    '1. Boot into Safe Mode\n2. Update all drivers (especially network/GPU)\n3. Rollback recently installed drivers\n4. Use Driver Verifier to find bad driver\n5. Check Windows Update\n6. Uninstall recent software\n7. Run SFC /scannow',
+    'high')
+
+MEMORY_BSOD = Diagnosis(
+    'Memory Management Error',
+    '1. Run Windows Memory Diagnostic\n2. Test RAM with MemTest86 (8+ passes)\n3. Reseat all RAM modules\n4. Test one RAM stick at a time\n5. Update BIOS\n6. Reset BIOS to defaults\n7. Replace faulty RAM if confirmed\n8. Check for overclocking issues',
+    'high')
+
+DISK_BSOD = Diagnosis(
+    'Hard Drive or RAM Failure',
+    '1. BACKUP DATA IMMEDIATELY!\n2. Run CHKDSK /F /R\n3. Check SMART status\n4. Test RAM with MemTest86\n5. Check SATA cables\n6. Try different SATA port\n7. Run disk manufacturer diagnostics\n8. Replace failing component',
+    'critical')
+
+SYSTEM_SERVICE_BSOD = Diagnosis(
+    'System Service or Driver Issue',
+    '1. Update graphics drivers\n2. Run SFC /scannow\n3. Run DISM /Online /Cleanup-Image /RestoreHealth\n4. Check Windows Update\n5. Uninstall recent programs\n6. Boot to Safe Mode and troubleshoot\n7. Check Event Viewer for details',
+    'medium')
+
+# --- BOOT PROBLEMS ---
+SOFTWARE_BOOT_LOOP = Diagnosis(
+    'Software/Driver Causing Boot Loop',
+    '1. Uninstall recent Windows updates\n2. Use System Restore to previous point\n3. Disable startup programs (msconfig)\n4. Run SFC and DISM repairs\n5. Uninstall recently installed software\n6. Update or rollback drivers\n7. Perform clean boot troubleshooting',
+    'high')
+
+HARDWARE_BOOT_LOOP = Diagnosis(
+    'Hardware or Critical System Corruption',
+    '1. Run Startup Repair from install media\n2. Rebuild BCD:\n   - bootrec /fixmbr\n   - bootrec /fixboot\n   - bootrec /rebuildbcd\n3. Test RAM thoroughly\n4. Check hard drive health\n5. Reset BIOS settings\n6. Consider clean Windows install\n7. Check hardware connections',
+    'critical')
+
+SLOW_BOOT = Diagnosis(
+    'Slow Boot Time',
+    '1. Disable unnecessary startup programs\n2. Run Disk Cleanup\n3. Check for malware\n4. Update drivers\n5. Enable Fast Startup\n6. Defragment HDD (or optimize SSD)\n7. Consider upgrading to SSD\n8. Check disk health\n9. Disable unused services',
+    'medium')
+
+# --- NETWORK ISSUES ---
+PC_NETWORK_ONLY = Diagnosis(
+    'Network Adapter or Driver Issue',
+    '1. Restart computer\n2. Update network adapter driver\n3. Uninstall and reinstall driver\n4. Run Network Troubleshooter\n5. Reset network settings:\n   - ipconfig /release\n   - ipconfig /renew\n   - ipconfig /flushdns\n   - netsh winsock reset\n   - netsh int ip reset\n6. Check if adapter is enabled\n7. Try Ethernet if using WiFi',
+    'medium')
+
+ROUTER_ISP = Diagnosis(
+    'Router or ISP Problem',
+    '1. Power cycle modem and router (30 sec off)\n2. Check all cable connections\n3. Verify ISP service status online\n4. Check router admin panel for issues\n5. Try direct modem connection\n6. Reset router to factory settings (last resort)\n7. Contact ISP if problem persists',
+    'medium')
+
+WIFI_SIGNAL = Diagnosis(
+    'WiFi Signal/Interference Issue',
+    '1. Move closer to router\n2. Remove physical obstructions\n3. Change WiFi channel (use WiFi analyzer app)\n4. Use 5GHz band if available\n5. Update router firmware\n6. Update WiFi adapter driver\n7. Consider WiFi extender or mesh system\n8. Avoid interference from microwaves/phones',
+    'low')
+
+WIFI_AUTH = Diagnosis(
+    'WiFi Authentication Issue',
+    '1. Verify correct password\n2. Forget network and reconnect\n3. Restart router\n4. Check router security type (use WPA2)\n5. Disable MAC filtering temporarily\n6. Update router firmware\n7. Reset network settings on PC\n8. Try static IP assignment',
+    'medium')
+
+DNS = Diagnosis(
+    'DNS Resolution Problem',
+    '1. Flush DNS cache: ipconfig /flushdns\n2. Change DNS to Google (8.8.8.8, 8.8.4.4) or Cloudflare (1.1.1.1)\n3. Restart DNS Client service\n4. Check hosts file (C:\\Windows\\System32\\drivers\\etc\\hosts)\n5. Reset TCP/IP: netsh int ip reset\n6. Disable IPv6 temporarily\n7. Clear browser cache',
+    'medium')
+
+# --- APPLICATION ISSUES ---
+SPECIFIC_APP_CRASH = Diagnosis(
+    'Specific Application Problem',
+    '1. Update the application to latest version\n2. Reinstall the application\n3. Run as administrator\n4. Check compatibility mode\n5. Check Event Viewer for crash details\n6. Disable antivirus temporarily\n7. Install missing dependencies (.NET, C++ Redistributables)\n8. Clear application cache/data\n9. Check if app needs GPU drivers update',
+    'low')
+
+SYSTEM_APP_CRASHES = Diagnosis(
+    'System-wide Application Instability',
+    '1. Run SFC /scannow\n2. Run DISM repair\n3. Update Windows\n4. Test RAM with MemTest86\n5. Update all drivers\n6. Update .NET Framework\n7. Scan for malware\n8. Check Event Viewer for patterns\n9. Perform clean boot\n10. May need Windows repair install',
+    'high')
+
+INSTALL_FAILURE = Diagnosis(
+    'Software Installation Failure',
+    '1. Run installer as administrator\n2. Disable antivirus temporarily\n3. Check system requirements\n4. Clean temp folders (Disk Cleanup)\n5. Ensure Windows Installer service is running\n6. Download installer again\n7. Check disk space\n8. Install in Safe Mode\n9. Check installer logs',
+    'low')
+
+# --- PERIPHERAL ISSUES ---
+PRINTER_NOT_FOUND = Diagnosis(
+    'Printer Not Detected',
+    '1. Check USB/network cable connection\n2. Power cycle printer\n3. Restart Print Spooler service\n4. Update printer driver from manufacturer\n5. Remove and re-add printer\n6. Run printer troubleshooter\n7. Try different USB port\n8. Check if printer shows in Devices\n9. Disable firewall temporarily (network printer)',
+    'low')
+
+PRINT_QUEUE = Diagnosis(
+    'Print Queue Stuck',
+    '1. Cancel all print jobs\n2. Restart Print Spooler service:\n   - Open Services (services.msc)\n   - Stop Print Spooler\n   - Delete files from C:\\Windows\\System32\\spool\\PRINTERS\n   - Start Print Spooler\n3. Update printer driver\n4. Run printer troubleshooter\n5. Check printer connection',
+    'low')
+
+USB_NOT_RECOGNIZED = Diagnosis(
+    'USB Device Not Recognized',
+    '1. Try different USB port (USB 2.0 port recommended)\n2. Restart computer\n3. Update USB controller drivers\n4. Check Device Manager for errors (yellow exclamation)\n5. Test device on another computer\n6. Uninstall device in Device Manager, then reconnect\n7. Disable USB selective suspend\n8. Update chipset drivers\n9. Check if device needs external power',
+    'low')
+
+USB_DISCONNECTING = Diagnosis(
+    'USB Device Keeps Disconnecting',
+    '1. Try different USB port\n2. Disable USB selective suspend:\n   - Power Options > Change plan settings\n   - Change advanced power settings\n   - USB settings > Disable selective suspend\n3. Update USB drivers\n4. Check cable quality (replace if damaged)\n5. Try powered USB hub\n6. Update chipset drivers\n7. Check for loose connections',
+    'medium')
+
+WIRELESS_KB_MOUSE = Diagnosis(
+    'Wireless Keyboard/Mouse Issue',
+    '1. Replace batteries\n2. Re-pair device (follow manufacturer steps)\n3. Plug USB receiver into different port\n4. Check for interference (move away from WiFi router)\n5. Update device driver\n6. Clean sensor/optical area\n7. Try on another computer\n8. Check if USB receiver is working (LED indicator)',
+    'low')
+
+# --- AUDIO ISSUES ---
+AUDIO_OUTPUT = Diagnosis(
+    'Audio Output Configuration Issue',
+    '1. Set correct default playback device:\n   - Right-click speaker icon\n   - Open Sound settings\n   - Choose correct output device\n2. Check app volume mixer (volume icon > mixer)\n3. Restart Windows Audio service\n4. Check speaker/headphone connection\n5. Test with different output device\n6. Disable audio enhancements\n7. Update audio driver\n8. Run audio troubleshooter',
+    'low')
+
+AUDIO_DRIVER = Diagnosis(
+    'Audio Driver Problem',
+    '1. Update audio driver from Device Manager\n2. Uninstall audio driver and restart (auto-reinstall)\n3. Download latest driver from manufacturer\n4. Check if audio device is disabled in Device Manager\n5. Enable audio device in BIOS\n6. Run audio troubleshooter\n7. Check for Windows updates\n8. Try generic High Definition Audio driver',
+    'medium')
+
+AUDIO_QUALITY = Diagnosis(
+    'Audio Quality Issue (Crackling/Distortion)',
+    '1. Update audio driver\n2. Change audio format:\n   - Sound settings > Properties\n   - Advanced tab\n   - Try 24-bit, 48000 Hz\n3. Disable audio enhancements\n4. Check CPU usage (may cause audio glitches)\n5. Update chipset drivers\n6. Check for electrical interference\n7. Try different speakers/headphones\n8. Adjust buffer size in audio settings',
+    'low')
+
+# --- SECURITY ISSUES ---
+MALWARE = Diagnosis(
+    'Possible Malware Infection',
+    '1. Disconnect from internet\n2. Boot into Safe Mode with Networking\n3. Run Windows Defender full scan\n4. Download and run Malwarebytes\n5. Run AdwCleaner\n6. Check Task Manager for suspicious processes\n7. Check startup programs (msconfig)\n8. Reset all browsers\n9. Change all passwords after cleanup\n10. Consider professional help if persistent',
+    'critical')
+
+RANSOMWARE = Diagnosis(
+    'Ransomware Attack',
+    'CRITICAL RESPONSE:\n1. IMMEDIATELY disconnect from network\n2. DO NOT pay ransom\n3. DO NOT delete encrypted files\n4. Take photo of ransom note\n5. Report to law enforcement\n6. Identify ransomware type (ID Ransomware website)\n7. Check if decryption tool exists\n8. Restore from backup if available\n9. Seek professional cybersecurity help\n10. Rebuild system from clean install',
+    'critical')
+
+# --- STORAGE ISSUES ---
+DISK_FULL = Diagnosis(
+    'Disk Space Full',
+    '1. Run Disk Cleanup (cleanmgr)\n2. Delete temp files: %temp% and C:\\Windows\\Temp\n3. Uninstall unused programs\n4. Use Storage Sense (Settings > Storage)\n5. Delete old Windows.old folder\n6. Empty Recycle Bin\n7. Move files to external drive\n8. Use WinDirStat to find large files\n9. Clear browser cache\n10. Consider adding storage',
+    'medium')
+
+EXTERNAL_DRIVE = Diagnosis(
+    'External Drive Not Detected',
+    '1. Try different USB port\n2. Check Disk Management (diskmgmt.msc)\n3. Assign drive letter manually if unallocated\n4. Update USB and storage drivers\n5. Test on another computer\n6. Check drive power supply (external power adapter)\n7. Try different USB cable\n8. Run CHKDSK if detected\n9. Initialize disk if brand new (Disk Management)',
+    'medium')
+
+DRIVE_ERRORS = Diagnosis(
+    'Hard Drive Errors',
+    'URGENT:\n1. BACKUP DATA IMMEDIATELY!\n2. Run CHKDSK /F /R (takes hours, be patient)\n3. Check SMART status with CrystalDiskInfo\n4. Run manufacturer diagnostics tool\n5. Listen for clicking/grinding sounds\n6. Check disk health percentage\n7. If critical, clone to new drive ASAP\n8. Replace drive if showing failures\n9. Monitor temperature',
+    'critical')
+
+# --- WINDOWS UPDATE ---
+UPDATE_FAIL = Diagnosis(
+    'Windows Update Failure',
+    '1. Run Windows Update Troubleshooter\n2. Clear Windows Update cache:\n   - Stop Windows Update service\n   - Delete C:\\Windows\\SoftwareDistribution\n   - Start Windows Update service\n3. Run: DISM /Online /Cleanup-Image /RestoreHealth\n4. Run: SFC /scannow\n5. Check disk space (need 20GB+)\n6. Manually download update from catalog\n7. Disable antivirus temporarily\n8. Try offline update',
+    'medium')
+
+UPDATE_STUCK = Diagnosis(
+    'Windows Update Stuck',
+    '1. Wait at least 2-3 hours (can take very long)\n2. Check if HDD light is blinking (still working)\n3. If truly frozen (4+ hours, no disk activity):\n   - Force restart (hold power button)\n4. Boot into Safe Mode\n5. Run Update Troubleshooter\n6. Clear update cache\n7. Try again or use Media Creation Tool\n8. For major updates, use Update Assistant',
+    'medium')
+
+# --- DISPLAY ISSUES ---
+NO_DISPLAY_POWER_ON = Diagnosis(
+    'No Display with Power On',
+    '1. Check monitor power and connections\n2. Try different video cable\n3. Try different video port (HDMI/DisplayPort/VGA)\n4. Test with another monitor\n5. Reseat graphics card\n6. Try integrated graphics if available\n7. Check if monitor input source is correct\n8. Listen for beep codes',
+    'high')
+
+SCREEN_FLICKERING = Diagnosis(
+    'Screen Flickering',
+    '1. Update graphics driver\n2. Check refresh rate setting (60Hz recommended)\n3. Try different cable\n4. Disable hardware acceleration in apps\n5. Check for loose connections\n6. Update monitor firmware\n7. Test with different monitor\n8. Check GPU temperature\n9. Reseat GPU',
+    'low')
+
+# --- DEFAULT CATCH-ALL ---
+GENERAL_TROUBLESHOOTING = Diagnosis(
+    'General Computer Issue - Basic Troubleshooting',
+    '1. Restart computer\n2. Check all physical connections\n3. Run Windows Update\n4. Update all drivers\n5. Run antivirus scan\n6. Check Event Viewer for errors\n7. Run SFC /scannow\n8. Check Task Manager for resource usage\n9. Clean temp files\n10. Check for overheating',
+    'low')
 
 
 class ComputerDiagnosisSystem(KnowledgeEngine):
@@ -35,11 +317,7 @@ class ComputerDiagnosisSystem(KnowledgeEngine):
           Fact(outlet_working="yes"),
           Fact(lights="none"))
     def diagnose_psu_failure(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Power Supply Unit (PSU) Failure',
-            'solution': '1. Check if PSU fan spins\n2. Test with PSU tester\n3. Replace PSU if confirmed dead\n4. Check power button connection to motherboard\n5. Verify PSU switch is ON',
-            'severity': 'high'
-        }
+        self.diagnosis_result = PSU_FAILURE
     
     @Rule(Fact(action='diagnose'),
           Fact(power_status="not_turning_on"),
@@ -48,51 +326,31 @@ class ComputerDiagnosisSystem(KnowledgeEngine):
           Fact(lights="on"),
           Fact(display="no_signal"))
     def diagnose_display_or_ram(self):
-        self.diagnosis_result = {
-            'diagnosis': 'RAM, Graphics Card, or Display Issue',
-            'solution': '1. Reseat RAM modules (remove and reinstall)\n2. Try one RAM stick at a time\n3. Reseat graphics card\n4. Check monitor cable connection\n5. Try different display cable/port\n6. Test with another monitor\n7. Listen for beep codes',
-            'severity': 'high'
-        }
+        self.diagnosis_result = DISPLAY_OR_RAM
     
     @Rule(Fact(action='diagnose'),
           Fact(power_status="turning_on"),
           
           Fact(boot_stage="no_bios"))
     def diagnose_motherboard_cpu(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Motherboard or CPU Failure',
-            'solution': '1. Reset CMOS (remove battery for 5 mins)\n2. Remove all unnecessary components\n3. Check for bent CPU pins\n4. Test with minimal hardware (CPU, 1 RAM, PSU)\n5. Check motherboard for burn marks\n6. Verify CPU cooler is properly mounted',
-            'severity': 'critical'
-        }
+        self.diagnosis_result = MOTHERBOARD_CPU
     
     @Rule(Fact(action='diagnose'),
           Fact(power_status="turning_on"),
           Fact(boot_stage="bios_shows"),
           Fact(boot_device="not_found"))
     def diagnose_boot_device(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Boot Device Not Found',
-            'solution': '1. Check boot order in BIOS\n2. Verify hard drive is detected in BIOS\n3. Check SATA/power cables to drive\n4. Try different SATA port\n5. Test drive in another system\n6. Boot from installation media to repair\n7. May need to rebuild BCD or reinstall OS',
-            'severity': 'high'
-        }
+        self.diagnosis_result = BOOT_DEVICE
     
     @Rule(Fact(action='diagnose'),
           Fact(beep_code="1_long_2_short"))
     def diagnose_gpu_beep(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Graphics Card Problem (Video Error)',
-            'solution': '1. Reseat GPU firmly\n2. Check GPU power cables connected\n3. Try integrated graphics if available\n4. Test GPU in another system\n5. Clean GPU contacts with eraser\n6. Update BIOS\n7. Replace GPU if confirmed faulty',
-            'severity': 'high'
-        }
+        self.diagnosis_result = GPU_BEEP
     
     @Rule(Fact(action='diagnose'),
           Fact(beep_code="continuous"))
     def diagnose_ram_beep(self):
-        self.diagnosis_result = {
-            'diagnosis': 'RAM Failure',
-            'solution': '1. Remove all RAM sticks\n2. Install one stick at a time\n3. Try each slot individually\n4. Clean RAM contacts with eraser\n5. Test RAM with MemTest86\n6. Try known-good RAM\n7. Check motherboard RAM slots for damage',
-            'severity': 'medium'
-        }
+        self.diagnosis_result = RAM_BEEP
     
     # ==================== PERFORMANCE ISSUES ====================
     
@@ -102,11 +360,7 @@ class ComputerDiagnosisSystem(KnowledgeEngine):
           Fact(disk_type="hdd"),
           Fact(disk_health="poor"))
     def diagnose_failing_hdd(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Failing Hard Drive',
-            'solution': '1. BACKUP DATA IMMEDIATELY!\n2. Check SMART status with CrystalDiskInfo\n3. Run CHKDSK /F /R (may take hours)\n4. Replace drive urgently\n5. Consider cloning to SSD\n6. Check for clicking sounds (mechanical failure)',
-            'severity': 'critical'
-        }
+        self.diagnosis_result = FAILING_HDD
     
     @Rule(Fact(action='diagnose'),
           Fact(issue_category="performance"),
@@ -114,11 +368,7 @@ class ComputerDiagnosisSystem(KnowledgeEngine):
           Fact(cpu_usage="high"),
           Fact(process="unknown"))
     def diagnose_malware_performance(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Possible Malware or Unwanted Software',
-            'solution': '1. Check Task Manager for suspicious processes\n2. Run Windows Defender full scan\n3. Scan with Malwarebytes\n4. Boot to Safe Mode and scan\n5. Check startup programs (msconfig)\n6. Use Process Explorer to identify processes\n7. Remove suspicious programs\n8. Reset browsers if affected',
-            'severity': 'high'
-        }
+        self.diagnosis_result = MALWARE_PERFORMANCE
     
     @Rule(Fact(action='diagnose'),
           Fact(issue_category="performance"),
@@ -126,21 +376,13 @@ class ComputerDiagnosisSystem(KnowledgeEngine):
           Fact(ram_usage="high"),
           Fact(available_ram="low"))
     def diagnose_insufficient_ram(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Insufficient RAM',
-            'solution': '1. Close unnecessary programs\n2. Check Task Manager for memory hogs\n3. Disable startup programs\n4. Increase virtual memory (page file)\n5. Upgrade RAM (recommended)\n6. Check for memory leaks in applications\n7. Restart computer regularly',
-            'severity': 'medium'
-        }
+        self.diagnosis_result = INSUFFICIENT_RAM
     
     @Rule(Fact(action='diagnose'),
           Fact(issue_category="performance"),
           Fact(temperature="very_high"))
     def diagnose_overheating(self):
-        self.diagnosis_result = {
-            'diagnosis': 'System Overheating',
-            'solution': '1. Clean dust from all fans and heatsinks\n2. Reapply thermal paste on CPU\n3. Check all fans are spinning\n4. Improve case airflow (cable management)\n5. Check CPU temperature with HWMonitor\n6. Verify CPU cooler is properly mounted\n7. Consider better cooling solution\n8. Check GPU temperature and cooling',
-            'severity': 'high'
-        }
+        self.diagnosis_result = OVERHEATING
     
     # ==================== BLUE SCREEN (BSOD) ====================
     
@@ -148,41 +390,25 @@ class ComputerDiagnosisSystem(KnowledgeEngine):
           Fact(issue_category="bsod"),
           Fact(error_code="DRIVER_IRQL_NOT_LESS_OR_EQUAL"))
     def diagnose_driver_bsod(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Driver Conflict (DRIVER_IRQL)',
-            'solution': '1. Boot into Safe Mode\n2. Update all drivers (especially network/GPU)\n3. Rollback recently installed drivers\n4. Use Driver Verifier to find bad driver\n5. Check Windows Update\n6. Uninstall recent software\n7. Run SFC /scannow',
-            'severity': 'high'
-        }
+        self.diagnosis_result = DRIVER_BSOD
     
     @Rule(Fact(action='diagnose'),
           Fact(issue_category="bsod"),
           Fact(error_code="MEMORY_MANAGEMENT"))
     def diagnose_memory_bsod(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Memory Management Error',
-            'solution': '1. Run Windows Memory Diagnostic\n2. Test RAM with MemTest86 (8+ passes)\n3. Reseat all RAM modules\n4. Test one RAM stick at a time\n5. Update BIOS\n6. Reset BIOS to defaults\n7. Replace faulty RAM if confirmed\n8. Check for overclocking issues',
-            'severity': 'high'
-        }
+        self.diagnosis_result = MEMORY_BSOD
     
     @Rule(Fact(action='diagnose'),
           Fact(issue_category="bsod"),
           Fact(error_code="KERNEL_DATA_INPAGE_ERROR"))
     def diagnose_disk_bsod(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Hard Drive or RAM Failure',
-            'solution': '1. BACKUP DATA IMMEDIATELY!\n2. Run CHKDSK /F /R\n3. Check SMART status\n4. Test RAM with MemTest86\n5. Check SATA cables\n6. Try different SATA port\n7. Run disk manufacturer diagnostics\n8. Replace failing component',
-            'severity': 'critical'
-        }
+        self.diagnosis_result = DISK_BSOD
     
     @Rule(Fact(action='diagnose'),
           Fact(issue_category="bsod"),
           Fact(error_code="SYSTEM_SERVICE_EXCEPTION"))
     def diagnose_system_service_bsod(self):
-        self.diagnosis_result = {
-            'diagnosis': 'System Service or Driver Issue',
-            'solution': '1. Update graphics drivers\n2. Run SFC /scannow\n3. Run DISM /Online /Cleanup-Image /RestoreHealth\n4. Check Windows Update\n5. Uninstall recent programs\n6. Boot to Safe Mode and troubleshoot\n7. Check Event Viewer for details',
-            'severity': 'medium'
-        }
+        self.diagnosis_result = SYSTEM_SERVICE_BSOD
     
     # ==================== BOOT PROBLEMS ====================
     
@@ -191,33 +417,21 @@ class ComputerDiagnosisSystem(KnowledgeEngine):
           Fact(symptom="boot_loop"),
           Fact(safe_mode="boots"))
     def diagnose_software_boot_loop(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Software/Driver Causing Boot Loop',
-            'solution': '1. Uninstall recent Windows updates\n2. Use System Restore to previous point\n3. Disable startup programs (msconfig)\n4. Run SFC and DISM repairs\n5. Uninstall recently installed software\n6. Update or rollback drivers\n7. Perform clean boot troubleshooting',
-            'severity': 'high'
-        }
+        self.diagnosis_result = SOFTWARE_BOOT_LOOP
     
     @Rule(Fact(action='diagnose'),
           Fact(issue_category="boot"),
           Fact(symptom="boot_loop"),
           Fact(safe_mode="no_boot"))
     def diagnose_hardware_boot_loop(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Hardware or Critical System Corruption',
-            'solution': '1. Run Startup Repair from install media\n2. Rebuild BCD:\n   - bootrec /fixmbr\n   - bootrec /fixboot\n   - bootrec /rebuildbcd\n3. Test RAM thoroughly\n4. Check hard drive health\n5. Reset BIOS settings\n6. Consider clean Windows install\n7. Check hardware connections',
-            'severity': 'critical'
-        }
+        self.diagnosis_result = HARDWARE_BOOT_LOOP
     
     @Rule(Fact(action='diagnose'),
           Fact(issue_category="boot"),
           Fact(symptom="slow_boot"),
           Fact(boot_time=">5min"))
     def diagnose_slow_boot(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Slow Boot Time',
-            'solution': '1. Disable unnecessary startup programs\n2. Run Disk Cleanup\n3. Check for malware\n4. Update drivers\n5. Enable Fast Startup\n6. Defragment HDD (or optimize SSD)\n7. Consider upgrading to SSD\n8. Check disk health\n9. Disable unused services',
-            'severity': 'medium'
-        }
+        self.diagnosis_result = SLOW_BOOT
     
     # ==================== NETWORK ISSUES ====================
     
@@ -226,22 +440,14 @@ class ComputerDiagnosisSystem(KnowledgeEngine):
           Fact(symptom="no_internet"),
           Fact(other_devices="working"))
     def diagnose_pc_network_only(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Network Adapter or Driver Issue',
-            'solution': '1. Restart computer\n2. Update network adapter driver\n3. Uninstall and reinstall driver\n4. Run Network Troubleshooter\n5. Reset network settings:\n   - ipconfig /release\n   - ipconfig /renew\n   - ipconfig /flushdns\n   - netsh winsock reset\n   - netsh int ip reset\n6. Check if adapter is enabled\n7. Try Ethernet if using WiFi',
-            'severity': 'medium'
-        }
+        self.diagnosis_result = PC_NETWORK_ONLY
     
     @Rule(Fact(action='diagnose'),
           Fact(issue_category="network"),
           Fact(symptom="no_internet"),
           Fact(other_devices="not_working"))
     def diagnose_router_isp(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Router or ISP Problem',
-            'solution': '1. Power cycle modem and router (30 sec off)\n2. Check all cable connections\n3. Verify ISP service status online\n4. Check router admin panel for issues\n5. Try direct modem connection\n6. Reset router to factory settings (last resort)\n7. Contact ISP if problem persists',
-            'severity': 'medium'
-        }
+        self.diagnosis_result = ROUTER_ISP
     
     @Rule(Fact(action='diagnose'),
           Fact(issue_category="network"),
@@ -249,11 +455,7 @@ class ComputerDiagnosisSystem(KnowledgeEngine):
           Fact(connection="wifi"),
           Fact(signal="weak"))
     def diagnose_wifi_signal(self):
-        self.diagnosis_result = {
-            'diagnosis': 'WiFi Signal/Interference Issue',
-            'solution': '1. Move closer to router\n2. Remove physical obstructions\n3. Change WiFi channel (use WiFi analyzer app)\n4. Use 5GHz band if available\n5. Update router firmware\n6. Update WiFi adapter driver\n7. Consider WiFi extender or mesh system\n8. Avoid interference from microwaves/phones',
-            'severity': 'low'
-        }
+        self.diagnosis_result = WIFI_SIGNAL
     
     @Rule(Fact(action='diagnose'),
           Fact(issue_category="network"),
@@ -261,22 +463,14 @@ class ComputerDiagnosisSystem(KnowledgeEngine):
           Fact(symptom="cannot_connect"),
           Fact(network_visible="yes"))
     def diagnose_wifi_auth(self):
-        self.diagnosis_result = {
-            'diagnosis': 'WiFi Authentication Issue',
-            'solution': '1. Verify correct password\n2. Forget network and reconnect\n3. Restart router\n4. Check router security type (use WPA2)\n5. Disable MAC filtering temporarily\n6. Update router firmware\n7. Reset network settings on PC\n8. Try static IP assignment',
-            'severity': 'medium'
-        }
+        self.diagnosis_result = WIFI_AUTH
     
     @Rule(Fact(action='diagnose'),
           Fact(issue_category="network"),
           Fact(dns_working="no"),
           Fact(can_ping_ip="yes"))
     def diagnose_dns(self):
-        self.diagnosis_result = {
-            'diagnosis': 'DNS Resolution Problem',
-            'solution': '1. Flush DNS cache: ipconfig /flushdns\n2. Change DNS to Google (8.8.8.8, 8.8.4.4) or Cloudflare (1.1.1.1)\n3. Restart DNS Client service\n4. Check hosts file (C:\\Windows\\System32\\drivers\\etc\\hosts)\n5. Reset TCP/IP: netsh int ip reset\n6. Disable IPv6 temporarily\n7. Clear browser cache',
-            'severity': 'medium'
-        }
+        self.diagnosis_result = DNS
     
     # ==================== APPLICATION ISSUES ====================
     
@@ -285,32 +479,20 @@ class ComputerDiagnosisSystem(KnowledgeEngine):
           Fact(symptom="crashes"),
           Fact(which_apps="specific"))
     def diagnose_specific_app_crash(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Specific Application Problem',
-            'solution': '1. Update the application to latest version\n2. Reinstall the application\n3. Run as administrator\n4. Check compatibility mode\n5. Check Event Viewer for crash details\n6. Disable antivirus temporarily\n7. Install missing dependencies (.NET, C++ Redistributables)\n8. Clear application cache/data\n9. Check if app needs GPU drivers update',
-            'severity': 'low'
-        }
+        self.diagnosis_result = SPECIFIC_APP_CRASH
     
     @Rule(Fact(action='diagnose'),
           Fact(issue_category="application"),
           Fact(symptom="crashes"),
           Fact(which_apps="all"))
     def diagnose_system_app_crashes(self):
-        self.diagnosis_result = {
-            'diagnosis': 'System-wide Application Instability',
-            'solution': '1. Run SFC /scannow\n2. Run DISM repair\n3. Update Windows\n4. Test RAM with MemTest86\n5. Update all drivers\n6. Update .NET Framework\n7. Scan for malware\n8. Check Event Viewer for patterns\n9. Perform clean boot\n10. May need Windows repair install',
-            'severity': 'high'
-        }
+        self.diagnosis_result = SYSTEM_APP_CRASHES
     
     @Rule(Fact(action='diagnose'),
           Fact(issue_category="application"),
           Fact(symptom="wont_install"))
     def diagnose_install_failure(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Software Installation Failure',
-            'solution': '1. Run installer as administrator\n2. Disable antivirus temporarily\n3. Check system requirements\n4. Clean temp folders (Disk Cleanup)\n5. Ensure Windows Installer service is running\n6. Download installer again\n7. Check disk space\n8. Install in Safe Mode\n9. Check installer logs',
-            'severity': 'low'
-        }
+        self.diagnosis_result = INSTALL_FAILURE
     
     # ==================== PERIPHERAL ISSUES ====================
     
@@ -319,44 +501,28 @@ class ComputerDiagnosisSystem(KnowledgeEngine):
           Fact(device="printer"),
           Fact(symptom="not_detected"))
     def diagnose_printer_not_found(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Printer Not Detected',
-            'solution': '1. Check USB/network cable connection\n2. Power cycle printer\n3. Restart Print Spooler service\n4. Update printer driver from manufacturer\n5. Remove and re-add printer\n6. Run printer troubleshooter\n7. Try different USB port\n8. Check if printer shows in Devices\n9. Disable firewall temporarily (network printer)',
-            'severity': 'low'
-        }
+        self.diagnosis_result = PRINTER_NOT_FOUND
     
     @Rule(Fact(action='diagnose'),
           Fact(issue_category="peripheral"),
           Fact(device="printer"),
           Fact(symptom="queue_stuck"))
     def diagnose_print_queue(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Print Queue Stuck',
-            'solution': '1. Cancel all print jobs\n2. Restart Print Spooler service:\n   - Open Services (services.msc)\n   - Stop Print Spooler\n   - Delete files from C:\\Windows\\System32\\spool\\PRINTERS\n   - Start Print Spooler\n3. Update printer driver\n4. Run printer troubleshooter\n5. Check printer connection',
-            'severity': 'low'
-        }
+        self.diagnosis_result = PRINT_QUEUE
     
     @Rule(Fact(action='diagnose'),
           Fact(issue_category="peripheral"),
           Fact(device="usb"),
           Fact(symptom="not_recognized"))
     def diagnose_usb_not_recognized(self):
-        self.diagnosis_result = {
-            'diagnosis': 'USB Device Not Recognized',
-            'solution': '1. Try different USB port (USB 2.0 port recommended)\n2. Restart computer\n3. Update USB controller drivers\n4. Check Device Manager for errors (yellow exclamation)\n5. Test device on another computer\n6. Uninstall device in Device Manager, then reconnect\n7. Disable USB selective suspend\n8. Update chipset drivers\n9. Check if device needs external power',
-            'severity': 'low'
-        }
+        self.diagnosis_result = USB_NOT_RECOGNIZED
     
     @Rule(Fact(action='diagnose'),
           Fact(issue_category="peripheral"),
           Fact(device="usb"),
           Fact(symptom="keeps_disconnecting"))
     def diagnose_usb_disconnecting(self):
-        self.diagnosis_result = {
-            'diagnosis': 'USB Device Keeps Disconnecting',
-            'solution': '1. Try different USB port\n2. Disable USB selective suspend:\n   - Power Options > Change plan settings\n   - Change advanced power settings\n   - USB settings > Disable selective suspend\n3. Update USB drivers\n4. Check cable quality (replace if damaged)\n5. Try powered USB hub\n6. Update chipset drivers\n7. Check for loose connections',
-            'severity': 'medium'
-        }
+        self.diagnosis_result = USB_DISCONNECTING
     
     @Rule(Fact(action='diagnose'),
           Fact(issue_category="peripheral"),
@@ -364,11 +530,7 @@ class ComputerDiagnosisSystem(KnowledgeEngine):
           Fact(connection="wireless"),
           Fact(symptom="not_working"))
     def diagnose_wireless_kb_mouse(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Wireless Keyboard/Mouse Issue',
-            'solution': '1. Replace batteries\n2. Re-pair device (follow manufacturer steps)\n3. Plug USB receiver into different port\n4. Check for interference (move away from WiFi router)\n5. Update device driver\n6. Clean sensor/optical area\n7. Try on another computer\n8. Check if USB receiver is working (LED indicator)',
-            'severity': 'low'
-        }
+        self.diagnosis_result = WIRELESS_KB_MOUSE
     
     # ==================== AUDIO ISSUES ====================
     
@@ -378,32 +540,20 @@ class ComputerDiagnosisSystem(KnowledgeEngine):
           Fact(device_detected="yes"),
           Fact(muted="no"))
     def diagnose_audio_output(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Audio Output Configuration Issue',
-            'solution': '1. Set correct default playback device:\n   - Right-click speaker icon\n   - Open Sound settings\n   - Choose correct output device\n2. Check app volume mixer (volume icon > mixer)\n3. Restart Windows Audio service\n4. Check speaker/headphone connection\n5. Test with different output device\n6. Disable audio enhancements\n7. Update audio driver\n8. Run audio troubleshooter',
-            'severity': 'low'
-        }
+        self.diagnosis_result = AUDIO_OUTPUT
     
     @Rule(Fact(action='diagnose'),
           Fact(issue_category="audio"),
           Fact(symptom="no_sound"),
           Fact(device_detected="no"))
     def diagnose_audio_driver(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Audio Driver Problem',
-            'solution': '1. Update audio driver from Device Manager\n2. Uninstall audio driver and restart (auto-reinstall)\n3. Download latest driver from manufacturer\n4. Check if audio device is disabled in Device Manager\n5. Enable audio device in BIOS\n6. Run audio troubleshooter\n7. Check for Windows updates\n8. Try generic High Definition Audio driver',
-            'severity': 'medium'
-        }
+        self.diagnosis_result = AUDIO_DRIVER
     
     @Rule(Fact(action='diagnose'),
           Fact(issue_category="audio"),
           Fact(symptom="crackling"))
     def diagnose_audio_quality(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Audio Quality Issue (Crackling/Distortion)',
-            'solution': '1. Update audio driver\n2. Change audio format:\n   - Sound settings > Properties\n   - Advanced tab\n   - Try 24-bit, 48000 Hz\n3. Disable audio enhancements\n4. Check CPU usage (may cause audio glitches)\n5. Update chipset drivers\n6. Check for electrical interference\n7. Try different speakers/headphones\n8. Adjust buffer size in audio settings',
-            'severity': 'low'
-        }
+        self.diagnosis_result = AUDIO_QUALITY
     
     # ==================== SECURITY ISSUES ====================
     
@@ -415,21 +565,13 @@ class ComputerDiagnosisSystem(KnowledgeEngine):
              Fact(signs="unknown_programs"),
              Fact(signs="browser_redirects")))
     def diagnose_malware(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Possible Malware Infection',
-            'solution': '1. Disconnect from internet\n2. Boot into Safe Mode with Networking\n3. Run Windows Defender full scan\n4. Download and run Malwarebytes\n5. Run AdwCleaner\n6. Check Task Manager for suspicious processes\n7. Check startup programs (msconfig)\n8. Reset all browsers\n9. Change all passwords after cleanup\n10. Consider professional help if persistent',
-            'severity': 'critical'
-        }
+        self.diagnosis_result = MALWARE
     
     @Rule(Fact(action='diagnose'),
           Fact(issue_category="security"),
           Fact(symptom="ransomware"))
     def diagnose_ransomware(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Ransomware Attack',
-            'solution': 'CRITICAL RESPONSE:\n1. IMMEDIATELY disconnect from network\n2. DO NOT pay ransom\n3. DO NOT delete encrypted files\n4. Take photo of ransom note\n5. Report to law enforcement\n6. Identify ransomware type (ID Ransomware website)\n7. Check if decryption tool exists\n8. Restore from backup if available\n9. Seek professional cybersecurity help\n10. Rebuild system from clean install',
-            'severity': 'critical'
-        }
+        self.diagnosis_result = RANSOMWARE
     
     # ==================== STORAGE ISSUES ====================
     
@@ -437,31 +579,19 @@ class ComputerDiagnosisSystem(KnowledgeEngine):
           Fact(issue_category="storage"),
           Fact(symptom="disk_full"))
     def diagnose_disk_full(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Disk Space Full',
-            'solution': '1. Run Disk Cleanup (cleanmgr)\n2. Delete temp files: %temp% and C:\\Windows\\Temp\n3. Uninstall unused programs\n4. Use Storage Sense (Settings > Storage)\n5. Delete old Windows.old folder\n6. Empty Recycle Bin\n7. Move files to external drive\n8. Use WinDirStat to find large files\n9. Clear browser cache\n10. Consider adding storage',
-            'severity': 'medium'
-        }
+        self.diagnosis_result = DISK_FULL
     
     @Rule(Fact(action='diagnose'),
           Fact(issue_category="storage"),
           Fact(symptom="external_not_showing"))
     def diagnose_external_drive(self):
-        self.diagnosis_result = {
-            'diagnosis': 'External Drive Not Detected',
-            'solution': '1. Try different USB port\n2. Check Disk Management (diskmgmt.msc)\n3. Assign drive letter manually if unallocated\n4. Update USB and storage drivers\n5. Test on another computer\n6. Check drive power supply (external power adapter)\n7. Try different USB cable\n8. Run CHKDSK if detected\n9. Initialize disk if brand new (Disk Management)',
-            'severity': 'medium'
-        }
+        self.diagnosis_result = EXTERNAL_DRIVE
     
     @Rule(Fact(action='diagnose'),
           Fact(issue_category="storage"),
           Fact(symptom="drive_errors"))
     def diagnose_drive_errors(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Hard Drive Errors',
-            'solution': 'URGENT:\n1. BACKUP DATA IMMEDIATELY!\n2. Run CHKDSK /F /R (takes hours, be patient)\n3. Check SMART status with CrystalDiskInfo\n4. Run manufacturer diagnostics tool\n5. Listen for clicking/grinding sounds\n6. Check disk health percentage\n7. If critical, clone to new drive ASAP\n8. Replace drive if showing failures\n9. Monitor temperature',
-            'severity': 'critical'
-        }
+        self.diagnosis_result = DRIVE_ERRORS
     
     # ==================== WINDOWS UPDATE ====================
     
@@ -469,21 +599,13 @@ class ComputerDiagnosisSystem(KnowledgeEngine):
           Fact(issue_category="windows_update"),
           Fact(symptom="update_failing"))
     def diagnose_update_fail(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Windows Update Failure',
-            'solution': '1. Run Windows Update Troubleshooter\n2. Clear Windows Update cache:\n   - Stop Windows Update service\n   - Delete C:\\Windows\\SoftwareDistribution\n   - Start Windows Update service\n3. Run: DISM /Online /Cleanup-Image /RestoreHealth\n4. Run: SFC /scannow\n5. Check disk space (need 20GB+)\n6. Manually download update from catalog\n7. Disable antivirus temporarily\n8. Try offline update',
-            'severity': 'medium'
-        }
+        self.diagnosis_result = UPDATE_FAIL
     
     @Rule(Fact(action='diagnose'),
           Fact(issue_category="windows_update"),
           Fact(symptom="update_stuck"))
     def diagnose_update_stuck(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Windows Update Stuck',
-            'solution': '1. Wait at least 2-3 hours (can take very long)\n2. Check if HDD light is blinking (still working)\n3. If truly frozen (4+ hours, no disk activity):\n   - Force restart (hold power button)\n4. Boot into Safe Mode\n5. Run Update Troubleshooter\n6. Clear update cache\n7. Try again or use Media Creation Tool\n8. For major updates, use Update Assistant',
-            'severity': 'medium'
-        }
+        self.diagnosis_result = UPDATE_STUCK
     
     # ==================== DISPLAY ISSUES ====================
     
@@ -492,21 +614,13 @@ class ComputerDiagnosisSystem(KnowledgeEngine):
           Fact(symptom="no_display"),
           Fact(power_on="yes"))
     def diagnose_no_display_power_on(self):
-        self.diagnosis_result = {
-            'diagnosis': 'No Display with Power On',
-            'solution': '1. Check monitor power and connections\n2. Try different video cable\n3. Try different video port (HDMI/DisplayPort/VGA)\n4. Test with another monitor\n5. Reseat graphics card\n6. Try integrated graphics if available\n7. Check if monitor input source is correct\n8. Listen for beep codes',
-            'severity': 'high'
-        }
+        self.diagnosis_result = NO_DISPLAY_POWER_ON
     
     @Rule(Fact(action='diagnose'),
           Fact(issue_category="display"),
           Fact(symptom="flickering"))
     def diagnose_screen_flickering(self):
-        self.diagnosis_result = {
-            'diagnosis': 'Screen Flickering',
-            'solution': '1. Update graphics driver\n2. Check refresh rate setting (60Hz recommended)\n3. Try different cable\n4. Disable hardware acceleration in apps\n5. Check for loose connections\n6. Update monitor firmware\n7. Test with different monitor\n8. Check GPU temperature\n9. Reseat GPU',
-            'severity': 'low'
-        }
+        self.diagnosis_result = SCREEN_FLICKERING
     
     # ==================== DEFAULT CATCH-ALL ====================
     
@@ -514,27 +628,222 @@ class ComputerDiagnosisSystem(KnowledgeEngine):
     def general_troubleshooting(self):
         """Catch-all rule with lowest priority"""
         if not self.diagnosis_result:
-            self.diagnosis_result = {
-                'diagnosis': 'General Computer Issue - Basic Troubleshooting',
-                'solution': '1. Restart computer\n2. Check all physical connections\n3. Run Windows Update\n4. Update all drivers\n5. Run antivirus scan\n6. Check Event Viewer for errors\n7. Run SFC /scannow\n8. Check Task Manager for resource usage\n9. Clean temp files\n10. Check for overheating',
-                'severity': 'low'
-            }
+            self.diagnosis_result = GENERAL_TROUBLESHOOTING
+
 
+HISTORY_FILE = 'diagnosis_history.json'
 
-def save_diagnosis(diagnosis_data):
+# A diagnosis repeating one of the last HISTORY_DEDUP_LOOKBACK entries
+# (same facts and diagnosis) within this many seconds of that entry's
+# last occurrence is counted on it instead of appended; 0 appends all
+HISTORY_DEDUP_WINDOW = float(os.environ.get('DIAGNOSIS_HISTORY_DEDUP_WINDOW', 0))
+HISTORY_DEDUP_LOOKBACK = 512
+
+# Concurrent requests each append a record; serialise the read-modify-write
+_history_lock = threading.Lock()
+
+# Called as listener(record_id, record, history) after each record is saved
+_history_listeners = []
+
+
+def add_history_listener(listener):
+    """Keep ``listener`` informed of every diagnosis saved from now on
+
+    A record's id is its position in the history file. A record counted on
+    an earlier duplicate entry is reported with that entry's id. Listeners
+    run while the history is locked, so they see records in save order.
+    ``history`` is the whole history as just written, including records
+    other processes saved; listeners must not modify it.
+    """
+    _history_listeners.append(listener)
+
+
+@contextmanager
+def history_lock():
+    """Hold the history file against other threads and other processes
+
+    Every writer of the history file (save_diagnoses, the CLI, the
+    compaction job) takes an exclusive flock on HISTORY_FILE + '.lock'
+    around its read-modify-write, so no process overwrites another's save.
+    """
+    with _history_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(HISTORY_FILE + '.lock', 'a') as lock_file:
+            # Released when the file is closed
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            yield
+
+
+def history_generation():
+    """How many times the history file has been rewritten by compaction
+
+    Record ids are positions in the file, so ids from an earlier
+    generation no longer name the same entries.
+    """
+    try:
+        with open(HISTORY_FILE + '.generation', 'r') as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def occurrences(record):
+    """How many diagnoses a history entry stands for"""
+    return record.get('count', 1)
+
+
+def last_seen(record):
+    return record.get('last_seen', record.get('timestamp'))
+
+
+def same_case(entry, record):
+    """Whether two history records hold the same facts and diagnosis"""
+    return (entry.get('diagnosis') == record.get('diagnosis')
+            and entry.get('facts') == record.get('facts')
+            and entry.get('knowledge_base') == record.get('knowledge_base'))
+
+
+def seconds_between(earlier, later):
+    """Seconds from one ISO timestamp to another, or None if unparseable"""
+    try:
+        return (datetime.fromisoformat(later) - datetime.fromisoformat(earlier)).total_seconds()
+    except (TypeError, ValueError):
+        return None
+
+
+def fold_record(entry, record):
+    """Count ``record`` as further occurrences of the duplicate ``entry``"""
+    gap = seconds_between(last_seen(entry), last_seen(record))
+    entry['first_seen'] = entry.get('first_seen', entry.get('timestamp'))
+    entry['last_seen'] = last_seen(record) if gap is None or gap >= 0 else last_seen(entry)
+    entry['count'] = occurrences(entry) + occurrences(record)
+
+
+def find_duplicate(history, record, window, lookback=HISTORY_DEDUP_LOOKBACK):
+    """Id of a recent entry ``record`` duplicates within ``window`` seconds"""
+    for entry_id in range(len(history) - 1, max(-1, len(history) - 1 - lookback), -1):
+        entry = history[entry_id]
+        if same_case(entry, record):
+            gap = seconds_between(last_seen(entry), record.get('timestamp'))
+            return entry_id if gap is not None and gap <= window else None
+    return None
+
+
+def load_history():
+    """All saved diagnoses, oldest first"""
+    try:
+        with open(HISTORY_FILE, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def write_history(history):
+    """Replace the history file; call with history_lock() held"""
+    # Write to a temporary file first so readers never see half a file
+    with open(HISTORY_FILE + '.tmp', 'w') as f:
+        json.dump(history, f, indent=2)
+    os.replace(HISTORY_FILE + '.tmp', HISTORY_FILE)
+
+
+def replace_history(history):
+    """Rewrite the history with new record ids; call with history_lock() held
+
+    Starts a new generation, so running history indexes rebuild instead of
+    applying the next record ids to the wrong entries.
+    """
+    write_history(history)
+    generation = history_generation() + 1
+    with open(HISTORY_FILE + '.generation.tmp', 'w') as f:
+        f.write(str(generation))
+    os.replace(HISTORY_FILE + '.generation.tmp', HISTORY_FILE + '.generation')
+
+
+def save_diagnosis(diagnosis_data, profile=None):
     """Save diagnosis history to JSON file"""
+    return save_diagnoses([diagnosis_data], profile)
+
+
+def _no_phase(name):
+    pass
+
+
+def save_diagnoses(records, profile=None):
+    """Append several diagnoses to the history file in one write
+
+    With HISTORY_DEDUP_WINDOW set, repeats of a recent entry are counted
+    on it instead (see history_compaction.py). A request's memory profile
+    (see memory_profile.py) gets a phase for each step of the save.
+    """
+    if not records:
+        return True
+    phase = profile.phase if profile is not None else _no_phase
     try:
-        try:
-            with open('diagnosis_history.json', 'r') as f:
-                history = json.load(f)
-        except FileNotFoundError:
-            history = []
-        
-        history.append(diagnosis_data)
-        
-        with open('diagnosis_history.json', 'w') as f:
-            json.dump(history, f, indent=2)
+        with history_lock():
+            history = load_history()
+            saved = []
+            
+            for record in records:
+                entry_id = None
+                if HISTORY_DEDUP_WINDOW:
+                    entry_id = find_duplicate(history, record, HISTORY_DEDUP_WINDOW)
+                if entry_id is None:
+                    # A copy, so folding later repeats leaves the caller's record alone
+                    history.append(dict(record))
+                    entry_id = len(history) - 1
+                else:
+                    fold_record(history[entry_id], record)
+                saved.append((entry_id, record))
+            phase('history_load')
+            
+            write_history(history)
+            phase('history_write')
+            
+            for record_id, record in saved:
+                for listener in _history_listeners:
+                    try:
+                        listener(record_id, record, history)
+                    except Exception as e:
+                        print(f"Warning: History listener failed: {e}")
+            phase('history_listeners')
         return True
     except Exception as e:
         print(f"Warning: Could not save diagnosis history: {e}")
-        return False
\ No newline at end of file
+        return False
+
+
+def answer_key(answers):
+    """Hashable key identifying an answer set
+
+    Answer order is part of the key: when several rules match, the engine
+    keeps the conclusion of the one whose facts were declared first.
+    """
+    return tuple(answers.items())
+
+
+def rule_results(engine_class=ComputerDiagnosisSystem):
+    """Return the diagnosis each rule concludes, keyed by rule name"""
+    engine = engine_class()
+    results = {}
+    for rule in engine.get_rules():
+        engine.diagnosis_result = None
+        getattr(engine, rule.__name__)()
+        results[rule.__name__] = engine.diagnosis_result
+    return results
+
+
+def knowledge_base_version(engine_class=ComputerDiagnosisSystem):
+    """Fingerprint of the rule conditions and conclusions
+
+    Precomputed artefacts (answer tables, bundles, caches) store this value
+    and are discarded when the rules change underneath them.
+    """
+    results = rule_results(engine_class)
+    digest = hashlib.sha256()
+    for rule in sorted(engine_class().get_rules(), key=lambda r: r.__name__):
+        digest.update(rule.__name__.encode())
+        digest.update(repr(list(rule)).encode())
+        digest.update(json.dumps(results[rule.__name__].as_dict(), sort_keys=True).encode())
+    return digest.hexdigest()[:16]
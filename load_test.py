@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Load Test - Replay a realistic answer mix against the web app
+
+The mix is learned from diagnosis_history.json (how often each answer set
+was actually submitted) plus every path through the CLI and web question
+trees (each counted --prior times), so paths nobody has taken yet still
+get some traffic. Requests are sent open-loop: they are scheduled at the
+target rate whether or not earlier ones have finished, and latency is
+measured from the scheduled time, so a backed-up server shows up as
+latency rather than as a lower request rate.
+
+--find-saturation raises the rate until a run misses the latency SLO,
+errors too often or falls behind the offered rate, then bisects between
+the last passing and first failing rate.
+
+Requests are sent with "record": false, so the target does not save them
+to its history; --record saves them too, to include the history write in
+what is measured (point that at a test deployment).
+
+Usage:
+    python load_test.py [--url http://localhost:5000] [--rate 20] [--duration 10]
+                        [--concurrency 8] [--record]
+    python load_test.py --find-saturation [--slo-ms 250] [--max-error-rate 0.01]
+"""
+
+from knowledge_base import answer_key, load_history, occurrences
+from answer_table import enumerate_cli_paths, enumerate_web_paths
+from collections import Counter
+from urllib.parse import urlsplit
+import argparse
+import http.client
+import itertools
+import json
+import queue
+import random
+import threading
+import time
+
+
+# ==================== ANSWER MIX ====================
+
+def learn_mix(history=None, prior=1.0):
+    """[(answers, weight)] from the history plus every questionnaire path"""
+    weights = Counter()
+    for record in load_history() if history is None else history:
+        facts = record.get('facts')
+        if isinstance(facts, dict) and all(isinstance(v, str) for v in facts.values()):
+            weights[answer_key(facts)] += occurrences(record)
+    paths = {answer_key(facts) for walker in (enumerate_cli_paths, enumerate_web_paths)
+             for facts in walker()}
+    for key in paths:
+        weights[key] += prior
+    return [(dict(key), weight) for key, weight in weights.most_common()]
+
+
+class AnswerMix:
+    """Draws answer sets in proportion to their learned weight"""
+
+    def __init__(self, mix, seed=None):
+        self.answers = [answers for answers, _ in mix]
+        self.cum_weights = list(itertools.accumulate(weight for _, weight in mix))
+        self.random = random.Random(seed)
+
+    def sample(self):
+        return self.random.choices(self.answers, cum_weights=self.cum_weights)[0]
+
+
+# ==================== LOAD GENERATION ====================
+
+def percentile(values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(p / 100 * len(values))) - 1))]
+
+
+class _Worker(threading.Thread):
+    """Sends queued requests over one keep-alive connection"""
+
+    def __init__(self, target, jobs, results, timeout, record=False):
+        super().__init__(daemon=True)
+        parts = urlsplit(target)
+        self.host, self.port = parts.hostname, parts.port
+        self.https = parts.scheme == 'https'
+        self.path = parts.path.rstrip('/') + '/diagnose'
+        self.jobs = jobs
+        self.results = results
+        self.timeout = timeout
+        self.record = record
+        self.connection = None
+
+    def _connect(self):
+        connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        self.connection = connection_class(self.host, self.port, timeout=self.timeout)
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            scheduled, answers = job
+            body = json.dumps({'answers': answers, 'record': self.record})
+            started = time.perf_counter()
+            try:
+                if self.connection is None:
+                    self._connect()
+                self.connection.request('POST', self.path, body=body,
+                                        headers={'Content-Type': 'application/json'})
+                response = self.connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException) as e:
+                status = type(e).__name__
+                self.connection = None
+            finished = time.perf_counter()
+            self.results.append((finished - scheduled, finished - started, status))
+
+
+def run_load(url, mix, rate, duration, concurrency, timeout=10.0, record=False):
+    """Offer ``rate`` requests/s for ``duration`` seconds; return a report"""
+    jobs = queue.Queue()
+    results = []
+    workers = [_Worker(url, jobs, results, timeout, record) for _ in range(concurrency)]
+    for worker in workers:
+        worker.start()
+
+    count = max(1, int(rate * duration))
+    start = time.perf_counter()
+    for i in range(count):
+        scheduled = start + i / rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        jobs.put((scheduled, mix.sample()))
+    for _ in workers:
+        jobs.put(None)
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _, status in results if status == 200)
+    service = sorted(service for _, service, status in results if status == 200)
+    statuses = Counter(status for _, _, status in results)
+    ok = statuses.get(200, 0)
+    return {
+        'offered_rps': rate,
+        'requests': len(results),
+        'throughput_rps': ok / elapsed,
+        'error_rate': 1 - ok / len(results) if results else 0.0,
+        'statuses': dict(statuses),
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'service_p50_ms': percentile(service, 50) * 1000
+    }
+
+
+def passes(report, slo_ms, max_error_rate):
+    """Whether a run kept up with the offered rate within the SLO"""
+    return (report['p99_ms'] <= slo_ms
+            and report['error_rate'] <= max_error_rate
+            and report['throughput_rps'] >= 0.95 * report['offered_rps'] * (1 - report['error_rate']))
+
+
+def find_saturation(url, mix, concurrency, duration, start_rate, max_rate, slo_ms,
+                    max_error_rate, growth=1.5, refine=3, report=print, record=False):
+    """The saturation point, the lowest failing rate, and every run made on the way
+
+    The saturation point is the report of the highest rate that met the
+    objective below a failing one. It is None when no rate up to
+    ``max_rate`` failed (no saturation found), or when ``start_rate``
+    already failed; the failing rate, None in the first case, tells them
+    apart.
+    """
+    runs = []
+    best = None
+    failing = None
+    rate = start_rate
+    while rate <= max_rate:
+        result = run_load(url, mix, rate, duration, concurrency, record=record)
+        runs.append(result)
+        report(result)
+        if not passes(result, slo_ms, max_error_rate):
+            failing = rate
+            break
+        best = result
+        rate *= growth
+
+    if best is not None and failing is not None:
+        low, high = best['offered_rps'], failing
+        for _ in range(refine):
+            rate = (low + high) / 2
+            result = run_load(url, mix, rate, duration, concurrency, record=record)
+            runs.append(result)
+            report(result)
+            if passes(result, slo_ms, max_error_rate):
+                best, low = result, rate
+            else:
+                high = failing = rate
+    if failing is None:
+        best = None
+    return best, failing, runs
+
+
+def print_report(report):
+    statuses = ', '.join(f"{status}: {count}" for status, count in sorted(
+        report['statuses'].items(), key=lambda item: str(item[0])))
+    print(f"   {report['offered_rps']:7.1f} rps offered | {report['throughput_rps']:7.1f} rps ok | "
+          f"p50 {report['p50_ms']:7.1f} ms  p95 {report['p95_ms']:7.1f} ms  "
+          f"p99 {report['p99_ms']:7.1f} ms | errors {report['error_rate']:6.1%} ({statuses})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a realistic answer mix against the web app")
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--rate', type=float, default=20.0, help="requests per second")
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds per run")
+    parser.add_argument('--concurrency', type=int, default=8, help="client connections")
+    parser.add_argument('--prior', type=float, default=1.0,
+                        help="weight of each questionnaire path on top of its history count")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--find-saturation', action='store_true')
+    parser.add_argument('--max-rate', type=float, default=2000.0)
+    parser.add_argument('--slo-ms', type=float, default=250.0, help="p99 latency objective")
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--record', action='store_true',
+                        help="have the target save each diagnosis to its history")
+    args = parser.parse_args()
+
+    mix = learn_mix(prior=args.prior)
+    print(f"\n🎯 Answer mix: {len(mix)} answer sets, "
+          f"top {json.dumps(mix[0][0])} ({mix[0][1]:g})")
+    answer_mix = AnswerMix(mix, args.seed)
+
+    if not args.find_saturation:
+        print(f"🚀 {args.rate:g} rps for {args.duration:g}s over {args.concurrency} connections\n")
+        print_report(run_load(args.url, answer_mix, args.rate, args.duration, args.concurrency,
+                              record=args.record))
+        return
+
+    print(f"🔎 Searching for saturation: p99 <= {args.slo_ms:g} ms, "
+          f"errors <= {args.max_error_rate:.1%}, {args.concurrency} connections\n")
+    best, failing, _ = find_saturation(args.url, answer_mix, args.concurrency, args.duration,
+                              args.rate, args.max_rate, args.slo_ms, args.max_error_rate,
+                              report=print_report, record=args.record)
+    if failing is None:
+        print(f"\n✅ No saturation up to {args.max_rate:g} rps")
+    elif best is None:
+        print(f"\n❌ Even {args.rate:g} rps misses the objective")
+    else:
+        print(f"\n✅ Saturation point: about {best['offered_rps']:.1f} rps "
+              f"(p99 {best['p99_ms']:.1f} ms)")
+
+
+if __name__ == '__main__':
+    main()
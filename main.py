@@ -4,32 +4,70 @@ Computer Problem Diagnosis Expert System - Entry Point
 """
 
 from diagnosis_interface import DiagnosisInterface
+from history_sink import sink_from_environment
+from kb_registry import DEFAULT_KNOWLEDGE_BASE, UnknownKnowledgeBase
+import argparse
+import signal
 import sys
 
 
-def main():
-    """Main entry point"""
+def _terminate(signum, frame):
+    """Turn SIGTERM into an exit that still runs main()'s cleanup"""
+    raise SystemExit(128 + signum)
+
+
+def main(knowledge_base=None, kiosk=False, history_batch=1):
+    """Main entry point
+
+    Runs diagnoses in a loop on one interface, so the engine stays warm.
+    In kiosk mode it goes straight on to the next customer until stopped
+    with Ctrl+C. SIGTERM stops it the same way, so buffered diagnoses are
+    still written to the history.
+    """
+    signal.signal(signal.SIGTERM, _terminate)
+    interface = None
     try:
-        interface = DiagnosisInterface()
-        interface.run_diagnosis()
-        
-        print("\n" + "="*75)
-        choice = input("\n🔄 Would you like to diagnose another problem? (y/n): ").strip().lower()
+        interface = DiagnosisInterface(knowledge_base, history_batch)
+        while True:
+            interface.run_diagnosis()
+            
+            print("\n" + "="*75)
+            if kiosk:
+                input("\n⏎  Press Enter when you are done reading...")
+                continue
+            choice = input("\n🔄 Would you like to diagnose another problem? (y/n): ").strip().lower()
+            if choice != 'y':
+                break
         
-        if choice == 'y':
-            main()
-        else:
-            print("\n👋 Thank you for using the Computer Diagnosis Expert System!")
-            print("📁 Your diagnosis history is saved in diagnosis_history.json")
-            print("\n" + "="*75 + "\n")
+        print("\n👋 Thank you for using the Computer Diagnosis Expert System!")
+        print("📁 Your diagnosis history is saved in diagnosis_history.json")
     
-    except KeyboardInterrupt:
+    except (KeyboardInterrupt, EOFError):
         print("\n\n👋 Diagnosis cancelled. Goodbye!")
-        sys.exit(0)
+    except UnknownKnowledgeBase as e:
+        print(f"\n❌ {e}")
+        sys.exit(2)
     except Exception as e:
         print(f"\n❌ An error occurred: {e}")
         print("Please try again or contact support.")
+    finally:
+        if interface is not None:
+            interface.flush_history()
+            interface.print_session_stats()
+            print("\n" + "="*75 + "\n")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Computer Problem Diagnosis Expert System")
+    parser.add_argument('--knowledge-base', default=DEFAULT_KNOWLEDGE_BASE,
+                        help="rule set to diagnose with (see kb_registry.py)")
+    parser.add_argument('--kiosk', action='store_true',
+                        help="start the next diagnosis without asking, until Ctrl+C")
+    parser.add_argument('--history-batch', type=int, default=None,
+                        help="diagnoses to buffer per history write (default 10 in kiosk mode, else 1)")
+    args = parser.parse_args()
+    history_batch = args.history_batch or (10 if args.kiosk else 1)
+
+    # Also send history to a central collector when one is configured
+    sink_from_environment()
+    main(args.knowledge_base, args.kiosk, history_batch)
\ No newline at end of file
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Memory Profile - Per-phase allocation tracking for sampled requests
+
+A profiled request runs with tracemalloc tracing from its first phase to
+its last. At each phase boundary a snapshot is compared with the one
+before it, giving the bytes and blocks the phase left allocated (size,
+count), its high-water mark (peak), and the source lines responsible.
+Totals per phase and the top allocation sites across every profiled
+request are shown on /debug/memory.
+
+Requests are profiled when they send "X-Memory-Profile: 1" or fall in
+the sampled share. tracemalloc traces the whole process, so only one
+request is profiled at a time; others that ask are skipped and counted.
+Requests that are not profiled get a do-nothing profile, but still run
+alongside a profiled one, and their allocations are charged to its
+phases: the numbers are valid only with a single request in flight, as
+in this module's benchmark.
+
+Budgets cap the bytes a phase may leave allocated. A phase over its
+budget is counted, and this module's benchmark exits non-zero when any
+phase ends up over budget on average.
+
+Configured by DIAGNOSIS_MEMORY_PROFILE (sampled share, 0 to 1; "0" means
+header only; unset disables profiling and the endpoint) and
+DIAGNOSIS_MEMORY_BUDGETS ("phase=bytes,...").
+
+Usage:
+    python memory_profile.py [--requests 200] [--budget diagnose=16384 ...]
+"""
+
+from collections import Counter, deque
+import argparse
+import os
+import random
+import threading
+import time
+import tracemalloc
+
+PROFILE_HEADER = 'X-Memory-Profile'
+
+SINGLE_REQUEST_NOTE = ("tracemalloc traces the whole process: allocations of concurrent "
+                       "requests are charged to the profiled one, so these numbers are "
+                       "valid only with a single request in flight")
+
+# Allocations made by the profiler itself are left out of every report
+_IGNORED = (tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__))
+
+class _NullProfile:
+    """Stands in for a request that is not profiled"""
+
+    __slots__ = ()
+
+    def phase(self, name):
+        pass
+
+    def finish(self):
+        pass
+
+
+NULL_PROFILE = _NullProfile()
+
+
+class Profile:
+    """One request's allocations, phase by phase"""
+
+    def __init__(self, profiler, owns_tracing):
+        self.profiler = profiler
+        self.owns_tracing = owns_tracing
+        self.phases = []
+        self.sites = Counter()
+        self.blocks = Counter()
+        tracemalloc.reset_peak()
+        self._snapshot = self._take()
+        self._mark = time.perf_counter()
+
+    @staticmethod
+    def _take():
+        return tracemalloc.take_snapshot().filter_traces(_IGNORED)
+
+    def phase(self, name):
+        """Close the phase that ends now"""
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = self._take()
+        size = count = 0
+        for stat in snapshot.compare_to(self._snapshot, 'lineno'):
+            size += stat.size_diff
+            count += stat.count_diff
+            if stat.size_diff > 0:
+                frame = stat.traceback[0]
+                site = f"{os.path.basename(frame.filename)}:{frame.lineno}"
+                self.sites[site] += stat.size_diff
+                self.blocks[site] += stat.count_diff
+        now = time.perf_counter()
+        self.phases.append({
+            'phase': name,
+            'size': size,
+            'count': count,
+            'peak': peak,
+            'ms': round((now - self._mark) * 1000, 3)
+        })
+        tracemalloc.reset_peak()
+        # The phase's own snapshot is not charged to the next one
+        self._snapshot = self._take()
+        self._mark = time.perf_counter()
+
+    def finish(self):
+        """Stop tracing and hand the results to the profiler"""
+        if self.owns_tracing:
+            tracemalloc.stop()
+        self.profiler._record(self)
+
+    def header(self):
+        """Compact per-phase summary for the response header"""
+        return ', '.join(f"{p['phase']}={p['size']}B/{p['count']}" for p in self.phases)
+
+
+class MemoryProfiler:
+    """Samples requests for profiling and aggregates what they allocate"""
+
+    def __init__(self, sample_rate=0.0, budgets=None, frames=1, recent=20):
+        self.sample_rate = sample_rate
+        self.budgets = dict(budgets or {})
+        self.frames = frames
+        self._busy = threading.Lock()
+        self._lock = threading.Lock()
+        self._phases = {}
+        self._sites = Counter()
+        self._blocks = Counter()
+        self._recent = deque(maxlen=recent)
+        self._counts = dict.fromkeys(('profiled', 'skipped_busy'), 0)
+
+    def start(self, requested=False):
+        """A profile for this request, or a do-nothing one"""
+        if not requested and not (self.sample_rate and random.random() < self.sample_rate):
+            return NULL_PROFILE
+        if not self._busy.acquire(blocking=False):
+            with self._lock:
+                self._counts['skipped_busy'] += 1
+            return NULL_PROFILE
+        try:
+            owns_tracing = not tracemalloc.is_tracing()
+            if owns_tracing:
+                tracemalloc.start(self.frames)
+            profile = Profile(self, owns_tracing)
+        except BaseException:
+            self._busy.release()
+            raise
+        return profile
+
+    def _record(self, profile):
+        try:
+            with self._lock:
+                self._counts['profiled'] += 1
+                for phase in profile.phases:
+                    totals = self._phases.setdefault(phase['phase'], dict.fromkeys(
+                        ('samples', 'size', 'count', 'max_peak', 'over_budget'), 0))
+                    totals['samples'] += 1
+                    totals['size'] += phase['size']
+                    totals['count'] += phase['count']
+                    totals['max_peak'] = max(totals['max_peak'], phase['peak'])
+                    if phase['size'] > self.budgets.get(phase['phase'], float('inf')):
+                        totals['over_budget'] += 1
+                self._sites.update(profile.sites)
+                self._blocks.update(profile.blocks)
+                self._recent.append(profile.phases)
+        finally:
+            self._busy.release()
+
+    def over_budget(self):
+        """Phases whose average retained bytes exceed their budget"""
+        with self._lock:
+            return {name: totals['size'] / totals['samples']
+                    for name, totals in self._phases.items()
+                    if totals['size'] / totals['samples'] > self.budgets.get(name, float('inf'))}
+
+    def stats(self, top=20):
+        with self._lock:
+            phases = {name: dict(totals,
+                                 mean_size=round(totals['size'] / totals['samples'], 1),
+                                 mean_count=round(totals['count'] / totals['samples'], 2),
+                                 budget=self.budgets.get(name))
+                      for name, totals in self._phases.items()}
+            sites = [{'site': site, 'size': size, 'count': self._blocks[site]}
+                     for site, size in self._sites.most_common(top)]
+            stats = dict(self._counts, note=SINGLE_REQUEST_NOTE,
+                         sample_rate=self.sample_rate, phases=phases,
+                         top_sites=sites, recent=list(self._recent))
+        stats['over_budget'] = self.over_budget()
+        return stats
+
+
+def parse_budgets(spec):
+    """{phase: bytes} from "phase=bytes,phase=bytes" """
+    budgets = {}
+    for entry in spec.split(','):
+        if '=' in entry:
+            name, limit = entry.split('=', 1)
+            budgets[name.strip()] = int(limit)
+    return budgets
+
+
+def profiler_from_environment():
+    """The profiler configured by DIAGNOSIS_MEMORY_PROFILE, or None"""
+    rate = os.environ.get('DIAGNOSIS_MEMORY_PROFILE')
+    if rate is None:
+        return None
+    return MemoryProfiler(
+        sample_rate=float(rate or 0),
+        budgets=parse_budgets(os.environ.get('DIAGNOSIS_MEMORY_BUDGETS', ''))
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile /diagnose allocations against budgets")
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--budget', action='append', default=[], metavar='PHASE=BYTES',
+                        help="allowed bytes a phase may leave allocated, on average")
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    # Profile every request, and keep the benchmark's diagnoses out of the real history
+    import tempfile
+    os.environ['DIAGNOSIS_MEMORY_PROFILE'] = '1'
+    os.environ.setdefault('DIAGNOSIS_EVENT_LOG', '')
+    import knowledge_base
+    knowledge_base.HISTORY_FILE = os.path.join(tempfile.mkdtemp(), 'history.json')
+    import web_app
+    from load_test import learn_mix, AnswerMix
+
+    profiler = web_app.memory_profiler
+    profiler.budgets.update(parse_budgets(','.join(args.budget)))
+    mix = AnswerMix(learn_mix(), args.seed)
+    client = web_app.app.test_client()
+    for _ in range(args.requests):
+        client.post('/diagnose', json={'answers': mix.sample()})
+
+    stats = profiler.stats(args.top)
+    print(f"\n🧠 {stats['profiled']} profiled requests\n")
+    for name, phase in stats['phases'].items():
+        budget = f"budget {phase['budget']:>8,}" if phase['budget'] is not None else ""
+        print(f"   {name:>18}: {phase['mean_size']:>10,.1f} B retained  {phase['mean_count']:>7.2f} blocks  "
+              f"peak {phase['max_peak']:>9,} B  {budget}")
+    print("\n   Top allocation sites:")
+    for site in stats['top_sites']:
+        print(f"   {site['size']:>10,} B  {site['count']:>6} blocks  {site['site']}")
+
+    over = stats['over_budget']
+    if over:
+        for name, size in over.items():
+            print(f"\n❌ {name}: {size:,.0f} B retained on average, budget {profiler.budgets[name]:,} B")
+        raise SystemExit(1)
+    print("\n✅ All phases within budget")
+
+
+if __name__ == '__main__':
+    main()
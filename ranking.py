@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Ranking - Score every rule against a partial answer set at once
+
+The compiled rules become a rule-by-condition matrix: one row per rule
+branch, one column per (key, value) pair. An answer set selects a handful
+of columns, so summing those columns scores every rule in one pass. A
+second matrix over the condition keys finds the rules an answer
+contradicts (same key, another value); those are dropped, as are rules
+no answer supports. The top k of the rest come back with their match
+ratio and the answers they are still missing. Equal scores are ordered by
+rule name, so both backends rank alike.
+
+NumPy is used when it is installed; otherwise rows are kept as integer
+bitsets and scored with popcounts.
+
+Usage:
+    python ranking.py --bench 5000    # time ranking over a synthetic KB
+"""
+
+from knowledge_base import ComputerDiagnosisSystem, rule_results
+from rule_index import compile_rules, INITIAL_FACTS, FALLBACK_RULE, CompiledRule
+import argparse
+import heapq
+import random
+import time
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - numpy is optional
+    numpy = None
+
+
+class RuleRanker:
+    """Partial-match scoring of every rule branch"""
+
+    def __init__(self, rules=None, results=None, use_numpy=None):
+        if rules is None:
+            rules = compile_rules(ComputerDiagnosisSystem)
+            results = rule_results(ComputerDiagnosisSystem)
+        self.results = results or {}
+        self.use_numpy = numpy is not None if use_numpy is None else use_numpy
+
+        # One row per branch; the engine's own initial facts are always true
+        self.rows = []
+        conditions = []
+        for rule in rules:
+            if rule.name == FALLBACK_RULE:
+                continue
+            for branch in rule.branches:
+                self.rows.append(rule.name)
+                conditions.append(tuple(dict.fromkeys(p for p in branch if p not in INITIAL_FACTS)))
+
+        self.columns = sorted({pair for branch in conditions for pair in branch})
+        self.column_of = {pair: i for i, pair in enumerate(self.columns)}
+        self.keys = sorted({key for key, _ in self.columns})
+        self.key_column_of = {key: i for i, key in enumerate(self.keys)}
+        self.conditions = conditions
+        # Position of each row's rule name in name order, for tie-breaking
+        name_rank = {name: i for i, name in enumerate(sorted(set(self.rows)))}
+        self.name_order = [name_rank[name] for name in self.rows]
+
+        if self.use_numpy:
+            matrix = numpy.zeros((len(self.rows), len(self.columns)), dtype=numpy.uint8)
+            key_matrix = numpy.zeros((len(self.rows), len(self.keys)), dtype=numpy.uint8)
+            for row, branch in enumerate(conditions):
+                matrix[row, [self.column_of[p] for p in branch]] = 1
+                key_matrix[row, [self.key_column_of[key] for key, _ in branch]] = 1
+            # Column-major so selecting the answered columns is contiguous
+            self.matrix = numpy.asfortranarray(matrix)
+            self.key_matrix = numpy.asfortranarray(key_matrix)
+            self.sizes = matrix.sum(axis=1).astype(numpy.float64)
+            self.name_order = numpy.array(self.name_order)
+        else:
+            self.masks = [sum(1 << self.column_of[p] for p in branch) for branch in conditions]
+            self.key_masks = [sum(1 << self.key_column_of[key] for key in {key for key, _ in branch})
+                              for branch in conditions]
+            self.sizes = [len(branch) for branch in conditions]
+
+    def _scores(self, matrix, answered):
+        """Per-row counts of the given columns of ``matrix`` (or its bitsets)"""
+        if self.use_numpy:
+            if not answered:
+                return numpy.zeros(len(self.rows))
+            return matrix[:, answered].sum(axis=1, dtype=numpy.float64)
+        mask = sum(1 << c for c in answered)
+        return [(row_mask & mask).bit_count() for row_mask in matrix]
+
+    def _top(self, scores, rows, m):
+        """The ``m`` best of ``rows``, best first, plus any tied with the last
+
+        Equal scores are ordered by rule name.
+        """
+        if self.use_numpy:
+            if m < len(rows):
+                cutoff = numpy.partition(scores[rows], len(rows) - m)[len(rows) - m]
+                rows = rows[scores[rows] >= cutoff]
+            return rows[numpy.lexsort((rows, self.name_order[rows], -scores[rows]))].tolist()
+        return heapq.nsmallest(m, rows, key=lambda row: (-scores[row], self.name_order[row], row))
+
+    def rank(self, answers, k=5):
+        """Return up to ``k`` best-matching rules for ``answers``"""
+        answered = [self.column_of[pair] for pair in answers.items()
+                    if pair in self.column_of]
+        answered_keys = [self.key_column_of[key] for key in answers
+                         if key in self.key_column_of]
+        if self.use_numpy:
+            matched = self._scores(self.matrix, answered)
+            key_hits = self._scores(self.key_matrix, answered_keys)
+            # Rows an answer supports and none contradicts
+            rows = numpy.flatnonzero((matched > 0) & (key_hits == matched))
+            # Match ratio first; among equal ratios, the rule with more matches
+            ratios = matched / self.sizes
+            scores = ratios + matched * 1e-6
+        else:
+            matched = self._scores(self.masks, answered)
+            key_hits = self._scores(self.key_masks, answered_keys)
+            rows = [row for row, (m, h) in enumerate(zip(matched, key_hits)) if m and h == m]
+            ratios = [m / s for m, s in zip(matched, self.sizes)]
+            scores = [r + m * 1e-6 for r, m in zip(ratios, matched)]
+
+        # A rule with several branches is reported once, by its best branch;
+        # widen the candidate set if duplicates leave fewer than k rules
+        m = min(len(rows), 4 * k)
+        while True:
+            ranked = []
+            seen = set()
+            for row in self._top(scores, rows, m):
+                name = self.rows[row]
+                if name in seen:
+                    continue
+                seen.add(name)
+                ranked.append(self._hypothesis(row, float(ratios[row]), answers))
+                if len(ranked) == k:
+                    return ranked
+            if m == len(rows):
+                return ranked
+            m = len(rows)
+
+    def _hypothesis(self, row, ratio, answers):
+        # Contradicted rows are never ranked, so every unmet condition is unanswered
+        missing = [{key: value} for key, value in self.conditions[row]
+                   if answers.get(key) != value]
+        hypothesis = {
+            'rule': self.rows[row],
+            'match_ratio': round(ratio, 3),
+            'missing': missing
+        }
+        result = self.results.get(self.rows[row])
+        if result is not None:
+            hypothesis['diagnosis'] = result.diagnosis
+            hypothesis['severity'] = result.severity
+        return hypothesis
+
+
+def synthetic_rules(count, keys=200, values=8, seed=0):
+    """A made-up knowledge base of ``count`` rules for benchmarking"""
+    rng = random.Random(seed)
+    rules = []
+    for i in range(count):
+        size = rng.randint(2, 6)
+        branch = tuple((f"k{rng.randrange(keys)}", f"v{rng.randrange(values)}") for _ in range(size))
+        rules.append(CompiledRule(f"rule_{i}", 0, (branch,)))
+    return rules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark partial-match ranking")
+    parser.add_argument('--bench', type=int, default=5000, help="number of synthetic rules")
+    parser.add_argument('--queries', type=int, default=1000)
+    args = parser.parse_args()
+
+    rules = synthetic_rules(args.bench)
+    rng = random.Random(1)
+    queries = [dict((f"k{rng.randrange(200)}", f"v{rng.randrange(8)}") for _ in range(8))
+               for _ in range(args.queries)]
+
+    for use_numpy in ([True, False] if numpy is not None else [False]):
+        ranker = RuleRanker(rules, use_numpy=use_numpy)
+        start = time.perf_counter()
+        for answers in queries:
+            ranker.rank(answers)
+        per_query = (time.perf_counter() - start) / len(queries)
+        backend = 'numpy' if use_numpy else 'bitset'
+        print(f"   {backend:>6}: {len(rules)} rules, {per_query * 1e6:,.0f} µs per ranking")
+
+
+if __name__ == '__main__':
+    main()
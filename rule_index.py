@@ -0,0 +1,158 @@
+"""
+Rule Index - Compiled evaluation of the knowledge base without experta
+
+Every rule in ComputerDiagnosisSystem is a conjunction of single-key facts,
+optionally with an OR group. Compiling the rules into (key, value) pairs lets
+an answer set be diagnosed with a handful of dictionary lookups.
+
+Conflict resolution follows experta's DepthStrategy: each matching rule is
+keyed by its salience and the ids of the facts it matched (newest first),
+rules fire from the highest key down, and the last rule to fire sets the
+diagnosis. The catch-all rule only applies when nothing else matched.
+"""
+
+from knowledge_base import ComputerDiagnosisSystem, rule_results
+from experta import Fact, OR
+from itertools import product
+
+FALLBACK_RULE = 'general_troubleshooting'
+
+# InitialFact is declared as fact 0, Fact(action='diagnose') as fact 1
+INITIAL_FACTS = (('action', 'diagnose'),)
+FIRST_ANSWER_ID = 2
+
+
+class CompiledRule:
+    """One rule flattened into alternative sets of required facts"""
+
+    __slots__ = ('name', 'salience', 'branches')
+
+    def __init__(self, name, salience, branches):
+        self.name = name
+        self.salience = salience
+        self.branches = branches
+
+    def __repr__(self):
+        return f"CompiledRule({self.name!r}, {self.branches!r})"
+
+
+def _pattern_pairs(pattern):
+    """Return the (key, value) pairs a pattern can be satisfied by"""
+    if isinstance(pattern, OR):
+        return [pair for alternative in pattern for pair in _pattern_pairs(alternative)]
+    if isinstance(pattern, Fact) and len(pattern) == 1:
+        return list(pattern.items())
+    raise ValueError(f"Unsupported rule condition: {pattern!r}")
+
+
+def compile_rules(engine_class=ComputerDiagnosisSystem):
+    """Flatten every rule of ``engine_class`` into CompiledRule objects"""
+    compiled = []
+    for rule in engine_class().get_rules():
+        choices = [_pattern_pairs(pattern) for pattern in rule]
+        branches = tuple(tuple(branch) for branch in product(*choices))
+        compiled.append(CompiledRule(rule.__name__, rule.salience, branches))
+    return sorted(compiled, key=lambda r: r.name)
+
+
+class RuleIndex:
+    """Inverted index from (key, value) pairs to the rules that need them"""
+
+    def __init__(self, engine_class=ComputerDiagnosisSystem):
+        self.engine_class = engine_class
+        self.rules = compile_rules(engine_class)
+        self.results = rule_results(engine_class)
+        self.fallback = next(r for r in self.rules if r.name == FALLBACK_RULE)
+        self.by_pair = {}
+        for rule in self.rules:
+            if rule is self.fallback:
+                continue
+            for branch in rule.branches:
+                for pair in branch:
+                    if pair not in INITIAL_FACTS:
+                        self.by_pair.setdefault(pair, []).append((rule, branch))
+
+    def fact_ids(self, answers):
+        """Number the answers the way the engine's fact list would"""
+        ids = {pair: i + 1 for i, pair in enumerate(INITIAL_FACTS)}
+        next_id = FIRST_ANSWER_ID
+        for pair in answers.items():
+            if pair not in ids:
+                ids[pair] = next_id
+                next_id += 1
+        return ids
+
+    def match(self, answers):
+        """Return the name of the rule whose conclusion the engine keeps"""
+        ids = self.fact_ids(answers)
+        winner = None
+        seen = set()
+        for pair in ids:
+            for rule, branch in self.by_pair.get(pair, ()):
+                if (rule.name, branch) in seen:
+                    continue
+                seen.add((rule.name, branch))
+                if all(p in ids for p in branch):
+                    key = (rule.salience, sorted((ids[p] for p in branch), reverse=True))
+                    if winner is None or key < winner[0]:
+                        winner = (key, rule.name)
+        return winner[1] if winner else self.fallback.name
+
+    def diagnose(self, answers):
+        """Return the diagnosis result dict for ``answers``"""
+        return self.results[self.match(answers)]
+
+    def explain(self, answers):
+        """(result, trace) in the format of rule_trace.trace_diagnosis
+
+        Rules fire in agenda order, so the trace lists them that way; none
+        is actually run, so firings carry no timing.
+        """
+        ids = self.fact_ids(answers)
+        activations = []
+        seen = set()
+        for pair in ids:
+            for rule, branch in self.by_pair.get(pair, ()):
+                if (rule.name, branch) not in seen and all(p in ids for p in branch):
+                    seen.add((rule.name, branch))
+                    activations.append((rule, sorted((ids[p] for p in branch), reverse=True)))
+        activations.append((self.fallback, [ids[pair] for pair in INITIAL_FACTS]))
+        activations.sort(key=lambda activation: (activation[0].salience, activation[1]), reverse=True)
+
+        fired = [{'rule': rule.name, 'salience': rule.salience, 'facts': sorted(fact_ids), 'ms': None}
+                 for rule, fact_ids in activations]
+        winner = self.match(answers)
+        trace = {
+            'backend': 'rule_index',
+            'facts': [{'id': fact_id, 'fact': {key: value}} for (key, value), fact_id in ids.items()],
+            'activated': [{k: v for k, v in firing.items() if k != 'ms'} for firing in fired],
+            'fired': fired,
+            'winner': winner,
+            'fallback': winner == self.fallback.name
+        }
+        if trace['fallback']:
+            trace['near_misses'] = self.near_misses(answers)
+        return self.results[winner], trace
+
+    def near_misses(self, answers, k=3):
+        """The ``k`` rules closest to matching, with the answers they lack"""
+        answered = set(answers.items()) | set(INITIAL_FACTS)
+        candidates = []
+        for rule in self.rules:
+            if rule is self.fallback:
+                continue
+            for branch in rule.branches:
+                needed = [pair for pair in branch if pair not in INITIAL_FACTS]
+                matched = [pair for pair in needed if pair in answered]
+                if matched:
+                    missing = [pair for pair in needed if pair not in answered]
+                    candidates.append((len(missing), -len(matched), rule.name, matched, missing))
+        candidates.sort(key=lambda candidate: candidate[:3])
+        misses = []
+        for _, _, name, matched, missing in candidates:
+            if any(miss['rule'] == name for miss in misses):
+                continue
+            misses.append({'rule': name, 'matched': dict(matched), 'missing': dict(missing)})
+            if len(misses) == k:
+                break
+        return misses
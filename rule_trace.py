@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Rule Trace - Explain a diagnosis rule by rule
+
+trace_diagnosis() runs an engine with an instrumented copy of experta's
+run loop. The trace records the declared facts, every activation that
+reached the agenda, and every rule that fired, with the facts it matched
+and how long it took. It also names the rule whose conclusion was kept.
+When the catch-all rule wins, the trace lists the rules that came closest
+and the answers they were missing.
+
+RuleIndex.explain() gives the same trace without running the engine.
+Nothing changes for untraced diagnoses: they still call engine.run().
+Tracing adds a dict per activation and a perf_counter pair per fired
+rule; --runs measures the difference for a given answer set.
+
+Usage:
+    python rule_trace.py '{"power_status": "not_turning_on", "power_cable": "connected"}'
+    python rule_trace.py ANSWERS --backend rule_index
+    python rule_trace.py ANSWERS --runs 500    # cost of tracing vs a plain run
+"""
+
+from knowledge_base import rule_results
+from rule_index import FALLBACK_RULE, RuleIndex
+from engine_snapshot import EngineSnapshot, diagnose_with
+from experta import Fact
+import argparse
+import json
+import threading
+import time
+
+# Rule name -> the diagnosis it concludes, per engine class
+_results = {}
+_results_lock = threading.Lock()
+
+
+def _rule_results(engine_class):
+    with _results_lock:
+        results = _results.get(engine_class)
+        if results is None:
+            results = _results[engine_class] = rule_results(engine_class)
+        return results
+
+
+def _fact_ids(facts):
+    return sorted(fact['__factid__'] for fact in facts)
+
+
+def _activation(activation):
+    return {
+        'rule': activation.rule.__name__,
+        'salience': activation.rule.salience,
+        'facts': _fact_ids(activation.facts)
+    }
+
+
+def trace_diagnosis(engine, answers, rule_index=None):
+    """(result, trace) for ``answers`` on a freshly reset or restored engine
+
+    With a ``rule_index`` of the same rules, a fallback diagnosis also
+    lists the near misses.
+    """
+    start = time.perf_counter()
+    for key, value in answers.items():
+        engine.declare(Fact(**{key: value}))
+    declared = time.perf_counter()
+
+    # Declaring already matched most rules; later changes are picked up below
+    activated = [_activation(activation) for activation in reversed(engine.agenda.activations)]
+    fired = []
+    engine.running = True
+    while engine.running:
+        added, removed = engine.get_activations()
+        engine.strategy.update_agenda(engine.agenda, added, removed)
+        activated.extend(_activation(activation) for activation in added)
+
+        activation = engine.agenda.get_next()
+        if activation is None:
+            break
+        fire_start = time.perf_counter()
+        activation.rule(engine, **{k: v for k, v in activation.context.items()
+                                   if not k.startswith('__')})
+        fired.append(dict(_activation(activation),
+                          ms=round((time.perf_counter() - fire_start) * 1000, 4)))
+    engine.running = False
+    finished = time.perf_counter()
+
+    result = engine.diagnosis_result
+    results = _rule_results(type(engine))
+    winner = next((firing['rule'] for firing in reversed(fired)
+                   if results.get(firing['rule']) is result), None)
+    trace = {
+        'backend': 'experta',
+        'facts': [{'id': fact_id, 'fact': {k: v for k, v in fact.items() if not str(k).startswith('__')}}
+                  for fact_id, fact in engine.facts.items()],
+        'activated': activated,
+        'fired': fired,
+        'winner': winner,
+        'fallback': winner == FALLBACK_RULE,
+        'declare_ms': round((declared - start) * 1000, 4),
+        'run_ms': round((finished - declared) * 1000, 4)
+    }
+    if trace['fallback'] and rule_index is not None:
+        trace['near_misses'] = rule_index.near_misses(answers)
+    return result, trace
+
+
+def print_trace(result, trace):
+    facts = {fact['id']: fact['fact'] for fact in trace['facts']}
+
+    def describe(ids):
+        return ', '.join(f"f-{i} {json.dumps(facts[i])}" if i in facts else f"f-{i}" for i in ids)
+
+    print(f"\n🔎 {trace['backend']} trace")
+    print("\n   Facts:")
+    for fact_id, fact in facts.items():
+        print(f"   f-{fact_id}: {json.dumps(fact)}")
+    print(f"\n   Activated ({len(trace['activated'])}):")
+    for activation in trace['activated']:
+        print(f"   • {activation['rule']} (salience {activation['salience']}) <- {describe(activation['facts'])}")
+    print(f"\n   Fired ({len(trace['fired'])}):")
+    for order, firing in enumerate(trace['fired'], 1):
+        timing = f" {firing['ms']:.3f} ms" if firing.get('ms') is not None else ""
+        print(f"   {order}. {firing['rule']}{timing}")
+    print(f"\n   Winner: {trace['winner']}{' (fallback)' if trace['fallback'] else ''}")
+    for miss in trace.get('near_misses', []):
+        print(f"   ✗ {miss['rule']}: matched {json.dumps(miss['matched'])}, "
+              f"missing {json.dumps(miss['missing'])}")
+    print(f"\n✅ {result.diagnosis} ({result.severity})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Explain which rules produced a diagnosis")
+    parser.add_argument('answers', help="answers as a JSON object")
+    parser.add_argument('--backend', choices=('experta', 'rule_index'), default='experta')
+    parser.add_argument('--runs', type=int, default=0,
+                        help="also time traced and plain runs this many times")
+    args = parser.parse_args()
+
+    answers = json.loads(args.answers)
+    rule_index = RuleIndex()
+    snapshot = EngineSnapshot(rule_index.engine_class())
+    if args.backend == 'experta':
+        result, trace = trace_diagnosis(snapshot.restore(), answers, rule_index)
+    else:
+        result, trace = rule_index.explain(answers)
+    print_trace(result, trace)
+
+    if args.runs:
+        for label, run in (('plain run', lambda: diagnose_with(snapshot.restore(), answers)),
+                           ('traced run', lambda: trace_diagnosis(snapshot.restore(), answers, rule_index)),
+                           ('rule index', lambda: rule_index.diagnose(answers)),
+                           ('rule index explain', lambda: rule_index.explain(answers))):
+            start = time.perf_counter()
+            for _ in range(args.runs):
+                run()
+            print(f"   {label:>18}: {(time.perf_counter() - start) / args.runs * 1000:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
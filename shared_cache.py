@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Shared Cache - Diagnosis results shared by every process on a host
+
+A fixed-size memory-mapped file holds a hash table from answer sets to
+results. Every web worker and batch process maps the same file, so one
+process's engine run serves all the others, and the cache stays warm when
+workers are recycled.
+
+Each slot holds a 16-byte digest of the answer set (order included, as in
+answer_key) and the index of the rule whose result it is. Reads take no
+lock: a slot carries a sequence number that is odd while it is being
+written, and a read whose number changed underneath it counts as a miss.
+Writes are serialised with an exclusive lock on the file. A full probe
+window overwrites its first slot, so the file never grows.
+
+The header records the knowledge base version. A process whose rules
+differ from the file's clears it when it opens the cache. Until then,
+processes with the other version neither read nor write it. Readers check
+the version after reading a slot, so a result from another rule set is
+never returned.
+
+Unix only; set DIAGNOSIS_RESULT_CACHE_DIR to enable it.
+
+Usage:
+    python shared_cache.py --dir /dev/shm/diagnosis [--warm] [--clear]
+"""
+
+from knowledge_base import ComputerDiagnosisSystem, answer_key, knowledge_base_version, rule_results
+from contextlib import contextmanager
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - no shared cache on Windows
+    fcntl = None
+
+MAGIC = b'DXRC'
+LAYOUT = 1
+
+# magic, layout, slot count, knowledge base version
+HEADER = struct.Struct('<4sII16s')
+HEADER_SIZE = 64
+VERSION_OFFSET = 12
+
+# sequence number, answer digest, rule index + 1 (0 = empty)
+SLOT = struct.Struct('<I16sH10x')
+SEQUENCE = struct.Struct('<I')
+
+# Slots examined per lookup before giving up (or, for a write, evicting)
+MAX_PROBE = 8
+
+
+def answer_digest(answers):
+    """16-byte digest identifying an answer set, order included"""
+    encoded = json.dumps(answer_key(answers), separators=(',', ':'), default=str)
+    return hashlib.blake2b(encoded.encode('utf-8'), digest_size=16).digest()
+
+
+class SharedResultCache:
+    """Answer set -> result table in a memory-mapped file"""
+
+    def __init__(self, path, engine_class=ComputerDiagnosisSystem, slots=65536):
+        if fcntl is None:
+            raise OSError("the shared result cache needs fcntl (Unix)")
+        self.path = path
+        results = rule_results(engine_class)
+        self.rule_names = sorted(results)
+        self.results = [results[name] for name in self.rule_names]
+        self.result_index = {id(result): i for i, result in enumerate(self.results)}
+        self.version = knowledge_base_version(engine_class).encode('ascii')[:16].ljust(16, b'\0')
+
+        # A file object, so the descriptor is closed when the cache is dropped
+        self._file = os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), 'r+b')
+        self._fd = self._file.fileno()
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(('hits', 'misses', 'torn_reads', 'stores', 'evictions'), 0)
+        with self._exclusive():
+            self.slots = self._initialise(slots)
+        self._map = mmap.mmap(self._fd, HEADER_SIZE + self.slots * SLOT.size)
+
+    @contextmanager
+    def _exclusive(self):
+        """Hold the write lock against other threads and other processes"""
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _initialise(self, slots):
+        """Create or adopt the file; clear it if it holds another rule set"""
+        size = os.fstat(self._fd).st_size
+        header = os.pread(self._fd, HEADER.size, 0) if size >= HEADER_SIZE else b''
+        if len(header) == HEADER.size:
+            magic, layout, existing_slots, version = HEADER.unpack(header)
+            # Never resize a file other processes may have mapped
+            if magic == MAGIC and layout == LAYOUT and size == HEADER_SIZE + existing_slots * SLOT.size:
+                if version != self.version:
+                    self._clear_slots(existing_slots)
+                    os.pwrite(self._fd, self.version, VERSION_OFFSET)
+                return existing_slots
+        os.ftruncate(self._fd, HEADER_SIZE + slots * SLOT.size)
+        self._clear_slots(slots)
+        os.pwrite(self._fd, HEADER.pack(MAGIC, LAYOUT, slots, self.version), 0)
+        return slots
+
+    def _clear_slots(self, slots):
+        # The old version stays in the header until every slot is empty
+        chunk = bytes(SLOT.size * 4096)
+        for start in range(0, slots, 4096):
+            count = min(4096, slots - start)
+            os.pwrite(self._fd, chunk[:count * SLOT.size], HEADER_SIZE + start * SLOT.size)
+
+    def _current(self):
+        return self._map[VERSION_OFFSET:VERSION_OFFSET + 16] == self.version
+
+    def _offsets(self, digest):
+        start = int.from_bytes(digest[:8], 'little') % self.slots
+        for probe in range(MAX_PROBE):
+            yield HEADER_SIZE + ((start + probe) % self.slots) * SLOT.size
+
+    def lookup(self, answers):
+        """The cached result for ``answers``, or None"""
+        digest = answer_digest(answers)
+        found = None
+        torn = False
+        for offset in self._offsets(digest):
+            sequence, slot_digest, value = SLOT.unpack_from(self._map, offset)
+            if sequence & 1:
+                continue
+            if slot_digest == digest and value:
+                if SEQUENCE.unpack_from(self._map, offset)[0] == sequence:
+                    found = value - 1
+                else:
+                    torn = True
+                break
+            if not value:
+                break
+        # Checked last: a slot written under another version is never used
+        if found is not None and not self._current():
+            found = None
+        # Unlocked, so the read path never waits; counts may drift under threads
+        self._counts['hits' if found is not None else 'misses'] += 1
+        self._counts['torn_reads'] += torn
+        return None if found is None else self.results[found]
+
+    def store(self, answers, result):
+        """Share ``result`` for ``answers`` with every process"""
+        index = self.result_index.get(id(result))
+        if index is None:
+            # Only the knowledge base's own interned results can be shared
+            return False
+        digest = answer_digest(answers)
+        with self._exclusive():
+            if not self._current():
+                return False
+            victim = None
+            for offset in self._offsets(digest):
+                _, slot_digest, value = SLOT.unpack_from(self._map, offset)
+                if not value or slot_digest == digest:
+                    victim = offset
+                    break
+            evicted = victim is None
+            if evicted:
+                victim = next(self._offsets(digest))
+            sequence = SEQUENCE.unpack_from(self._map, victim)[0]
+            SEQUENCE.pack_into(self._map, victim, sequence + 1)
+            SLOT.pack_into(self._map, victim, sequence + 1, digest, index + 1)
+            SEQUENCE.pack_into(self._map, victim, sequence + 2)
+            self._counts['stores'] += 1
+            self._counts['evictions'] += evicted
+        return True
+
+    def clear(self):
+        """Empty every slot"""
+        with self._exclusive():
+            self._clear_slots(self.slots)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def stats(self):
+        stats = dict(self._counts)
+        stats.update(path=self.path, slots=self.slots,
+                     size_kb=(HEADER_SIZE + self.slots * SLOT.size) // 1024,
+                     version=self.version.decode('ascii').rstrip('\0'), current=self._current())
+        return stats
+
+    def occupancy(self):
+        """Share of slots in use (scans the whole table)"""
+        used = sum(1 for i in range(self.slots)
+                   if SLOT.unpack_from(self._map, HEADER_SIZE + i * SLOT.size)[2])
+        return used / self.slots
+
+
+def cache_path(cache_dir, knowledge_base):
+    return os.path.join(cache_dir, f'{knowledge_base}.results')
+
+
+def main():
+    from kb_registry import registry_from_environment
+    from answer_table import enumerate_cli_paths, enumerate_web_paths
+
+    parser = argparse.ArgumentParser(description="Inspect, warm or clear the shared result cache")
+    parser.add_argument('--dir', default=os.environ.get('DIAGNOSIS_RESULT_CACHE_DIR'), required=False)
+    parser.add_argument('--knowledge-base', default=None)
+    parser.add_argument('--warm', action='store_true', help="diagnose every questionnaire path into the cache")
+    parser.add_argument('--clear', action='store_true')
+    args = parser.parse_args()
+    if not args.dir:
+        parser.error("--dir or DIAGNOSIS_RESULT_CACHE_DIR is required")
+
+    os.environ['DIAGNOSIS_RESULT_CACHE_DIR'] = args.dir
+    os.makedirs(args.dir, exist_ok=True)
+    kb = registry_from_environment().get(args.knowledge_base)
+    cache = kb.cache
+    if args.clear:
+        cache.clear()
+        print(f"🧹 Cleared {cache.path}")
+    if args.warm:
+        paths = list(enumerate_cli_paths()) + list(enumerate_web_paths())
+        for answers in paths:
+            kb.diagnose(answers)
+        print(f"🔥 Diagnosed {len(paths)} questionnaire paths into {cache.path}")
+    stats = cache.stats()
+    print(f"\n📦 {stats['path']}: {stats['slots']:,} slots ({stats['size_kb']:,} KB), "
+          f"{cache.occupancy():.1%} used, version {stats['version']}"
+          f"{'' if stats['current'] else ' (other rule set)'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Single Flight - Coalesce identical concurrent diagnoses
+
+When many requests with the same answers arrive together, the first one
+(the leader) runs the engine and the rest wait for its result instead of
+each starting their own run. Nothing is cached: once the leader finishes,
+the next request with those answers starts a new flight.
+"""
+
+import threading
+
+
+class _Flight:
+    __slots__ = ('done', 'result', 'error', 'followers')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """Run ``fn`` once per key among concurrent callers"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._executions = 0
+        self._coalesced = 0
+
+    def do(self, key, fn):
+        """Return ``fn()``, sharing one call with concurrent callers of ``key``"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                self._executions += 1
+                leader = True
+            else:
+                flight.followers += 1
+                self._coalesced += 1
+                leader = False
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def stats(self):
+        """How much engine work coalescing saved"""
+        with self._lock:
+            calls = self._executions + self._coalesced
+            return {
+                'calls': calls,
+                'executions': self._executions,
+                'coalesced': self._coalesced,
+                'coalescing_ratio': self._coalesced / calls if calls else 0.0,
+                'in_flight': len(self._flights)
+            }
@@ -0,0 +1,90 @@
+const SEARCH_DELAY_MS = 150;
+
+const severityLabels = {
+    'critical': '🔴 CRITICAL',
+    'high': '🟠 HIGH',
+    'medium': '🟡 MEDIUM',
+    'low': '🟢 LOW'
+};
+
+let searchTimer = null;
+let searchSequence = 0;
+
+function renderSearchResult(item) {
+    const card = document.createElement('div');
+    card.className = 'history-item';
+
+    const header = document.createElement('div');
+    header.className = 'history-header';
+    const timestamp = document.createElement('div');
+    timestamp.className = 'timestamp';
+    timestamp.textContent = '🕒 ' + (item.timestamp || '').replace('T', ' ').slice(0, 19)
+        + (item.count > 1 ? ' · ×' + item.count : '');
+    const badge = document.createElement('div');
+    badge.className = 'severity-badge severity-' + item.severity;
+    badge.textContent = severityLabels[item.severity] || severityLabels['low'];
+    header.appendChild(timestamp);
+    header.appendChild(badge);
+
+    const title = document.createElement('div');
+    title.className = 'diagnosis-title';
+    title.textContent = '🔍 ' + item.diagnosis;
+
+    const solution = document.createElement('div');
+    solution.className = 'solution-preview';
+    const label = document.createElement('strong');
+    label.textContent = '💡 Solution:';
+    solution.appendChild(label);
+    solution.appendChild(document.createElement('br'));
+    solution.appendChild(document.createTextNode(item.solution));
+
+    card.appendChild(header);
+    card.appendChild(title);
+    card.appendChild(solution);
+    return card;
+}
+
+async function searchHistory(query) {
+    const container = document.getElementById('searchResults');
+    const historyList = document.getElementById('historyList');
+
+    if (!query.trim()) {
+        container.classList.remove('active');
+        historyList.style.display = '';
+        return;
+    }
+
+    // Only the latest keystroke's results are shown
+    const sequence = ++searchSequence;
+    const params = new URLSearchParams({ q: query, k: 50, prefix: '1' });
+    let data;
+    try {
+        const response = await fetch('/history/search?' + params.toString());
+        data = await response.json();
+    } catch (error) {
+        return;
+    }
+    if (sequence !== searchSequence || !data.success) {
+        return;
+    }
+
+    container.innerHTML = '';
+    const summary = document.createElement('p');
+    summary.className = 'search-summary';
+    summary.textContent = data.results.length
+        ? data.results.length + ' best matches for "' + query + '"'
+        : 'No diagnoses match "' + query + '"';
+    container.appendChild(summary);
+    data.results.forEach(item => container.appendChild(renderSearchResult(item)));
+
+    container.classList.add('active');
+    historyList.style.display = 'none';
+}
+
+const searchInput = document.getElementById('searchInput');
+if (searchInput) {
+    searchInput.addEventListener('input', () => {
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(() => searchHistory(searchInput.value), SEARCH_DELAY_MS);
+    });
+}
@@ -0,0 +1,329 @@
+let currentCategory = '';
+let currentQuestionIndex = 0;
+let userAnswers = {};
+let questions = [];
+
+function startDiagnosis() {
+    document.getElementById('welcomeSection').style.display = 'none';
+    document.getElementById('progressSection').style.display = 'block';
+    document.getElementById('categorySection').classList.add('active');
+    updateProgress();
+}
+
+function selectCategory(category) {
+    currentCategory = category;
+    questions = questionFlows[category] || [];
+    currentQuestionIndex = 0;
+    userAnswers = {};
+
+    document.getElementById('categorySection').classList.remove('active');
+    showNextQuestion();
+}
+
+function showNextQuestion() {
+    if (currentQuestionIndex >= questions.length) {
+        submitDiagnosis();
+        return;
+    }
+
+    const question = questions[currentQuestionIndex];
+
+    // Check if question has condition
+    if (question.condition) {
+        let conditionMet = true;
+        for (let key in question.condition) {
+            if (userAnswers[key] !== question.condition[key]) {
+                conditionMet = false;
+                break;
+            }
+        }
+
+        if (!conditionMet) {
+            currentQuestionIndex++;
+            showNextQuestion();
+            return;
+        }
+    }
+
+    // Handle hidden questions (auto-set values)
+    if (question.hidden) {
+        userAnswers[question.key] = question.value;
+        currentQuestionIndex++;
+        showNextQuestion();
+        return;
+    }
+
+    updateProgress();
+    displayQuestion(question);
+}
+
+function displayQuestion(question) {
+    const container = document.getElementById('dynamicQuestions');
+    container.innerHTML = '';
+
+    const questionDiv = document.createElement('div');
+    questionDiv.className = 'question';
+
+    const title = document.createElement('h3');
+    title.textContent = question.question;
+    questionDiv.appendChild(title);
+
+    const optionsDiv = document.createElement('div');
+    optionsDiv.className = 'options';
+
+    question.options.forEach(option => {
+        const optionDiv = document.createElement('div');
+        optionDiv.className = 'option';
+        optionDiv.textContent = option.text;
+        optionDiv.onclick = () => selectAnswer(question.key, option.value, option.next);
+        optionsDiv.appendChild(optionDiv);
+    });
+
+    questionDiv.appendChild(optionsDiv);
+
+    // Add navigation buttons
+    const navDiv = document.createElement('div');
+    navDiv.className = 'nav-buttons';
+
+    if (currentQuestionIndex > 0) {
+        const backBtn = document.createElement('button');
+        backBtn.className = 'btn btn-secondary';
+        backBtn.textContent = '← Back';
+        backBtn.onclick = goBack;
+        navDiv.appendChild(backBtn);
+    } else {
+        navDiv.appendChild(document.createElement('div'));
+    }
+
+    questionDiv.appendChild(navDiv);
+    container.appendChild(questionDiv);
+    container.classList.add('active');
+}
+
+function selectAnswer(key, value, next) {
+    userAnswers[key] = value;
+
+    if (next === 'end') {
+        submitDiagnosis();
+    } else {
+        currentQuestionIndex++;
+        showNextQuestion();
+    }
+}
+
+function goBack() {
+    if (currentQuestionIndex > 0) {
+        currentQuestionIndex--;
+
+        // Remove last answer
+        const lastQuestion = questions[currentQuestionIndex];
+        if (lastQuestion && !lastQuestion.hidden) {
+            delete userAnswers[lastQuestion.key];
+        }
+
+        showNextQuestion();
+    }
+}
+
+function updateProgress() {
+    const totalQuestions = questions.filter(q => !q.hidden).length;
+    const answeredQuestions = currentQuestionIndex;
+    const percentage = totalQuestions > 0 ? (answeredQuestions / totalQuestions) * 100 : 0;
+    document.getElementById('progressFill').style.width = percentage + '%';
+}
+
+// ==================== LOCAL DIAGNOSIS ====================
+// The rule set is compiled into a versioned bundle (decision_bundle.py)
+// that is cached here so diagnoses need no round trip to /diagnose.
+const BUNDLE_STORAGE_KEY = 'diagnosisBundle';
+let decisionBundle = null;
+
+async function loadBundle() {
+    let cached = null;
+    try {
+        cached = JSON.parse(localStorage.getItem(BUNDLE_STORAGE_KEY));
+    } catch (error) {
+        cached = null;
+    }
+
+    try {
+        const headers = cached ? { 'If-None-Match': '"' + cached.version + '"' } : {};
+        const response = await fetch('/bundle', { headers: headers });
+        if (response.status === 304 && cached) {
+            decisionBundle = cached;
+        } else if (response.ok) {
+            decisionBundle = await response.json();
+            localStorage.setItem(BUNDLE_STORAGE_KEY, JSON.stringify(decisionBundle));
+        }
+    } catch (error) {
+        // Offline: a cached bundle is still good, the server re-checks it
+        decisionBundle = cached;
+    }
+}
+
+function compareKeys(a, b) {
+    for (let i = 0; i < Math.min(a.length, b.length); i++) {
+        if (a[i] !== b[i]) {
+            return a[i] - b[i];
+        }
+    }
+    return a.length - b.length;
+}
+
+// Mirrors decision_bundle.evaluate(): facts are numbered in declaration
+// order and the matching rule with the smallest key fires last and wins.
+function diagnoseLocally(bundle, answers) {
+    const ids = new Map();
+    bundle.initial.forEach((fact, i) => ids.set(JSON.stringify(fact), i + 1));
+    let nextId = bundle.first_answer_id;
+    for (const [key, value] of Object.entries(answers)) {
+        const fact = JSON.stringify([key, value]);
+        if (!ids.has(fact)) {
+            ids.set(fact, nextId++);
+        }
+    }
+
+    let winner = null;
+    for (const [resultIndex, salience, branches] of bundle.rules) {
+        for (const branch of branches) {
+            const factIds = branch.map(i => ids.get(JSON.stringify(bundle.facts[i])));
+            if (factIds.every(id => id !== undefined)) {
+                const key = [salience].concat(factIds.sort((a, b) => b - a));
+                if (winner === null || compareKeys(key, winner.key) < 0) {
+                    winner = { key: key, resultIndex: resultIndex };
+                }
+            }
+        }
+    }
+
+    const [rule, diagnosis, solution, severity] =
+        bundle.results[winner ? winner.resultIndex : bundle.fallback];
+    return { success: true, rule: rule, diagnosis: diagnosis, solution: solution, severity: severity };
+}
+
+function recordLocalDiagnosis(result, answers) {
+    fetch('/history/record', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        keepalive: true,
+        body: JSON.stringify({
+            answers: answers,
+            rule: result.rule,
+            bundle_version: decisionBundle.version
+        })
+    })
+        .then(response => response.json())
+        .then(record => {
+            if (record.stale) {
+                // Rules changed on the server: show its answer, refresh the bundle
+                localStorage.removeItem(BUNDLE_STORAGE_KEY);
+                displayResult(record);
+                loadBundle();
+            }
+        })
+        .catch(() => {});
+}
+
+loadBundle();
+
+async function fetchSimilarCases(answers) {
+    try {
+        const response = await fetch('/history/similar', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ answers: answers, k: 5 })
+        });
+        const data = await response.json();
+        return data.success ? data.cases : [];
+    } catch (error) {
+        return [];
+    }
+}
+
+function displaySimilarCases(cases) {
+    const list = document.getElementById('similarList');
+    list.innerHTML = '';
+
+    cases.forEach(item => {
+        const entry = document.createElement('li');
+        const title = document.createElement('span');
+        title.textContent = item.diagnosis;
+        const meta = document.createElement('span');
+        meta.className = 'similar-meta';
+        meta.textContent = (item.last_seen || item.timestamp || '').slice(0, 10) + ' · '
+            + item.overlap + ' matching ' + (item.overlap === 1 ? 'answer' : 'answers')
+            + (item.count > 1 ? ' · seen ' + item.count + ' times' : '');
+        entry.appendChild(title);
+        entry.appendChild(meta);
+        list.appendChild(entry);
+    });
+
+    document.getElementById('similarCases').classList.toggle('active', cases.length > 0);
+}
+
+async function submitDiagnosis() {
+    document.getElementById('dynamicQuestions').classList.remove('active');
+
+    // Look up past cases before this one is saved, so it cannot match itself
+    const answers = Object.assign({}, userAnswers);
+    const similarCases = fetchSimilarCases(answers);
+
+    if (decisionBundle) {
+        // The diagnosis needs no round trip; past cases fill in when they arrive
+        const result = diagnoseLocally(decisionBundle, answers);
+        displayResult(result);
+        similarCases.then(cases => {
+            displaySimilarCases(cases);
+            recordLocalDiagnosis(result, answers);
+        });
+        return;
+    }
+
+    document.getElementById('loading').classList.add('active');
+
+    try {
+        const cases = await similarCases;
+        const response = await fetch('/diagnose', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+                category: currentCategory,
+                answers: userAnswers
+            })
+        });
+
+        const result = await response.json();
+
+        setTimeout(() => {
+            document.getElementById('loading').classList.remove('active');
+            displayResult(result);
+            displaySimilarCases(cases);
+        }, 1000);
+
+    } catch (error) {
+        alert('Error: ' + error.message);
+        document.getElementById('loading').classList.remove('active');
+    }
+}
+
+function displayResult(result) {
+    document.getElementById('progressFill').style.width = '100%';
+
+    const severityMap = {
+        'critical': { class: 'severity-critical', text: '🔴 CRITICAL - URGENT ACTION REQUIRED' },
+        'high': { class: 'severity-high', text: '🟠 HIGH - Address Soon' },
+        'medium': { class: 'severity-medium', text: '🟡 MEDIUM - Should Fix' },
+        'low': { class: 'severity-low', text: '🟢 LOW - Minor Issue' }
+    };
+
+    const severity = severityMap[result.severity] || severityMap['low'];
+
+    document.getElementById('severityBadge').className = 'severity-badge ' + severity.class;
+    document.getElementById('severityBadge').textContent = severity.text;
+    document.getElementById('diagnosisText').textContent = result.diagnosis;
+    document.getElementById('solutionText').textContent = result.solution;
+
+    document.getElementById('diagnosisResult').classList.add('active');
+}
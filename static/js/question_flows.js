@@ -0,0 +1,451 @@
+// Question trees for each issue category. answer_table.py walks these to
+// precompute a diagnosis for every path, so keep it a plain object literal.
+const questionFlows = {
+    power_boot: [
+        {
+            key: 'power_status',
+            question: 'What is the power status?',
+            options: [
+                { text: 'Computer won\'t turn on at all', value: 'not_turning_on', next: 'power_cable' },
+                { text: 'Computer turns on but won\'t boot', value: 'turning_on', next: 'boot_stage' },
+                { text: 'Computer shows BIOS then stops', value: 'turning_on', next: 'boot_stage' }
+            ]
+        },
+        {
+            key: 'power_cable',
+            question: 'Is the power cable connected properly?',
+            condition: { power_status: 'not_turning_on' },
+            options: [
+                { text: 'Yes', value: 'connected', next: 'outlet_working' },
+                { text: 'No', value: 'disconnected', next: 'end' }
+            ]
+        },
+        {
+            key: 'outlet_working',
+            question: 'Is the power outlet working? (Test with another device)',
+            condition: { power_cable: 'connected' },
+            options: [
+                { text: 'Yes', value: 'yes', next: 'lights' },
+                { text: 'No', value: 'no', next: 'end' }
+            ]
+        },
+        {
+            key: 'lights',
+            question: 'When you press the power button, do any lights turn on?',
+            condition: { outlet_working: 'yes' },
+            options: [
+                { text: 'No lights at all', value: 'none', next: 'end' },
+                { text: 'Lights turn on', value: 'on', next: 'display' },
+                { text: 'Fans spin but no display', value: 'on', next: 'display' }
+            ]
+        },
+        {
+            key: 'display',
+            question: 'Is there any display on the monitor?',
+            condition: { lights: 'on' },
+            options: [
+                { text: 'No signal', value: 'no_signal', next: 'end' },
+                { text: 'Shows something', value: 'showing', next: 'end' }
+            ]
+        },
+        {
+            key: 'boot_stage',
+            question: 'What stage does it reach?',
+            condition: { power_status: 'turning_on' },
+            options: [
+                { text: 'No BIOS screen', value: 'no_bios', next: 'end' },
+                { text: 'BIOS shows then stops', value: 'bios_shows', next: 'beep_code' },
+                { text: 'Searching for boot device', value: 'bios_shows', next: 'boot_device' }
+            ]
+        },
+        {
+            key: 'beep_code',
+            question: 'Do you hear any beep codes?',
+            condition: { boot_stage: 'bios_shows' },
+            options: [
+                { text: 'No beeps', value: 'none', next: 'end' },
+                { text: '1 long, 2 short beeps', value: '1_long_2_short', next: 'end' },
+                { text: 'Continuous beeping', value: 'continuous', next: 'end' }
+            ]
+        },
+        {
+            key: 'boot_device',
+            question: 'Boot device status?',
+            options: [
+                { text: 'Boot device not found', value: 'not_found', next: 'end' },
+                { text: 'Boot device found', value: 'found', next: 'end' }
+            ]
+        }
+    ],
+    performance: [
+        {
+            key: 'issue_category',
+            value: 'performance',
+            hidden: true
+        },
+        {
+            key: 'symptom',
+            question: 'What performance issue are you experiencing?',
+            options: [
+                { text: 'Very slow performance', value: 'very_slow', next: 'disk_type' },
+                { text: 'Computer freezing/hanging', value: 'freezing', next: 'end' },
+                { text: 'Random shutdowns', value: 'shutdowns', next: 'end' },
+                { text: 'Overheating', value: 'overheating', next: 'temperature' }
+            ]
+        },
+        {
+            key: 'disk_type',
+            question: 'What type of drive do you have?',
+            condition: { symptom: 'very_slow' },
+            options: [
+                { text: 'HDD (Hard Disk)', value: 'hdd', next: 'disk_health' },
+                { text: 'SSD (Solid State)', value: 'ssd', next: 'cpu_usage' },
+                { text: 'Don\'t know', value: 'unknown', next: 'cpu_usage' }
+            ]
+        },
+        {
+            key: 'disk_health',
+            question: 'Have you checked disk health? Any warnings?',
+            condition: { disk_type: 'hdd' },
+            options: [
+                { text: 'Yes, shows warnings', value: 'poor', next: 'end' },
+                { text: 'No warnings', value: 'good', next: 'cpu_usage' },
+                { text: 'Haven\'t checked', value: 'unknown', next: 'cpu_usage' }
+            ]
+        },
+        {
+            key: 'cpu_usage',
+            question: 'Check Task Manager - Is CPU usage constantly high (>80%)?',
+            options: [
+                { text: 'Yes', value: 'high', next: 'process' },
+                { text: 'No', value: 'normal', next: 'ram_usage' }
+            ]
+        },
+        {
+            key: 'process',
+            question: 'Can you identify which program is using CPU?',
+            condition: { cpu_usage: 'high' },
+            options: [
+                { text: 'Yes, I know the program', value: 'known', next: 'end' },
+                { text: 'No, unknown process', value: 'unknown', next: 'end' },
+                { text: 'Multiple processes', value: 'multiple', next: 'end' }
+            ]
+        },
+        {
+            key: 'ram_usage',
+            question: 'Check Task Manager - Memory (RAM) usage high?',
+            options: [
+                { text: 'Yes, >80%', value: 'high', next: 'available_ram' },
+                { text: 'No, <50%', value: 'normal', next: 'end' }
+            ]
+        },
+        {
+            key: 'available_ram',
+            question: 'How much RAM do you have?',
+            condition: { ram_usage: 'high' },
+            options: [
+                { text: '4GB or less', value: 'low', next: 'end' },
+                { text: '8GB', value: 'low', next: 'end' },
+                { text: '16GB or more', value: 'sufficient', next: 'end' }
+            ]
+        },
+        {
+            key: 'temperature',
+            question: 'Temperature status?',
+            condition: { symptom: 'overheating' },
+            options: [
+                { text: 'Very high', value: 'very_high', next: 'end' },
+                { text: 'Normal', value: 'normal', next: 'end' }
+            ]
+        }
+    ],
+    bsod: [
+        {
+            key: 'issue_category',
+            value: 'bsod',
+            hidden: true
+        },
+        {
+            key: 'error_code',
+            question: 'What error code does the blue screen show?',
+            options: [
+                { text: 'DRIVER_IRQL_NOT_LESS_OR_EQUAL', value: 'DRIVER_IRQL_NOT_LESS_OR_EQUAL', next: 'end' },
+                { text: 'MEMORY_MANAGEMENT', value: 'MEMORY_MANAGEMENT', next: 'end' },
+                { text: 'KERNEL_DATA_INPAGE_ERROR', value: 'KERNEL_DATA_INPAGE_ERROR', next: 'end' },
+                { text: 'SYSTEM_SERVICE_EXCEPTION', value: 'SYSTEM_SERVICE_EXCEPTION', next: 'end' },
+                { text: 'PAGE_FAULT_IN_NONPAGED_AREA', value: 'PAGE_FAULT_IN_NONPAGED_AREA', next: 'end' },
+                { text: 'Other/Don\'t know', value: 'unknown', next: 'end' }
+            ]
+        }
+    ],
+    network: [
+        {
+            key: 'issue_category',
+            value: 'network',
+            hidden: true
+        },
+        {
+            key: 'symptom',
+            question: 'What is the network problem?',
+            options: [
+                { text: 'No internet connection', value: 'no_internet', next: 'other_devices' },
+                { text: 'Very slow internet', value: 'slow_internet', next: 'connection' },
+                { text: 'Can\'t connect to WiFi', value: 'cannot_connect', next: 'connection_wifi' },
+                { text: 'Intermittent connection (keeps dropping)', value: 'intermittent', next: 'end' },
+                { text: 'Connected but no access', value: 'no_access', next: 'dns_test' }
+            ]
+        },
+        {
+            key: 'other_devices',
+            question: 'Are other devices (phone/tablet) working on same network?',
+            condition: { symptom: 'no_internet' },
+            options: [
+                { text: 'Yes, they work', value: 'working', next: 'end' },
+                { text: 'No, nothing works', value: 'not_working', next: 'end' }
+            ]
+        },
+        {
+            key: 'connection',
+            question: 'Are you using WiFi or Ethernet cable?',
+            condition: { symptom: 'slow_internet' },
+            options: [
+                { text: 'WiFi', value: 'wifi', next: 'signal' },
+                { text: 'Ethernet', value: 'ethernet', next: 'end' }
+            ]
+        },
+        {
+            key: 'signal',
+            question: 'Is WiFi signal strength good?',
+            condition: { connection: 'wifi' },
+            options: [
+                { text: 'Weak signal (1-2 bars)', value: 'weak', next: 'end' },
+                { text: 'Good signal (3-4 bars)', value: 'good', next: 'end' }
+            ]
+        },
+        {
+            key: 'connection_wifi',
+            value: 'wifi',
+            hidden: true
+        },
+        {
+            key: 'network_visible',
+            question: 'Can you see your WiFi network in the list?',
+            condition: { symptom: 'cannot_connect' },
+            options: [
+                { text: 'Yes', value: 'yes', next: 'end' },
+                { text: 'No', value: 'no', next: 'end' }
+            ]
+        },
+        {
+            key: 'dns_test',
+            question: 'Can you open websites if you type IP address like 8.8.8.8?',
+            condition: { symptom: 'no_access' },
+            options: [
+                { text: 'Yes, IP works', value: 'ip_works', next: 'dns_working' },
+                { text: 'No, nothing works', value: 'nothing', next: 'end' }
+            ]
+        },
+        {
+            key: 'dns_working',
+            value: 'no',
+            hidden: true
+        },
+        {
+            key: 'can_ping_ip',
+            value: 'yes',
+            hidden: true
+        }
+    ],
+    application: [
+        {
+            key: 'issue_category',
+            value: 'application',
+            hidden: true
+        },
+        {
+            key: 'symptom',
+            question: 'What is the application problem?',
+            options: [
+                { text: 'Programs crash frequently', value: 'crashes', next: 'which_apps' },
+                { text: 'Can\'t install software', value: 'wont_install', next: 'end' },
+                { text: 'Program won\'t start', value: 'wont_start', next: 'end' }
+            ]
+        },
+        {
+            key: 'which_apps',
+            question: 'Which programs crash?',
+            condition: { symptom: 'crashes' },
+            options: [
+                { text: 'One specific program', value: 'specific', next: 'end' },
+                { text: 'Multiple/all programs', value: 'all', next: 'end' }
+            ]
+        }
+    ],
+    peripheral: [
+        {
+            key: 'issue_category',
+            value: 'peripheral',
+            hidden: true
+        },
+        {
+            key: 'device',
+            question: 'Which device has a problem?',
+            options: [
+                { text: 'Printer', value: 'printer', next: 'printer_symptom' },
+                { text: 'USB Device (flash drive, external HDD)', value: 'usb', next: 'usb_symptom' },
+                { text: 'Keyboard/Mouse', value: 'keyboard_mouse', next: 'kb_connection' }
+            ]
+        },
+        {
+            key: 'symptom',
+            question: 'What is the printer issue?',
+            condition: { device: 'printer' },
+            options: [
+                { text: 'Not detected/found', value: 'not_detected', next: 'end' },
+                { text: 'Print queue stuck', value: 'queue_stuck', next: 'end' },
+                { text: 'Poor print quality', value: 'poor_quality', next: 'end' }
+            ]
+        },
+        {
+            key: 'symptom',
+            question: 'What is the USB issue?',
+            condition: { device: 'usb' },
+            options: [
+                { text: 'Not recognized/detected', value: 'not_recognized', next: 'end' },
+                { text: 'Keeps disconnecting', value: 'keeps_disconnecting', next: 'end' },
+                { text: 'Very slow', value: 'slow', next: 'end' }
+            ]
+        },
+        {
+            key: 'connection',
+            question: 'Is it wired or wireless?',
+            condition: { device: 'keyboard_mouse' },
+            options: [
+                { text: 'Wired (USB)', value: 'wired', next: 'end' },
+                { text: 'Wireless', value: 'wireless', next: 'end' }
+            ]
+        },
+        {
+            key: 'symptom',
+            value: 'not_working',
+            hidden: true
+        }
+    ],
+    audio: [
+        {
+            key: 'issue_category',
+            value: 'audio',
+            hidden: true
+        },
+        {
+            key: 'symptom',
+            question: 'What is the audio problem?',
+            options: [
+                { text: 'No sound at all', value: 'no_sound', next: 'device_detected' },
+                { text: 'Crackling/distorted sound', value: 'crackling', next: 'end' },
+                { text: 'Sound from wrong device', value: 'wrong_device', next: 'end' }
+            ]
+        },
+        {
+            key: 'device_detected',
+            question: 'Is audio device shown in Sound settings?',
+            condition: { symptom: 'no_sound' },
+            options: [
+                { text: 'Yes, I see it', value: 'yes', next: 'muted' },
+                { text: 'No, not listed', value: 'no', next: 'end' }
+            ]
+        },
+        {
+            key: 'muted',
+            question: 'Is it muted or volume at 0?',
+            condition: { device_detected: 'yes' },
+            options: [
+                { text: 'No, volume is up', value: 'no', next: 'end' },
+                { text: 'Yes, was muted', value: 'yes', next: 'end' }
+            ]
+        }
+    ],
+    security: [
+        {
+            key: 'issue_category',
+            value: 'security',
+            hidden: true
+        },
+        {
+            key: 'symptom',
+            question: 'What security concern do you have?',
+            options: [
+                { text: 'Suspected malware/virus', value: 'malware_suspected', next: 'signs_malware' },
+                { text: 'Pop-up ads everywhere', value: 'malware_suspected', next: 'signs_popup' },
+                { text: 'Browser redirects to strange sites', value: 'malware_suspected', next: 'signs_redirect' },
+                { text: 'Files encrypted (ransomware)', value: 'ransomware', next: 'end' },
+                { text: 'Unknown programs running', value: 'malware_suspected', next: 'signs_programs' }
+            ]
+        },
+        {
+            key: 'signs',
+            value: 'popup_ads',
+            hidden: true,
+            condition: { symptom: 'malware_suspected' }
+        }
+    ],
+    storage: [
+        {
+            key: 'issue_category',
+            value: 'storage',
+            hidden: true
+        },
+        {
+            key: 'symptom',
+            question: 'What is the storage problem?',
+            options: [
+                { text: 'Disk full/low space', value: 'disk_full', next: 'end' },
+                { text: 'External drive not showing', value: 'external_not_showing', next: 'end' },
+                { text: 'Drive errors/warnings', value: 'drive_errors', next: 'end' },
+                { text: 'Very slow drive', value: 'slow_drive', next: 'end' }
+            ]
+        }
+    ],
+    windows_update: [
+        {
+            key: 'issue_category',
+            value: 'windows_update',
+            hidden: true
+        },
+        {
+            key: 'symptom',
+            question: 'What is the Windows Update problem?',
+            options: [
+                { text: 'Update keeps failing', value: 'update_failing', next: 'end' },
+                { text: 'Update stuck/frozen', value: 'update_stuck', next: 'end' },
+                { text: 'Update taking too long', value: 'update_stuck', next: 'end' }
+            ]
+        }
+    ],
+    display: [
+        {
+            key: 'issue_category',
+            value: 'display',
+            hidden: true
+        },
+        {
+            key: 'symptom',
+            question: 'What is the display problem?',
+            options: [
+                { text: 'No display/black screen', value: 'no_display', next: 'power_on' },
+                { text: 'Screen flickering', value: 'flickering', next: 'end' },
+                { text: 'Wrong resolution', value: 'wrong_resolution', next: 'end' },
+                { text: 'Display colors wrong', value: 'colors_wrong', next: 'end' }
+            ]
+        },
+        {
+            key: 'power_on',
+            question: 'Is the computer powered on (lights/fans)?',
+            condition: { symptom: 'no_display' },
+            options: [
+                { text: 'Yes', value: 'yes', next: 'end' },
+                { text: 'No', value: 'no', next: 'end' }
+            ]
+        }
+    ]
+};
@@ -0,0 +1,33 @@
+"""
+Shared fixtures - the test suite imports the top-level modules directly
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import knowledge_base
+import pytest
+
+
+@pytest.fixture
+def history_file(tmp_path, monkeypatch):
+    """Point the history at an empty file of the test's own"""
+    path = str(tmp_path / 'history.json')
+    monkeypatch.setattr(knowledge_base, 'HISTORY_FILE', path)
+    return path
+
+
+@pytest.fixture(scope='session')
+def questionnaire_paths():
+    """Every answer set the CLI and web questionnaires can produce"""
+    from answer_table import enumerate_cli_paths, enumerate_web_paths
+    return list(enumerate_cli_paths()) + list(enumerate_web_paths())
+
+
+@pytest.fixture
+def client(history_file):
+    """A test client for the web app, saving to the test's history file"""
+    import web_app
+    return web_app.app.test_client()
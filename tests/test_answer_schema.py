@@ -0,0 +1,62 @@
+from answer_schema import AnswerSchema, InvalidAnswers
+from engine_snapshot import EnginePool, diagnose_with
+from knowledge_base import load_history
+import pytest
+
+JUNK = {'favourite_colour': 'blue', 'power_status': 'sideways', 'action': 'diagnose',
+        'lights': ['none']}
+
+
+def test_trim_drops_unknown_pairs_and_keeps_order():
+    schema = AnswerSchema()
+    answers = {'power_status': 'not_turning_on', 'favourite_colour': 'blue',
+               'power_cable': 'connected', 'lights': 7}
+    trimmed = schema.validate(answers)
+    assert list(trimmed.items()) == [('power_status', 'not_turning_on'),
+                                     ('power_cable', 'connected')]
+    assert schema.stats()['trimmed'] == 1
+
+
+def test_engine_facts_cannot_be_declared_by_clients():
+    assert AnswerSchema().validate({'action': 'diagnose'}) == {}
+
+
+def test_reject_mode_refuses_unknown_pairs():
+    schema = AnswerSchema(mode='reject')
+    with pytest.raises(InvalidAnswers, match='favourite_colour'):
+        schema.validate({'power_status': 'not_turning_on', 'favourite_colour': 'blue'})
+    assert schema.stats()['rejected'] == 1
+
+
+@pytest.mark.parametrize('answers', [['power_status'], 'power_status', None])
+def test_non_objects_are_rejected(answers):
+    with pytest.raises(InvalidAnswers):
+        AnswerSchema().validate(answers)
+
+
+def test_oversized_payloads_are_rejected():
+    schema = AnswerSchema()
+    with pytest.raises(InvalidAnswers, match='too many'):
+        schema.validate({f'key_{i}': 'x' for i in range(schema.max_answers + 1)})
+
+
+def test_trimming_never_changes_a_diagnosis(questionnaire_paths):
+    schema = AnswerSchema()
+    pool = EnginePool()
+    for path in questionnaire_paths:
+        with pool.engine() as engine:
+            expected = diagnose_with(engine, path)
+        # Junk before and after the real answers, whose order must survive
+        noisy = {key: value for key, value in JUNK.items() if key not in path}
+        noisy.update(path)
+        noisy['extra_question'] = 'maybe'
+        with pool.engine() as engine:
+            assert diagnose_with(engine, schema.validate(noisy)) is expected, path
+
+
+@pytest.mark.parametrize('route', ['/diagnose', '/history/record'])
+def test_payloads_trimmed_to_nothing_are_refused_and_not_saved(client, route):
+    response = client.post(route, json={'answers': {'favourite_colour': 'blue', 'action': 'diagnose'}})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'no known answers'
+    assert load_history() == []
@@ -0,0 +1,26 @@
+from answer_table import AnswerTable
+from engine_snapshot import EnginePool, diagnose_with
+
+
+def test_table_matches_engine_on_every_path(questionnaire_paths):
+    table = AnswerTable.load()
+    assert len(table) > 0
+    pool = EnginePool()
+    for answers in questionnaire_paths:
+        with pool.engine() as engine:
+            expected = diagnose_with(engine, answers)
+        # Interned results, so the table hands out the engine's own objects
+        assert table.lookup(answers) is expected, answers
+
+
+def test_answer_order_is_part_of_the_key(questionnaire_paths):
+    table = AnswerTable.load()
+    answers = next(a for a in questionnaire_paths if len(a) > 1)
+    assert table.lookup(answers) is not None
+    assert table.lookup(dict(reversed(list(answers.items())))) is None
+
+
+def test_unknown_and_unhashable_answers_miss():
+    table = AnswerTable.load()
+    assert table.lookup({'power_status': 'sideways'}) is None
+    assert table.lookup({'power_status': ['not_turning_on']}) is None
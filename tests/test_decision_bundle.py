@@ -0,0 +1,60 @@
+from decision_bundle import build_bundle, evaluate
+from engine_snapshot import EnginePool, diagnose_with
+from knowledge_base import load_history, rule_results
+from rule_index import RuleIndex
+import random
+
+POWER_FAILURE = {'power_status': 'not_turning_on', 'power_cable': 'connected',
+                 'outlet_working': 'yes', 'lights': 'none'}
+
+
+def shuffled(answers, rng):
+    items = list(answers.items())
+    rng.shuffle(items)
+    return dict(items)
+
+
+def test_bundle_and_rule_index_agree_with_engine(questionnaire_paths):
+    bundle = build_bundle()
+    rule_index = RuleIndex()
+    results = rule_results()
+    pool = EnginePool()
+    rng = random.Random(0)
+    for path in questionnaire_paths:
+        # Answer order decides ties between rules, so try other orders too
+        for answers in (path, shuffled(path, rng)):
+            with pool.engine() as engine:
+                expected = diagnose_with(engine, answers)
+            assert rule_index.diagnose(answers) is expected, answers
+            assert results[evaluate(bundle, answers)['rule']] is expected, answers
+
+
+def test_record_keeps_a_rule_that_matches(client):
+    import web_app
+    rule = evaluate(web_app.decision_bundle, POWER_FAILURE)['rule']
+    response = client.post('/history/record', json={
+        'answers': POWER_FAILURE, 'rule': rule,
+        'bundle_version': web_app.decision_bundle['version']})
+    body = response.get_json()
+    assert body['stale'] is False
+    assert load_history()[-1]['diagnosis'] == rule_results()[rule].diagnosis
+
+
+def test_record_overrides_a_rule_the_answers_do_not_support(client):
+    import web_app
+    expected = evaluate(web_app.decision_bundle, POWER_FAILURE)
+    response = client.post('/history/record', json={
+        'answers': POWER_FAILURE, 'rule': 'diagnose_ransomware',
+        'bundle_version': web_app.decision_bundle['version']})
+    body = response.get_json()
+    assert body['stale'] is True
+    assert body['diagnosis'] == expected['diagnosis']
+    assert [record['diagnosis'] for record in load_history()] == [expected['diagnosis']]
+
+
+def test_record_from_an_old_bundle_is_diagnosed_on_the_server(client):
+    response = client.post('/history/record', json={
+        'answers': POWER_FAILURE, 'rule': 'diagnose_ransomware', 'bundle_version': 'old'})
+    body = response.get_json()
+    assert body['stale'] is True
+    assert body['diagnosis'] == evaluate(build_bundle(), POWER_FAILURE)['diagnosis']
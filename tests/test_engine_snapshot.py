@@ -0,0 +1,39 @@
+from engine_snapshot import EnginePool, EngineSnapshot, diagnose_with
+from knowledge_base import ComputerDiagnosisSystem
+import random
+
+
+def reset_and_run(answers):
+    engine = ComputerDiagnosisSystem()
+    engine.reset()
+    return diagnose_with(engine, answers)
+
+
+def test_restored_engine_matches_a_fresh_one(questionnaire_paths):
+    snapshot = EngineSnapshot(ComputerDiagnosisSystem())
+    # One engine reused in a scrambled order, so leftovers from a run would show
+    paths = list(questionnaire_paths)
+    random.Random(0).shuffle(paths)
+    for answers in paths[:60]:
+        assert diagnose_with(snapshot.restore(), answers) is reset_and_run(answers), answers
+
+
+def test_restore_returns_the_post_reset_state():
+    engine = ComputerDiagnosisSystem()
+    snapshot = EngineSnapshot(engine)
+    facts = dict(engine.facts)
+    diagnose_with(engine, {'power_status': 'not_turning_on', 'power_cable': 'connected'})
+    assert engine.diagnosis_result is not None
+
+    restored = snapshot.restore()
+    assert restored is engine
+    assert dict(restored.facts) == facts
+    assert restored.diagnosis_result is None
+
+
+def test_pool_reuses_engines():
+    pool = EnginePool()
+    for answers in ({'power_status': 'not_turning_on'}, {'problem_category': 'network'}):
+        with pool.engine() as engine:
+            diagnose_with(engine, answers)
+    assert pool.stats() == {'created': 1, 'idle': 1}
@@ -0,0 +1,44 @@
+"""
+Event log tests - events name the rule from the knowledge base that ran
+"""
+
+from types import SimpleNamespace
+import json
+
+from event_log import EventLog
+from kb_registry import LoadedKnowledgeBase
+from knowledge_base import ComputerDiagnosisSystem
+from rule_index import FALLBACK_RULE
+
+
+def emitted(tmp_path, *emits):
+    """The events written for each (result, knowledge_base) pair"""
+    path = tmp_path / 'events.jsonl'
+    log = EventLog(path=str(path), sample_rate=1.0)
+    for result, knowledge_base in emits:
+        log.start('test').emit(answers={}, result=result, knowledge_base=knowledge_base)
+    log.close()
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_builtin_rules_and_fallback(tmp_path):
+    kb = LoadedKnowledgeBase('windows', ComputerDiagnosisSystem)
+    rule = next(name for name in kb.results if name != FALLBACK_RULE)
+    events = emitted(tmp_path, (kb.results[rule], kb), (kb.results[FALLBACK_RULE], kb),
+                     (kb.results[rule], None))
+
+    assert [(e['knowledge_base'], e['rule'], e['fallback']) for e in events[:2]] == [
+        ('windows', rule, False), ('windows', FALLBACK_RULE, True)]
+    # Without a knowledge base the built-in rules still name the result
+    assert (events[2]['rule'], events[2]['fallback']) == (rule, False)
+    assert 'knowledge_base' not in events[2]
+
+
+def test_other_knowledge_base_uses_its_own_rules(tmp_path):
+    reboot, fallback = SimpleNamespace(severity='low'), SimpleNamespace(severity='medium')
+    kb = SimpleNamespace(name='network', rule_names={
+        id(reboot): 'reboot_router', id(fallback): FALLBACK_RULE})
+    events = emitted(tmp_path, (reboot, kb), (fallback, kb))
+
+    assert [(e['knowledge_base'], e['rule'], e['fallback'], e['severity']) for e in events] == [
+        ('network', 'reboot_router', False, 'low'), ('network', FALLBACK_RULE, True, 'medium')]
@@ -0,0 +1,100 @@
+from history_compaction import compact, history_stats
+from history_index import HistoryIndex
+import knowledge_base
+from knowledge_base import (history_generation, history_lock, load_history, replace_history,
+                            save_diagnosis)
+import multiprocessing
+
+
+def record(second, diagnosis='PSU Failure', severity='high', **facts):
+    return {
+        'timestamp': f'2026-01-01T00:00:{second:02d}',
+        'diagnosis': diagnosis,
+        'solution': 'Replace the power supply',
+        'severity': severity,
+        'facts': facts or {'power_status': 'not_turning_on'}
+    }
+
+
+def test_repeats_fold_into_counted_entries():
+    history = [record(0), record(10), record(20, diagnosis='DNS', severity='low'), record(30)]
+    compacted = compact(history)
+    assert len(compacted) == 2
+    entry = compacted[0]
+    assert entry['count'] == 3
+    assert entry['first_seen'] == entry['timestamp'] == '2026-01-01T00:00:00'
+    assert entry['last_seen'] == '2026-01-01T00:00:30'
+    # The input is left alone
+    assert 'count' not in history[0]
+
+
+def test_totals_survive_compaction():
+    history = [record(s) if s % 2 else record(s, diagnosis='Ransomware', severity='critical')
+               for s in range(10)]
+    before, after = history_stats(history), history_stats(compact(history))
+    assert after['entries'] < before['entries']
+    assert dict(after, entries=0) == dict(before, entries=0)
+
+
+def test_window_and_consecutive_limit_folding():
+    history = [record(0), record(59)]
+    assert len(compact(history, window=30)) == 2
+    assert len(compact(history, window=60)) == 1
+
+    interleaved = [record(0), record(1, diagnosis='DNS'), record(2)]
+    assert len(compact(interleaved)) == 2
+    assert len(compact(interleaved, consecutive=True)) == 3
+
+
+def test_other_facts_or_knowledge_bases_do_not_fold():
+    linux = dict(record(1), knowledge_base='linux')
+    other_facts = record(2, power_status='not_turning_on', power_cable='connected')
+    assert len(compact([record(0), linux, other_facts])) == 3
+
+
+def test_saves_fold_within_the_dedup_window(history_file, monkeypatch):
+    monkeypatch.setattr(knowledge_base, 'HISTORY_DEDUP_WINDOW', 60.0)
+    for second in (0, 10, 20):
+        save_diagnosis(record(second))
+    history = load_history()
+    assert len(history) == 1
+    assert history[0]['count'] == 3
+
+
+def test_indexes_rebuild_after_compaction(history_file):
+    index = HistoryIndex()
+    knowledge_base.add_history_listener(index.add)
+    try:
+        for second in (0, 1, 2):
+            save_diagnosis(record(second))
+        save_diagnosis(record(3, diagnosis='DNS', severity='low', dns='failing'))
+        assert len(index) == 4
+
+        with history_lock():
+            replace_history(compact(load_history()))
+        assert history_generation() == 1
+
+        # Id 2 is under the stale count of 4; it must not fold into another entry
+        save_diagnosis(record(4, diagnosis='Disk Full', severity='medium', disk='full'))
+        index.wait_for_rebuild(5)
+        assert len(index) == 3
+        assert [r['diagnosis'] for r in index.records] == ['PSU Failure', 'DNS', 'Disk Full']
+        assert index.records[0]['count'] == 3
+    finally:
+        knowledge_base._history_listeners.remove(index.add)
+
+
+def _save_many(path, start):
+    knowledge_base.HISTORY_FILE = path
+    for second in range(start, start + 20):
+        save_diagnosis(record(second % 60, diagnosis=f'case {second}'))
+
+
+def test_processes_do_not_lose_each_others_saves(history_file):
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_save_many, args=(history_file, i * 20)) for i in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert len(load_history()) == 60
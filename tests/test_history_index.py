@@ -0,0 +1,78 @@
+from history_index import HistoryIndex
+import knowledge_base
+from knowledge_base import load_history, save_diagnoses
+import random
+import time
+
+
+def record(second, **facts):
+    return {'timestamp': f'2026-01-01T00:{second // 60:02d}:{second % 60:02d}',
+            'diagnosis': 'DNS', 'solution': 'Flush DNS', 'severity': 'low', 'facts': facts}
+
+
+def brute_force(history, answers, k):
+    """(overlap, id) of the k records sharing most facts, newest first on ties"""
+    scored = [(sum(answers.get(key) == value for key, value in r['facts'].items()), record_id)
+              for record_id, r in enumerate(history)]
+    return sorted((s for s in scored if s[0]), reverse=True)[:k]
+
+
+def test_most_shared_facts_first_then_newest():
+    history = [record(0, net='down', dns='failing'),
+               record(1, net='down'),
+               record(2, net='down', dns='failing'),
+               record(3, wifi='weak')]
+    cases = HistoryIndex(history).similar({'net': 'down', 'dns': 'failing'}, k=3)
+    assert [(case['id'], case['overlap']) for case in cases] == [(2, 2), (0, 2), (1, 1)]
+    assert cases[0]['matched'] == ['net', 'dns']
+
+
+def test_matches_a_brute_force_scan():
+    rng = random.Random(0)
+    values = {key: [f'v{i}' for i in range(3)] for key in ('a', 'b', 'c', 'd', 'e')}
+    history = [record(i, **{key: rng.choice(options) for key, options in values.items()
+                            if rng.random() < 0.7})
+               for i in range(2000)]
+    index = HistoryIndex(history)
+    # Repeated answer sets share a profile, so the index stays small
+    assert len(index.profiles) < len(history)
+    for _ in range(100):
+        answers = {key: rng.choice(options) for key, options in values.items()}
+        for k in (1, 5, 20):
+            found = [(case['overlap'], case['id']) for case in index.similar(answers, k)]
+            assert found == brute_force(history, answers, k)
+
+
+def test_unhashable_facts_and_answers_are_skipped():
+    index = HistoryIndex([record(0, net='down', extra=['nested'])])
+    assert index.similar({'net': 'down', 'extra': ['nested']})[0]['matched'] == ['net']
+
+
+def test_records_saved_elsewhere_are_caught_up_without_a_rebuild(history_file, monkeypatch):
+    index = HistoryIndex.attach()
+    try:
+        # Saved by "another process": no listeners run for these
+        with monkeypatch.context() as other_process:
+            other_process.setattr(knowledge_base, '_history_listeners', [])
+            save_diagnoses([record(i, net='down') for i in range(5)])
+
+        rebuilds = []
+        monkeypatch.setattr(index, 'rebuild', rebuilds.append)
+        save_diagnoses([record(10, net='down', dns='failing')])
+        assert rebuilds == []
+        assert len(index) == len(load_history()) == 6
+        assert index.similar({'net': 'down', 'dns': 'failing'}, 1)[0]['id'] == 5
+    finally:
+        knowledge_base._history_listeners.remove(index.add)
+
+
+def test_query_time_does_not_grow_with_the_history():
+    def time_query(size):
+        index = HistoryIndex([record(i % 3600, net='down', dns=f'v{i % 4}') for i in range(size)])
+        start = time.perf_counter()
+        for _ in range(20):
+            index.similar({'net': 'down', 'dns': 'v1'})
+        return time.perf_counter() - start
+
+    small, large = time_query(1000), time_query(50000)
+    assert large < small * 5 + 0.01
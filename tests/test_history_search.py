@@ -0,0 +1,76 @@
+from history_compaction import compact
+from history_search import MAX_EXPANSIONS, SearchIndex, parse_query, tokenize
+import knowledge_base
+from knowledge_base import history_lock, load_history, replace_history, save_diagnosis
+
+
+def record(second, diagnosis, solution='Restart the computer', severity='low', **facts):
+    return {'timestamp': f'2026-01-01T00:00:{second:02d}', 'diagnosis': diagnosis,
+            'solution': solution, 'severity': severity, 'facts': facts}
+
+
+HISTORY = [
+    record(0, 'Memory BSOD', 'Run Windows Memory Diagnostic', 'high', bsod_code='memory_management'),
+    record(1, 'DNS Problem', 'Flush the DNS cache', internet='no'),
+    record(2, 'Slow Boot', 'Disable startup programs', boot='slow'),
+    record(3, 'DNS Problem', 'Flush the DNS cache', internet='no'),
+]
+
+
+def test_compound_terms_are_indexed_whole_and_by_part():
+    assert tokenize("MEMORY_MANAGEMENT stop") == ['memory_management', 'memory', 'management', 'stop']
+    assert tokenize("Won't boot") == ["won't", 'boot']
+
+
+def test_queries_split_into_terms_and_prefixes():
+    assert parse_query('dns flu*') == [('dns', False), ('flu', True)]
+    assert parse_query('dns flu', prefix=True) == [('dns', False), ('flu', True)]
+
+
+def test_fact_parts_and_titles_are_searchable():
+    index = SearchIndex(HISTORY)
+    assert [r['id'] for r in index.search('memory')] == [0]
+    assert [r['id'] for r in index.search('MEMORY_MANAGEMENT')] == [0]
+
+
+def test_rarer_terms_score_higher_and_ties_go_to_the_newer_record():
+    index = SearchIndex(HISTORY)
+    results = index.search('dns boot')
+    # "boot" is in one record, "dns" in two: the rarer term wins
+    assert [r['id'] for r in results] == [2, 3, 1]
+    assert results[1]['score'] == results[2]['score']
+
+
+def test_title_terms_outweigh_solution_terms():
+    index = SearchIndex([record(0, 'Printer offline', 'Check the cable'),
+                         record(1, 'Cable unplugged', 'Reconnect the printer')])
+    assert [r['id'] for r in index.search('printer')] == [0, 1]
+
+
+def test_prefixes_expand_through_the_vocabulary():
+    index = SearchIndex(HISTORY)
+    assert {r['id'] for r in index.search('diagnos*')} == {0}
+    assert {r['id'] for r in index.search('fl', prefix=True)} == {1, 3}
+    assert index.search('zzz*') == []
+    assert len(index._expand('', True)) == min(len(index.vocabulary), MAX_EXPANSIONS)
+
+
+def test_saves_are_searchable_and_compaction_rebuilds(history_file):
+    index = SearchIndex.attach()
+    try:
+        for i, entry in enumerate(HISTORY + [HISTORY[3]]):
+            save_diagnosis(dict(entry, timestamp=f'2026-01-01T00:00:{10 + i:02d}'))
+        assert len(index) == 5
+        assert [r['id'] for r in index.search('flush')] == [4, 3, 1]
+
+        with history_lock():
+            replace_history(compact(load_history()))
+        save_diagnosis(record(30, 'Disk Full', 'Free some space', 'medium', disk='full'))
+        index.wait_for_rebuild(5)
+
+        assert len(index) == len(load_history()) == 4
+        dns = index.search('flush')
+        assert [(r['id'], r['count']) for r in dns] == [(1, 3)]
+        assert [r['id'] for r in index.search('disk')] == [3]
+    finally:
+        knowledge_base._history_listeners.remove(index.add)
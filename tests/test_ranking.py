@@ -0,0 +1,55 @@
+from ranking import RuleRanker, numpy, synthetic_rules
+from rule_index import CompiledRule
+import pytest
+import random
+
+BACKENDS = [False] + ([True] if numpy is not None else [])
+
+# Three rules: 'a' and 'b' tie on any single answer they share
+RULES = [
+    CompiledRule('rule_b', 0, ((('power', 'off'), ('cable', 'in')),)),
+    CompiledRule('rule_a', 0, ((('power', 'off'), ('cable', 'in')),)),
+    CompiledRule('rule_c', 0, ((('power', 'on'), ('screen', 'dark'), ('cable', 'in')),)),
+]
+
+
+@pytest.mark.parametrize('use_numpy', BACKENDS)
+def test_higher_match_ratio_ranks_first(use_numpy):
+    ranker = RuleRanker(RULES, use_numpy=use_numpy)
+    ranked = ranker.rank({'power': 'on', 'screen': 'dark'})
+    assert [h['rule'] for h in ranked] == ['rule_c']
+    assert ranked[0]['match_ratio'] == round(2 / 3, 3)
+    assert ranked[0]['missing'] == [{'cable': 'in'}]
+
+
+@pytest.mark.parametrize('use_numpy', BACKENDS)
+def test_ties_are_ordered_by_rule_name(use_numpy):
+    ranker = RuleRanker(RULES, use_numpy=use_numpy)
+    assert [h['rule'] for h in ranker.rank({'cable': 'in'})] == ['rule_a', 'rule_b', 'rule_c']
+
+
+@pytest.mark.parametrize('use_numpy', BACKENDS)
+def test_contradicted_and_unsupported_rules_are_dropped(use_numpy):
+    ranker = RuleRanker(RULES, use_numpy=use_numpy)
+    # power=off contradicts rule_c; nothing pads the list out to k
+    assert [h['rule'] for h in ranker.rank({'power': 'off'}, k=5)] == ['rule_a', 'rule_b']
+    assert ranker.rank({}) == []
+    assert ranker.rank({'unrelated': 'yes'}) == []
+
+
+@pytest.mark.parametrize('use_numpy', BACKENDS)
+def test_missing_never_names_an_answered_key(use_numpy, questionnaire_paths):
+    ranker = RuleRanker(use_numpy=use_numpy)
+    for path in questionnaire_paths:
+        for hypothesis in ranker.rank(path):
+            assert not any(key in path for missing in hypothesis['missing'] for key in missing)
+
+
+@pytest.mark.skipif(numpy is None, reason="NumPy is not installed")
+def test_backends_agree_on_synthetic_rules():
+    rules = synthetic_rules(2000)
+    vectorised, bitset = RuleRanker(rules, use_numpy=True), RuleRanker(rules, use_numpy=False)
+    rng = random.Random(1)
+    for _ in range(200):
+        answers = dict((f"k{rng.randrange(200)}", f"v{rng.randrange(8)}") for _ in range(8))
+        assert vectorised.rank(answers, 10) == bitset.rank(answers, 10)
@@ -0,0 +1,100 @@
+from knowledge_base import rule_results
+import shared_cache
+from shared_cache import SEQUENCE, VERSION_OFFSET, SharedResultCache, answer_digest
+import pytest
+
+pytestmark = pytest.mark.skipif(shared_cache.fcntl is None, reason="the shared cache needs fcntl")
+
+ANSWERS = {'power_status': 'not_turning_on', 'power_cable': 'connected'}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SharedResultCache(str(tmp_path / 'windows.results'), slots=64)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def psu():
+    return rule_results()['diagnose_psu_failure']
+
+
+def slot_offset(cache, answers):
+    return next(cache._offsets(answer_digest(answers)))
+
+
+def test_results_are_shared_between_openers(cache, psu):
+    assert cache.lookup(ANSWERS) is None
+    assert cache.store(ANSWERS, psu)
+    other = SharedResultCache(cache.path, slots=64)
+    try:
+        assert other.lookup(ANSWERS) is psu
+        # Order is part of the key
+        assert other.lookup(dict(reversed(list(ANSWERS.items())))) is None
+    finally:
+        other.close()
+
+
+def test_only_interned_results_are_stored(cache, psu):
+    assert not cache.store(ANSWERS, psu.as_dict())
+    assert cache.lookup(ANSWERS) is None
+
+
+def test_another_rule_set_is_never_served(cache, psu):
+    cache.store(ANSWERS, psu)
+    # Another process with other rules has taken the file over
+    cache._map[VERSION_OFFSET:VERSION_OFFSET + 16] = b'other-rules'.ljust(16, b'\0')
+    assert cache.lookup(ANSWERS) is None
+    assert not cache.store(ANSWERS, psu)
+    assert not cache.stats()['current']
+
+    # Opening it with these rules again clears the other rule set's slots
+    reopened = SharedResultCache(cache.path, slots=64)
+    try:
+        assert reopened.stats()['current']
+        assert reopened.lookup(ANSWERS) is None
+    finally:
+        reopened.close()
+
+
+def test_a_slot_being_written_is_a_miss(cache, psu):
+    cache.store(ANSWERS, psu)
+    offset = slot_offset(cache, ANSWERS)
+    sequence = SEQUENCE.unpack_from(cache._map, offset)[0]
+    SEQUENCE.pack_into(cache._map, offset, sequence + 1)
+    assert cache.lookup(ANSWERS) is None
+    SEQUENCE.pack_into(cache._map, offset, sequence + 2)
+    assert cache.lookup(ANSWERS) is psu
+
+
+def test_a_slot_rewritten_during_the_read_is_a_torn_miss(cache, psu, monkeypatch):
+    cache.store(ANSWERS, psu)
+
+    class RewrittenMidRead:
+        """Completes a write to the slot just before the reader re-checks it"""
+
+        def unpack_from(self, buffer, at):
+            sequence = SEQUENCE.unpack_from(buffer, at)[0]
+            SEQUENCE.pack_into(buffer, at, sequence + 2)
+            return SEQUENCE.unpack_from(buffer, at)
+
+    monkeypatch.setattr(shared_cache, 'SEQUENCE', RewrittenMidRead())
+    assert cache.lookup(ANSWERS) is None
+    assert cache.stats()['torn_reads'] == 1
+    monkeypatch.undo()
+    assert cache.lookup(ANSWERS) is psu
+
+
+def test_an_engine_run_looks_the_cache_up_once(tmp_path, history_file):
+    from kb_registry import KnowledgeBaseRegistry
+    import web_app
+    kb = KnowledgeBaseRegistry(cache_dir=str(tmp_path)).get()
+    # Not a questionnaire order, so the answer table cannot answer it
+    answers = dict(reversed(list(ANSWERS.items())))
+    assert web_app.answer_table.lookup(answers) is None
+
+    first = web_app.run_diagnosis(answers, kb)
+    assert web_app.run_diagnosis(answers, kb) is first
+    stats = kb.cache.stats()
+    assert (stats['misses'], stats['hits'], stats['stores']) == (1, 1, 1)
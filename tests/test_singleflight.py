@@ -0,0 +1,70 @@
+from singleflight import SingleFlight
+import pytest
+import threading
+
+
+def run_together(flights, key, fn, callers):
+    """Call flights.do(key, fn) from several threads at once"""
+    results = [None] * callers
+    errors = [None] * callers
+
+    def call(i):
+        try:
+            results[i] = flights.do(key, fn)
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return 'result'
+
+    threads, results, errors = run_together(flights, 'key', slow, 8)
+    # Let every follower join the flight before the leader finishes
+    while flights.stats()['coalesced'] < 7:
+        threading.Event().wait(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert results == ['result'] * 8
+    assert errors == [None] * 8
+    assert flights.stats()['in_flight'] == 0
+
+
+def test_followers_see_the_leaders_error():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise ValueError('engine failed')
+
+    threads, _, errors = run_together(flights, 'key', failing, 4)
+    while flights.stats()['coalesced'] < 3:
+        threading.Event().wait(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert all(isinstance(error, ValueError) for error in errors)
+
+
+def test_nothing_is_cached_between_flights():
+    flights = SingleFlight()
+    assert flights.do('key', lambda: 1) == 1
+    assert flights.do('key', lambda: 2) == 2
+    with pytest.raises(KeyError):
+        flights.do('other', lambda: {}['missing'])
+    assert flights.stats()['executions'] == 3
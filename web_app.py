@@ -3,84 +3,438 @@
 Flask Web Application for Computer Problem Diagnosis Expert System
 """
 
-from flask import Flask, render_template, request, jsonify, session
-from knowledge_base import ComputerDiagnosisSystem, save_diagnosis
-from experta import Fact
+from flask import Flask, render_template, request, jsonify, session, abort, g
+from werkzeug.exceptions import HTTPException
+from knowledge_base import answer_key, load_history, rule_results, save_diagnosis
+from answer_table import AnswerTable
+from decision_bundle import build_bundle, bundle_json, evaluate as evaluate_bundle
+from assets import Asset, AssetPipeline, cached_response
+from admission import AdmissionController, Overloaded
+from singleflight import SingleFlight
+from answer_schema import AnswerSchema, InvalidAnswers
+from ranking import RuleRanker
+from rule_index import FALLBACK_RULE
+from history_index import HistoryIndex
+from history_search import SearchIndex
+from history_sink import sink_from_environment
+from history_compaction import history_stats
+from event_log import NULL_EVENT, event_log_from_environment
+from memory_profile import NULL_PROFILE, PROFILE_HEADER, profiler_from_environment
+from kb_registry import DEFAULT_KNOWLEDGE_BASE, UnknownKnowledgeBase, registry_from_environment
 from datetime import datetime
-import secrets
 import json
+import random
+import secrets
+import uuid
+import os
 
 app = Flask(__name__)
 app.secret_key = secrets.token_hex(16)
 
+# Oversized request bodies are refused with 413 before they are parsed
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('DIAGNOSE_MAX_BODY', 8 * 1024))
+
+# Precomputed diagnoses for every questionnaire path (see answer_table.py)
+answer_table = AnswerTable.load()
+
+# Rule set compiled for in-browser diagnosis (see decision_bundle.py)
+decision_bundle = build_bundle()
+decision_bundle_bytes = bundle_json(decision_bundle)
+bundle_results = rule_results()
+
+# Hashed, precompressed CSS/JS (see assets.py); the main page has no
+# per-request content, so it is rendered and compressed only once
+asset_pipeline = AssetPipeline()
+index_page = None
+
+
+# Limit concurrent engine runs; excess requests get a fast 503
+admission = AdmissionController(
+    max_concurrent=int(os.environ.get('DIAGNOSE_MAX_CONCURRENT', os.cpu_count() or 1)),
+    max_queue=int(os.environ.get('DIAGNOSE_MAX_QUEUE', 16)),
+    queue_timeout=float(os.environ.get('DIAGNOSE_QUEUE_TIMEOUT', 0.5)),
+    retry_after=int(os.environ.get('DIAGNOSE_RETRY_AFTER', 1))
+)
+
+# Optional central history collector (see history_sink.py)
+history_sink = sink_from_environment()
+
+# Sampled JSON-lines diagnosis events (see event_log.py)
+event_log = event_log_from_environment()
+
+# Share of sampled diagnosis events that also carry a rule-firing trace;
+# a request can ask for one in its response with "explain": true
+EXPLAIN_SAMPLE = float(os.environ.get('DIAGNOSIS_EXPLAIN_SAMPLE', 0))
+
+# Opt-in per-phase allocation profiling, None unless configured (see memory_profile.py)
+memory_profiler = profiler_from_environment()
+
+# Identical concurrent engine runs share a single evaluation
+inflight = SingleFlight()
+
+# Answers are checked against the keys and values the rules and
+# questionnaires use before any engine work (see answer_schema.py)
+answer_schema = AnswerSchema(
+    mode=os.environ.get('DIAGNOSE_SCHEMA_MODE', 'trim'),
+    max_answers=int(os.environ.get('DIAGNOSE_MAX_ANSWERS', 0)) or None
+)
+
+# Rule sets selectable per request, each compiled into a pool of warmed
+# engines on first use and evicted when cold (see kb_registry.py)
+knowledge_bases = registry_from_environment(schema_mode=answer_schema.mode)
+
+# Partial-match scoring of every rule (see ranking.py)
+rule_ranker = RuleRanker()
+MAX_HYPOTHESES = 20
+
+# Past cases indexed by their facts, kept current as diagnoses are saved
+history_index = HistoryIndex.attach()
+MAX_SIMILAR_CASES = 20
+
+# Full-text search over diagnoses, solutions and answers (see history_search.py)
+search_index = SearchIndex.attach()
+MAX_SEARCH_RESULTS = 100
+
+
+@app.before_request
+def assign_request_id():
+    g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+
+@app.after_request
+def echo_request_id(response):
+    response.headers['X-Request-ID'] = g.request_id
+    profile = g.get('memory_profile')
+    if profile is not None:
+        response.headers[PROFILE_HEADER] = profile.header()
+    return response
+
+
+@app.context_processor
+def inject_asset_url():
+    return {'asset_url': asset_pipeline.url}
+
+
+def run_diagnosis(answers, knowledge_base=None):
+    """Diagnose an answer set, preferring the precomputed table
+
+    Table and shared cache hits bypass admission; engine runs need an
+    admission slot and raise Overloaded when none is available.
+    Concurrent requests with the same answers wait for one engine run
+    instead of starting their own.
+    """
+    kb = knowledge_base or knowledge_bases.get()
+
+    # Known questionnaire paths are answered straight from the table,
+    # which only covers the built-in knowledge base
+    if kb.name == DEFAULT_KNOWLEDGE_BASE:
+        result = answer_table.lookup(answers)
+        if result is not None:
+            admission.bypass()
+            return result
+
+    # Results another worker already computed skip the engine too
+    result = kb.cached(answers)
+    if result is not None:
+        admission.bypass()
+        return result
+
+    def admitted_run():
+        with admission.admit():
+            # Pooled engines are restored from a snapshot, not rebuilt and reset;
+            # the shared cache was checked above
+            return kb.diagnose(answers, check_cache=False)
+
+    # Validated answers are all strings, so the key is always hashable
+    return inflight.do((kb.name, answer_key(answers)), admitted_run)
+
+
+def explain_diagnosis(answers, knowledge_base):
+    """(result, trace) from a traced engine run
+
+    Skips the answer table and coalescing, which would have nothing to
+    explain, but still needs an admission slot.
+    """
+    with admission.admit():
+        return knowledge_base.explain(answers)
+
+
+def validate_answers(schema, payload):
+    """The known answers in ``payload``, refusing one trimming would empty
+
+    An empty payload is a valid (fallback) diagnosis, but one made only of
+    unknown answers is junk, and is not diagnosed or saved as if it were empty.
+    """
+    answers = schema.validate(payload)
+    if payload and not answers:
+        raise InvalidAnswers("no known answers")
+    return answers
+
+
+def start_memory_profile():
+    """A memory profile for this request if it asks for one or is sampled"""
+    if memory_profiler is None:
+        return NULL_PROFILE
+    profile = memory_profiler.start(requested=request.headers.get(PROFILE_HEADER) == '1')
+    if profile is not NULL_PROFILE:
+        g.memory_profile = profile
+    return profile
+
+
+def record_diagnosis(result, answers, knowledge_base=DEFAULT_KNOWLEDGE_BASE, profile=NULL_PROFILE):
+    """Save a diagnosis to history"""
+    diagnosis_data = {
+        'timestamp': datetime.now().isoformat(),
+        'diagnosis': result.diagnosis,
+        'solution': result.solution,
+        'severity': result.severity,
+        'facts': answers
+    }
+    if knowledge_base != DEFAULT_KNOWLEDGE_BASE:
+        diagnosis_data['knowledge_base'] = knowledge_base
+    profile.phase('record')
+    save_diagnosis(diagnosis_data, profile)
+
+
 @app.route('/')
 def index():
     """Main page"""
+    global index_page
     session.clear()
-    return render_template('index.html')
+    if index_page is None:
+        index_page = Asset('index.html', render_template('index.html').encode('utf-8'),
+                           'text/html; charset=utf-8')
+    return cached_response(app, index_page, cache_control='no-cache')
+
+@app.route('/assets/<path:name>')
+def asset(name):
+    """Content-hashed static asset"""
+    static_asset = asset_pipeline.by_hashed_name.get(name)
+    if static_asset is None:
+        abort(404)
+    return cached_response(app, static_asset)
+
+@app.route('/bundle')
+def bundle():
+    """Decision bundle for client-side diagnosis, revalidated by version"""
+    version = decision_bundle['version']
+    if version in request.if_none_match:
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(decision_bundle_bytes, mimetype='application/json')
+    response.set_etag(version)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.errorhandler(Overloaded)
+def overloaded(e):
+    """Shed load with a fast 503 instead of queueing"""
+    response = jsonify({
+        'success': False,
+        'error': str(e)
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+@app.errorhandler(InvalidAnswers)
+def invalid_answers(e):
+    """Refuse answer payloads the schema does not accept"""
+    return jsonify({
+        'success': False,
+        'error': str(e)
+    }), 400
+
+@app.errorhandler(UnknownKnowledgeBase)
+def unknown_knowledge_base(e):
+    """Refuse requests for a knowledge base that is not registered"""
+    return jsonify({
+        'success': False,
+        'error': str(e),
+        'knowledge_bases': knowledge_bases.names()
+    }), 400
 
 @app.route('/diagnose', methods=['POST'])
 def diagnose():
     """Process diagnosis request"""
+    event = event_log.start('web', request_id=g.request_id)
+    profile = start_memory_profile()
+    answers = None
     try:
         data = request.json
         category = data.get('category')
-        answers = data.get('answers', {})
-        
-        # Create expert system instance
-        engine = ComputerDiagnosisSystem()
-        engine.reset()
-        
-        # Convert answers to facts
-        for key, value in answers.items():
-            engine.declare(Fact(**{key: value}))
-        
-        # Run the engine
-        engine.run()
-        
+        kb = knowledge_bases.get(data.get('knowledge_base'))
+        schema = answer_schema if kb.name == DEFAULT_KNOWLEDGE_BASE else kb.schema
+        answers = validate_answers(schema, data.get('answers', {}))
+        event.phase('validate')
+        profile.phase('validate')
+
+        explain = data.get('explain') is True
+        if explain or (EXPLAIN_SAMPLE and event is not NULL_EVENT and random.random() < EXPLAIN_SAMPLE):
+            result, explanation = explain_diagnosis(answers, kb)
+        else:
+            result, explanation = run_diagnosis(answers, kb), None
+        event.phase('diagnose')
+        profile.phase('diagnose')
+
         # Get diagnosis result
-        if engine.diagnosis_result:
-            result = engine.diagnosis_result
-            
-            # Save to history
-            diagnosis_data = {
-                'timestamp': datetime.now().isoformat(),
-                'diagnosis': result['diagnosis'],
-                'solution': result['solution'],
-                'severity': result['severity'],
-                'facts': answers
-            }
-            save_diagnosis(diagnosis_data)
-            
-            return jsonify({
-                'success': True,
-                'diagnosis': result['diagnosis'],
-                'solution': result['solution'],
-                'severity': result['severity']
-            })
+        if result:
+            # Save to history, unless the client opts out (e.g. load tests)
+            if data.get('record', True) is not False:
+                record_diagnosis(result, answers, kb.name, profile)
+            event.phase('record')
+            event.emit(answers=answers, result=result, knowledge_base=kb,
+                       **({'explanation': explanation} if explanation else {}))
+
+            if explain:
+                return jsonify(dict(json.loads(result.response_json), explanation=explanation))
+            # Interned results carry their response body already encoded
+            return app.response_class(result.response_json, mimetype='application/json')
         else:
-            return jsonify({
-                'success': True,
-                'diagnosis': 'General Computer Issue - Basic Troubleshooting',
-                'solution': '1. Restart computer\n2. Check all physical connections\n3. Run Windows Update\n4. Update all drivers\n5. Run antivirus scan\n6. Check Event Viewer for errors\n7. Run SFC /scannow\n8. Check Task Manager for resource usage\n9. Clean temp files\n10. Check for overheating',
-                'severity': 'low'
-            })
-    
+            fallback = kb.results[FALLBACK_RULE]
+            event.emit(answers=answers, result=fallback, knowledge_base=kb)
+            return app.response_class(fallback.response_json,
+                                      mimetype='application/json')
+
+    except (Overloaded, InvalidAnswers, UnknownKnowledgeBase, HTTPException) as e:
+        event.emit(answers=answers, error=e)
+        raise
+    except Exception as e:
+        event.emit(answers=answers, error=e)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+    finally:
+        profile.finish()
+
+@app.route('/diagnose/ranked', methods=['POST'])
+def diagnose_ranked():
+    """Rank the top-k candidate diagnoses for a possibly partial answer set"""
+    try:
+        data = request.json
+        answers = answer_schema.validate(data.get('answers', {}))
+        k = min(max(int(data.get('k', 5)), 1), MAX_HYPOTHESES)
+
+        return jsonify({
+            'success': True,
+            'hypotheses': rule_ranker.rank(answers, k)
+        })
+
+    except (Overloaded, InvalidAnswers, HTTPException):
+        raise
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/history/record', methods=['POST'])
+def record():
+    """Save a diagnosis the browser made from the decision bundle"""
+    try:
+        data = request.json
+        answers = validate_answers(answer_schema, data.get('answers', {}))
+
+        # The server stays authoritative: results from another bundle
+        # version are diagnosed here, and the rule is re-derived from the
+        # answers rather than taken from the client, so a mismatched rule
+        # is overridden instead of recorded
+        if data.get('bundle_version') != decision_bundle['version']:
+            result = run_diagnosis(answers)
+            stale = True
+        else:
+            rule = evaluate_bundle(decision_bundle, answers)['rule']
+            result = bundle_results[rule]
+            stale = rule != data.get('rule')
+        record_diagnosis(result, answers)
+
+        return jsonify({
+            'success': True,
+            'stale': stale,
+            'version': decision_bundle['version'],
+            'diagnosis': result.diagnosis,
+            'solution': result.solution,
+            'severity': result.severity
+        })
+
+    except (Overloaded, InvalidAnswers, HTTPException):
+        raise
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+@app.route('/history/similar', methods=['POST'])
+def similar_cases():
+    """Past cases sharing the most facts with an answer set"""
+    try:
+        data = request.json
+        answers = answer_schema.validate(data.get('answers', {}))
+        k = min(max(int(data.get('k', 5)), 1), MAX_SIMILAR_CASES)
+
+        return jsonify({
+            'success': True,
+            'cases': history_index.similar(answers, k)
+        })
+
+    except (Overloaded, InvalidAnswers, HTTPException):
+        raise
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/history/search')
+def search_history():
+    """Ranked keyword search over past diagnoses"""
+    try:
+        query = request.args.get('q', '')
+        k = min(max(request.args.get('k', 20, type=int), 1), MAX_SEARCH_RESULTS)
+        prefix = request.args.get('prefix') == '1'
+
+        return jsonify({
+            'success': True,
+            'results': search_index.search(query, k, prefix=prefix)
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/stats')
+def stats():
+    """Operational counters for the diagnosis pipeline"""
+    stats = {
+        'admission': admission.stats(),
+        'coalescing': inflight.stats(),
+        'validation': answer_schema.stats(),
+        'knowledge_bases': knowledge_bases.stats(),
+        'events': event_log.stats()
+    }
+    if history_sink is not None:
+        stats['history_sink'] = history_sink.stats()
+    return jsonify(stats)
+
+@app.route('/debug/memory')
+def debug_memory():
+    """Per-phase allocations and top allocation sites of profiled requests
+
+    Only meaningful with a single request in flight: tracemalloc charges
+    concurrent requests' allocations to the profiled one.
+    """
+    if memory_profiler is None:
+        abort(404)
+    return jsonify(memory_profiler.stats(request.args.get('top', 20, type=int)))
+
 @app.route('/history')
 def history():
     """View diagnosis history"""
-    try:
-        with open('diagnosis_history.json', 'r') as f:
-            history_data = json.load(f)
-        return render_template('history.html', history=history_data)
-    except FileNotFoundError:
-        return render_template('history.html', history=[])
+    history = load_history()
+    return render_template('history.html', history=history, stats=history_stats(history))
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(debug=True, host='0.0.0.0', port=5000)